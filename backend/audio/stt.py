@@ -1 +1,201 @@
-# use audio as input
\ No newline at end of file
+import io
+import logging
+import re
+import threading
+import time
+import wave
+from typing import BinaryIO, List, Optional, Union
+
+import numpy as np
+
+from ..config import (
+    STT_MODEL, STT_DEVICE, STT_COMPUTE_TYPE, STT_BEAM_SIZE, STT_LANGUAGE, STT_WORKERS,
+    STT_STREAM_STEP_S, STT_STREAM_MAX_S,
+)
+from ..vision.classes import match_class_name
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # Whisper input rate
+
+_model = None
+_model_lock = threading.Lock()
+
+
+class STTUnavailableError(RuntimeError):
+    """Speech recognition is not installed or the model could not be loaded."""
+
+
+def _whisper_model_class():
+    """faster-whisper (optional) is imported on first use; it pulls in CTranslate2 and PyAV."""
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        return None
+    return WhisperModel
+
+
+def get_stt_model():
+    """Loads the Whisper model once (CTranslate2; safe to call from several threads)."""
+    global _model
+    if _model is not None:
+        return _model
+    with _model_lock:
+        if _model is None:
+            whisper_model = _whisper_model_class()
+            if whisper_model is None:
+                raise STTUnavailableError("faster-whisper is not installed.")
+            print(f"--> LOADING STT MODEL ({STT_MODEL}, {STT_DEVICE}, this happens once)...")
+            _model = whisper_model(
+                STT_MODEL, device=STT_DEVICE, compute_type=STT_COMPUTE_TYPE, num_workers=STT_WORKERS
+            )
+    return _model
+
+
+def warmup_stt():
+    """Loads the model and runs one short transcription so the first request is not slow."""
+    if _whisper_model_class() is None:
+        print("--> STT disabled (faster-whisper is not installed)")
+        return
+    start = time.perf_counter()
+    transcribe(np.zeros(SAMPLE_RATE // 2, dtype=np.float32))
+    print(f"--> STT WARM-UP done ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+
+def pcm16_to_float(data: bytes) -> np.ndarray:
+    """Little-endian 16-bit PCM to float32 samples in [-1, 1]."""
+    usable = len(data) - len(data) % 2
+    return np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+
+
+def _resample(samples: np.ndarray, rate: int) -> np.ndarray:
+    if rate == SAMPLE_RATE or len(samples) == 0:
+        return samples
+    duration = len(samples) / rate
+    target = np.linspace(0.0, duration, int(duration * SAMPLE_RATE), endpoint=False)
+    return np.interp(target, np.arange(len(samples)) / rate, samples).astype(np.float32)
+
+
+def decode_audio(data: bytes) -> Union[np.ndarray, BinaryIO]:
+    """
+    Decodes an upload in memory. 16-bit PCM WAV becomes 16 kHz mono float32 samples;
+    other containers (e.g. the browser's WebM/Opus) are handed to the model's own
+    decoder as an in-memory file. Nothing is written to disk.
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            with wave.open(io.BytesIO(data)) as wav:
+                if wav.getsampwidth() == 2:
+                    samples = pcm16_to_float(wav.readframes(wav.getnframes()))
+                    channels = wav.getnchannels()
+                    if channels > 1:
+                        samples = samples[: len(samples) - len(samples) % channels]
+                        samples = samples.reshape(-1, channels).mean(axis=1)
+                    return _resample(samples, wav.getframerate())
+        except wave.Error:
+            pass  # e.g. float WAV; let the model's decoder handle it
+    return io.BytesIO(data)
+
+
+def transcribe(audio: Union[np.ndarray, BinaryIO, str]) -> str:
+    """Transcribes samples, an in-memory file or a path. Raises STTUnavailableError."""
+    model = get_stt_model()
+    segments, _ = model.transcribe(
+        audio,
+        language=STT_LANGUAGE,
+        beam_size=STT_BEAM_SIZE,
+        condition_on_previous_text=False,
+        without_timestamps=True,
+    )
+    return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+def transcribe_audio_to_text(audio: Union[bytes, str]) -> str:
+    """
+    Transcribes an uploaded recording (raw bytes) or an audio file path.
+    Returns "" if nothing was recognized.
+    """
+    if isinstance(audio, (bytes, bytearray)):
+        if not audio:
+            return ""
+        return transcribe(decode_audio(bytes(audio)))
+    return transcribe(audio)
+
+
+class StreamingTranscriber:
+    """
+    Transcribes an utterance while it is being recorded. The client sends 16 kHz mono
+    PCM16 chunks; every `step_s` seconds of new audio the buffered utterance (at most
+    the last `max_s` seconds) is transcribed again, so partial text, and often the
+    target, is known before the user stops speaking.
+    """
+
+    def __init__(self, step_s: float = STT_STREAM_STEP_S, max_s: float = STT_STREAM_MAX_S):
+        self.step_samples = int(step_s * SAMPLE_RATE)
+        self.max_samples = int(max_s * SAMPLE_RATE)
+        self._chunks: List[np.ndarray] = []
+        self._buffered = 0
+        self._new_samples = 0
+        self.text = ""
+
+    def feed(self, pcm: bytes) -> Optional[str]:
+        """Adds a chunk; returns updated partial text when a step's worth of audio arrived."""
+        samples = pcm16_to_float(pcm)
+        if not len(samples):
+            return None
+        self._chunks.append(samples)
+        self._buffered += len(samples)
+        self._new_samples += len(samples)
+        while self._buffered - len(self._chunks[0]) >= self.max_samples:
+            self._buffered -= len(self._chunks.pop(0))
+        if self._new_samples < self.step_samples:
+            return None
+        return self._transcribe()
+
+    def finish(self) -> str:
+        """Final transcript of the utterance."""
+        if self._new_samples:
+            self._transcribe()
+        return self.text
+
+    def _transcribe(self) -> str:
+        self._new_samples = 0
+        audio = np.concatenate(self._chunks)[-self.max_samples:]
+        self.text = transcribe(audio)
+        return self.text
+
+
+# Command words before the object in phrases like "where are my keys"
+_COMMAND = re.compile(
+    r"^\s*(?:please\s+)?(?:can you\s+|could you\s+)?"
+    r"(?:find|locate|look(?:ing)? for|search for|show me|where(?:'s| is| are| did i (?:leave|put))|help me find)\s+"
+    r"(?:me\s+)?(?:my|the|a|an|our|your)?\s*",
+    re.IGNORECASE,
+)
+
+
+def extract_target_object(text: str) -> Optional[str]:
+    """
+    Picks the target out of a spoken command. The object after the command words is
+    matched against the detector class names (with aliases such as "phone" or "mug");
+    objects the detector does not know ("keys", "car keys") are kept as spoken, so
+    saved anchors with those names still work.
+    """
+    if not text:
+        return None
+    match = _COMMAND.match(text)
+    if not match:
+        return match_class_name(text)
+
+    words = re.findall(r"[a-z']+", text[match.end():].lower())
+    for stop in ("please", "now", "again", "for", "in", "on", "at", "near"):
+        if stop in words:
+            words = words[:words.index(stop)]
+    words = words[:4]
+    if not words:
+        return None
+    # A class is the target only if it is the head (last) noun: "car keys" stays as spoken
+    class_name = match_class_name(" ".join(words))
+    if class_name and match_class_name(words[-1]) == class_name:
+        return class_name
+    return " ".join(words)
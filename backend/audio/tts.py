@@ -1,29 +1,283 @@
+import abc
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import wave
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
 
-# fix implementation later 
+from ..config import DATA_DIR, TTS_ENGINE, TTS_LANG, TTS_CACHE_MAX_MB, TTS_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Generated speech lives in its own directory so eviction never touches other files
+TTS_DIR = Path(DATA_DIR) / "tts"
+TTS_URL_PREFIX = "/data/tts"
+
+
+class TTSEngine(abc.ABC):
+    """Turns text into an audio file. Subclasses set `name` and `extension`."""
+
+    name = ""
+    extension = ""
+
+    @abc.abstractmethod
+    def synthesize(self, text: str, path: str):
+        """Writes the spoken text to `path`."""
+
+
+class GTTSEngine(TTSEngine):
+    """Google TTS (network). gtts is imported on first use."""
+
+    name = "gtts"
+    extension = "mp3"
+
+    def __init__(self, lang: str = TTS_LANG):
+        self.lang = lang
+
+    def synthesize(self, text: str, path: str):
+        from gtts import gTTS
+        gTTS(text=text, lang=self.lang).save(path)
+
+
+class Pyttsx3Engine(TTSEngine):
+    """Offline system voices through pyttsx3 (espeak / SAPI5 / NSSpeechSynthesizer)."""
+
+    name = "pyttsx3"
+    extension = "wav"
+
+    def __init__(self):
+        try:
+            import pyttsx3  # optional: offline engine (TTS_ENGINE=pyttsx3)
+        except ImportError:
+            raise RuntimeError("pyttsx3 is not installed.")
+        self._engine = pyttsx3.init()
+        self._lock = threading.Lock()  # the driver is not thread-safe
+
+    def synthesize(self, text: str, path: str):
+        with self._lock:
+            self._engine.save_to_file(text, path)
+            self._engine.runAndWait()
+
+
+class SilentEngine(TTSEngine):
+    """Writes silence roughly as long as the spoken text. For local testing and benchmarks."""
+
+    name = "silent"
+    extension = "wav"
+    sample_rate = 8000
+
+    def synthesize(self, text: str, path: str):
+        seconds = 0.06 * len(text)
+        with wave.open(path, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(1)
+            out.setframerate(self.sample_rate)
+            out.writeframes(b"\x80" * int(seconds * self.sample_rate))
+
+
+TTS_ENGINES = {
+    GTTSEngine.name: GTTSEngine,
+    Pyttsx3Engine.name: Pyttsx3Engine,
+    SilentEngine.name: SilentEngine,
+}
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+class AudioCache:
+    """
+    Content-addressed speech files: the file name is a hash of engine, language and
+    text, so a repeated guidance sentence is synthesized once and served from disk.
+    Files are evicted least recently used once the directory exceeds `max_bytes`.
+    Generation runs on a small thread pool, off the frame path. Cache hits only update
+    the in-memory LRU order; flush() writes it to the file times (at shutdown).
+    """
+
+    def __init__(self, engine: TTSEngine, directory: Path = TTS_DIR, max_bytes: int = 64 * 1024 * 1024,
+                 workers: int = 1):
+        self.engine = engine
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # file name -> size, oldest first
+        self._total_bytes = 0
+        self._pending: Dict[str, Future] = {}
+        self._touched: Set[str] = set()  # hit since the last flush()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+        self.hits = 0
+        self.misses = 0
+        self._load_existing()
+
+    def _load_existing(self):
+        """Picks up files from a previous run, oldest access first."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = sorted(
+            (p for p in self.directory.glob(f"*.{self.engine.extension}") if p.is_file()),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for path in files:
+            size = path.stat().st_size
+            self._entries[path.name] = size
+            self._total_bytes += size
+        self._evict()
+
+    def file_name(self, text: str) -> str:
+        lang = getattr(self.engine, "lang", "")
+        digest = hashlib.sha1(f"{self.engine.name}|{lang}|{normalize_text(text).lower()}".encode("utf-8"))
+        return f"{digest.hexdigest()[:20]}.{self.engine.extension}"
+
+    def get(self, text: str) -> Optional[str]:
+        """URL of the cached audio for `text`, or None."""
+        name = self.file_name(text)
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+            self._touched.add(name)
+        return f"{TTS_URL_PREFIX}/{name}"
+
+    def flush(self):
+        """
+        Persists the LRU order for the next run (_load_existing sorts by mtime): files hit
+        since the last flush get increasing modification times, in access order.
+        """
+        with self._lock:
+            touched = [name for name in self._entries if name in self._touched]
+            self._touched.clear()
+        now = time.time_ns()
+        for i, name in enumerate(touched):
+            mtime = now - (len(touched) - i) * 1000
+            try:
+                os.utime(self.directory / name, ns=(mtime, mtime))
+            except OSError:
+                pass
+
+    def url(self, text: str) -> str:
+        """Where the audio for `text` is (or will be) served; the name is derived from the text."""
+        return f"{TTS_URL_PREFIX}/{self.file_name(normalize_text(text))}"
+
+    def request(self, text: str) -> Tuple[Optional[str], bool]:
+        """
+        Returns (audio URL, ready). If the audio is not cached it is generated in the
+        background; the URL is already final, so the client can fetch it once it exists.
+        """
+        text = normalize_text(text)
+        if not text:
+            return None, False
+        url = self.get(text)
+        with self._lock:
+            if url is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if url is not None:
+            return url, True
+        self._submit(text)
+        return self.url(text), False
+
+    def synthesize(self, text: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Blocking variant of request(): waits for the audio and returns its URL."""
+        text = normalize_text(text)
+        if not text:
+            return None
+        url = self.get(text)
+        if url is not None:
+            return url
+        return self._submit(text).result(timeout)
+
+    def _submit(self, text: str) -> Future:
+        name = self.file_name(text)
+        with self._lock:
+            future = self._pending.get(name)
+            if future is None:
+                future = self._pending[name] = self._executor.submit(self._generate, name, text)
+        return future
+
+    def _generate(self, name: str, text: str) -> Optional[str]:
+        path = self.directory / name
+        tmp_path = path.with_name(f".{name}.tmp")
+        try:
+            self.engine.synthesize(text, str(tmp_path))
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+            with self._lock:
+                self._entries[name] = size
+                self._total_bytes += size
+                self._evict()
+            return f"{TTS_URL_PREFIX}/{name}"
+        except Exception as e:
+            logger.error(f"TTS Error: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(name, None)
+
+    def _evict(self):
+        """Drops the least recently used files until under max_bytes (caller holds the lock)."""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._touched.discard(name)
+            try:
+                (self.directory / name).unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "engine": self.engine.name,
+                "files": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "pending": len(self._pending),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_audio_cache: Optional[AudioCache] = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> AudioCache:
+    """Shared cache for the configured engine (TTS_ENGINE), created on first use."""
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            engine_cls = TTS_ENGINES.get(TTS_ENGINE)
+            if engine_cls is None:
+                raise ValueError(f"Unknown TTS_ENGINE '{TTS_ENGINE}'. Expected one of {sorted(TTS_ENGINES)}.")
+            _audio_cache = AudioCache(engine_cls(), max_bytes=int(TTS_CACHE_MAX_MB * 1024 * 1024), workers=TTS_WORKERS)
+        return _audio_cache
+
+
+def flush_audio_cache():
+    """Writes the cache's LRU order to disk, if the cache was used (call at shutdown)."""
+    with _audio_cache_lock:
+        cache = _audio_cache
+    if cache is not None:
+        cache.flush()
 
-import os
-import uuid
-from gtts import gTTS
-from ..config import DATA_DIR
 
 def convert_text_to_audio(text_to_speak: str) -> str:
     """
-    Uses Google TTS to convert text to an MP3 file.
+    Converts text to speech and returns the URL path the frontend will use.
+    Blocks until the audio exists; the frame path uses get_audio_cache().request() instead.
     """
     if not text_to_speak:
         return ""
-    
     try:
-        # Generate a unique filename 
-        filename = f"speech_{uuid.uuid4().hex[:8]}.mp3"
-        file_path = os.path.join(DATA_DIR, filename)
-        
-        tts = gTTS(text=text_to_speak, lang='en')
-        tts.save(file_path)
-        
-        # Return the URL path that the frontend will use
-        return f"/data/{filename}"
-
+        return get_audio_cache().synthesize(text_to_speak) or ""
     except Exception as e:
-        print(f"TTS Error: {e}")
+        logger.error(f"TTS Error: {e}")
         return ""
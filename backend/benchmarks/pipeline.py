@@ -0,0 +1,223 @@
+"""
+Benchmark for the detection-to-guidance pipeline.
+
+Replays recorded frames either in-process (stage by stage) or through the FastAPI app
+with N concurrent clients, using a deterministic stand-in for the Gemini call.
+
+    PYTHONPATH=. python -m backend.benchmarks.pipeline --frames recordings/ --repeat 5
+    PYTHONPATH=. python -m backend.benchmarks.pipeline --synthetic 50 --mode app --clients 4
+    PYTHONPATH=. python -m backend.benchmarks.pipeline --frames recordings/ --mode http --url http://127.0.0.1:8000
+"""
+
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from ..utils.metrics import registry, timed, QUANTILES
+
+FRAME_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+
+class StubLLM:
+    """
+    Deterministic local stand-in for query_llm. Sleeps `latency_s` and returns a
+    sentence derived from the prompt hash, so identical scenes give identical answers.
+    """
+
+    def __init__(self, latency_s: float = 0.5):
+        self.latency_s = latency_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, system_prompt: str, user_prompt: str = "Please provide the guidance.") -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency_s)
+        digest = hashlib.sha1((system_prompt + user_prompt).encode("utf-8")).hexdigest()[:8]
+        return f"Stub guidance {digest}: the object is directly ahead."
+
+
+def install_stub_llm(stub: StubLLM):
+    """Routes every LLM call in the backend to the stub."""
+    from ..llm import client, models
+    client.query_llm = stub
+    models.query_llm = stub
+
+
+def load_frames(frames_dir: str = None, synthetic: int = 0, size=(480, 640)) -> List[bytes]:
+    if frames_dir:
+        paths = sorted(p for p in Path(frames_dir).iterdir() if p.suffix.lower() in FRAME_SUFFIXES)
+        if not paths:
+            raise SystemExit(f"No frames ({', '.join(sorted(FRAME_SUFFIXES))}) found in {frames_dir}")
+        return [p.read_bytes() for p in paths]
+
+    import cv2
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(synthetic):
+        img = rng.integers(0, 255, size=(*size, 3), dtype=np.uint8)
+        frames.append(cv2.imencode(".jpg", img)[1].tobytes())
+    return frames
+
+
+def run_in_process(frames: List[bytes], repeat: int, clients: int, target: str, no_cache: bool) -> int:
+    """Runs each pipeline stage directly, timing it with the shared metrics registry."""
+    from ..llm.models import llm_generate_guidance, guidance_cache
+    from ..vision.detection import detect_objects
+    from ..vision.ingest import load_image_from_bytes, encode_jpeg
+    from ..vision.visualization import draw_detections_cv2
+
+    def process(frame_bytes: bytes):
+        with timed("total"):
+            with timed("decode"):
+                frame, _ = load_image_from_bytes(frame_bytes)
+            with timed("detect"):
+                detections = detect_objects(frame)
+            with timed("annotate"):
+                annotated = draw_detections_cv2(frame, detections)
+            with timed("encode"):
+                jpeg_bytes = encode_jpeg(annotated)
+            with timed("base64"):
+                base64.b64encode(jpeg_bytes)
+            if no_cache:
+                guidance_cache.clear()
+            with timed("guidance"):
+                llm_generate_guidance(target, detections, [])
+
+    workload = frames * repeat
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(process, workload))
+    return len(workload)
+
+
+def run_against_app(frames: List[bytes], repeat: int, clients: int, target: str, url: str = None) -> int:
+    """Posts frames to /api/process_frame from `clients` concurrent clients."""
+    if url:
+        import httpx
+        make_client: Callable = lambda: httpx.Client(base_url=url, timeout=60.0)
+    else:
+        from fastapi.testclient import TestClient
+        from ..main import app
+        shared = TestClient(app)
+        shared.__enter__()
+        make_client = lambda: shared
+
+    # One session per client: frames of one session are processed one at a time (session.lock),
+    # so clients sharing the default session would measure lock contention, not batching
+    local = threading.local()
+    client_ids = itertools.count()
+
+    def post(frame_bytes: bytes):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = make_client()
+            local.headers = {"X-Session-Id": f"bench-{next(client_ids)}"}
+            client.post("/api/set_target_text", json={"name": target}, headers=local.headers).raise_for_status()
+        start = time.perf_counter()
+        response = client.post(
+            "/api/process_frame", files={"file": ("frame.jpg", frame_bytes, "image/jpeg")}, headers=local.headers
+        )
+        registry.observe("stage_duration_seconds", time.perf_counter() - start, stage="http_request")
+        response.raise_for_status()
+        # Server-side stages (only visible over HTTP when running against a remote server)
+        if url:
+            for entry in response.headers.get("server-timing", "").split(","):
+                if ";dur=" in entry:
+                    stage, dur = entry.strip().split(";dur=")
+                    registry.observe("stage_duration_seconds", float(dur) / 1000.0, stage=f"server_{stage}")
+
+    workload = frames * repeat
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(post, workload))
+    return len(workload)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def build_report(mode: str, processed: int, elapsed: float, stub: StubLLM) -> Dict:
+    stages = {}
+    for series, stats in sorted(registry.snapshot().items()):
+        if series.startswith("stage_duration_seconds."):
+            stages[series.split(".", 1)[1]] = {
+                key: round(value * 1000, 2) if key != "count" else value for key, value in stats.items()
+            }
+    return {
+        "mode": mode,
+        "frames": processed,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_fps": round(processed / elapsed, 2) if elapsed else 0.0,
+        "llm_calls": stub.calls,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages_ms": stages,
+    }
+
+
+def print_report(report: Dict):
+    print(f"\nmode={report['mode']} frames={report['frames']} elapsed={report['elapsed_s']}s "
+          f"throughput={report['throughput_fps']} fps llm_calls={report['llm_calls']} "
+          f"peak_rss={report['peak_rss_mb']} MB")
+    columns = ["count", "mean"] + [f"p{int(q * 100)}" for q in QUANTILES]
+    print(f"{'stage (ms)':<24}" + "".join(f"{c:>10}" for c in columns))
+    for stage, stats in report["stages_ms"].items():
+        print(f"{stage:<24}" + "".join(f"{stats.get(c, ''):>10}" for c in columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Clear Path frame pipeline.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--frames", help="Directory of recorded .jpg/.png frames to replay.")
+    source.add_argument("--synthetic", type=int, help="Generate N random 640x480 frames instead.")
+    parser.add_argument("--mode", choices=["inprocess", "app", "http"], default="inprocess")
+    parser.add_argument("--url", help="Base URL of a running server (mode=http).")
+    parser.add_argument("--clients", type=int, default=1, help="Concurrent clients/threads.")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the frame set this many times.")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Stub LLM latency in seconds.")
+    parser.add_argument("--target", default="cup")
+    parser.add_argument("--no-cache", action="store_true", help="Clear the guidance cache before every frame.")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed frames run first (inprocess/app).")
+    parser.add_argument("--json", help="Also write the report to this file.")
+    args = parser.parse_args(argv)
+
+    if args.mode == "http" and not args.url:
+        parser.error("--mode http requires --url")
+
+    frames = load_frames(args.frames, args.synthetic or 0)
+    stub = StubLLM(args.llm_latency)
+    if args.mode != "http":
+        install_stub_llm(stub)
+        from ..vision.detection import detect_objects
+        from ..vision.ingest import load_image_from_bytes
+        for frame_bytes in frames[:args.warmup]:
+            detect_objects(load_image_from_bytes(frame_bytes)[0])
+
+    # Only measure the timed run
+    registry.reset()
+    start = time.perf_counter()
+    if args.mode == "inprocess":
+        processed = run_in_process(frames, args.repeat, args.clients, args.target, args.no_cache)
+    else:
+        processed = run_against_app(frames, args.repeat, args.clients, args.target, args.url)
+    report = build_report(args.mode, processed, time.perf_counter() - start, stub)
+
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
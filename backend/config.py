@@ -0,0 +1,135 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Gemini API (GEMINI_API_ENDPOINT points the client at another server, e.g. a local fake)
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash")
+# Per-request timeout and overall deadline for one query (retries included)
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", 8.0))
+LLM_DEADLINE_S = float(os.getenv("LLM_DEADLINE_S", 12.0))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", 0.25))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+# Hedging: send a duplicate request once an attempt is slower than the recent p95
+LLM_HEDGE = os.getenv("LLM_HEDGE", "1") == "1"
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_RESET_S = float(os.getenv("LLM_BREAKER_RESET_S", 30.0))
+LLM_MODEL_CACHE_SIZE = int(os.getenv("LLM_MODEL_CACHE_SIZE", 32))
+
+# Startup: with LAZY_STARTUP=1 the server accepts connections immediately and loads the
+# detector and database in the background (/readyz reports when it can take frames).
+# STT, TTS and the LLM SDK are always loaded on first use in that mode.
+LAZY_STARTUP = os.getenv("LAZY_STARTUP", "0") == "1"
+
+# Directory for generated files served under /data (audio, etc.)
+DATA_DIR = os.getenv("DATA_DIR", str(BASE_DIR / "data"))
+
+# Text-to-speech: "gtts" (network), "pyttsx3" (offline, optional) or "silent" (local testing).
+# Audio is cached by content under DATA_DIR/tts and evicted LRU above TTS_CACHE_MAX_MB.
+TTS_ENABLED = os.getenv("TTS_ENABLED", "1") == "1"
+TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts").lower()
+TTS_LANG = os.getenv("TTS_LANG", "en")
+TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", 64))
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", 1))
+
+# Speech-to-text: local faster-whisper model (optional), loaded and warmed up at startup
+STT_MODEL = os.getenv("STT_MODEL", "tiny.en")
+STT_DEVICE = os.getenv("STT_DEVICE", "cpu")
+STT_COMPUTE_TYPE = os.getenv("STT_COMPUTE_TYPE", "int8")
+STT_BEAM_SIZE = int(os.getenv("STT_BEAM_SIZE", 1))
+STT_LANGUAGE = os.getenv("STT_LANGUAGE", "en")
+STT_WORKERS = int(os.getenv("STT_WORKERS", 2))  # concurrent transcriptions
+# Streaming input (/api/stt/stream): re-transcribe every step, keep at most max seconds
+STT_STREAM_STEP_S = float(os.getenv("STT_STREAM_STEP_S", 1.0))
+STT_STREAM_MAX_S = float(os.getenv("STT_STREAM_MAX_S", 15.0))
+
+# Frame streaming (WebSocket)
+STREAM_MAX_FRAME_BYTES = int(os.getenv("STREAM_MAX_FRAME_BYTES", 4 * 1024 * 1024))
+
+# Guidance worker: LLM guidance runs off the frame path
+GUIDANCE_ASYNC = os.getenv("GUIDANCE_ASYNC", "1") == "1"
+GUIDANCE_WORKERS = int(os.getenv("GUIDANCE_WORKERS", 2))
+GUIDANCE_MIN_INTERVAL_S = float(os.getenv("GUIDANCE_MIN_INTERVAL_S", 1.0))
+
+# Answer simple scenes (target visible, saved anchor, nothing detected) from templates
+GUIDANCE_RULES = os.getenv("GUIDANCE_RULES", "1") == "1"
+
+# Guidance cache keyed on the scene signature
+GUIDANCE_CACHE_TTL_S = float(os.getenv("GUIDANCE_CACHE_TTL_S", 30.0))
+GUIDANCE_CACHE_SIZE = int(os.getenv("GUIDANCE_CACHE_SIZE", 256))
+
+# Batched YOLO inference across concurrent requests (batch size 1 disables batching)
+DETECTION_BATCH_SIZE = int(os.getenv("DETECTION_BATCH_SIZE", 4))
+DETECTION_BATCH_WAIT_MS = float(os.getenv("DETECTION_BATCH_WAIT_MS", 5.0))
+
+# Detector backend: "torch" (Ultralytics .pt), "onnx" (ONNX Runtime) or "openvino".
+# Exported models are created next to yolov8n.pt on first use.
+DETECTOR_BACKEND = os.getenv("DETECTOR_BACKEND", "torch").lower()
+DETECTOR_IMGSZ = int(os.getenv("DETECTOR_IMGSZ", 640))
+DETECTOR_THREADS = int(os.getenv("DETECTOR_THREADS", 0))  # 0 = library default
+DETECTOR_WARMUP_RUNS = int(os.getenv("DETECTOR_WARMUP_RUNS", 2))
+
+# Inference worker processes (0 = run the detector in the API process). Workers receive frames
+# through shared-memory slots; a session is always served by the same worker. A frame for a
+# worker with no free slot gets HTTP 429. Spawned workers each load their own model copy;
+# INFERENCE_START_METHOD=fork shares the PyTorch weights copy-on-write instead, but only
+# without LAZY_STARTUP (workers must be forked before the server takes traffic).
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 0))
+INFERENCE_START_METHOD = os.getenv("INFERENCE_START_METHOD", "spawn").lower()
+INFERENCE_QUEUE_DEPTH = int(os.getenv("INFERENCE_QUEUE_DEPTH", 2))  # frames in flight per worker
+INFERENCE_SLOT_MB = float(os.getenv("INFERENCE_SLOT_MB", 6.0))  # per slot; 1080p BGR is ~5.9 MB
+INFERENCE_TIMEOUT_S = float(os.getenv("INFERENCE_TIMEOUT_S", 10.0))
+# Threads for sync endpoints (0 = Starlette's default of 40)
+HTTP_THREADPOOL_SIZE = int(os.getenv("HTTP_THREADPOOL_SIZE", 0))
+
+# Target-aware detection: between full scans (every N detection passes) only the target's
+# classes plus obstacle classes are detected, inside a region around the target's last box.
+TARGETED_DETECTION = os.getenv("TARGETED_DETECTION", "1") == "1"
+DETECTOR_FULL_SCAN_INTERVAL = int(os.getenv("DETECTOR_FULL_SCAN_INTERVAL", 5))
+DETECTOR_ROI = os.getenv("DETECTOR_ROI", "1") == "1"
+DETECTOR_ROI_MARGIN = float(os.getenv("DETECTOR_ROI_MARGIN", 1.0))  # box sizes added on each side
+DETECTOR_ROI_MIN_FRACTION = float(os.getenv("DETECTOR_ROI_MIN_FRACTION", 0.35))  # of frame width/height
+
+# Object tracking: full detection every N frames, boxes are propagated in between (1 = always detect)
+TRACKER_DETECT_INTERVAL = int(os.getenv("TRACKER_DETECT_INTERVAL", 3))
+TRACKER_IOU_THRESHOLD = float(os.getenv("TRACKER_IOU_THRESHOLD", 0.3))
+TRACKER_MAX_MISSES = int(os.getenv("TRACKER_MAX_MISSES", 2))
+TRACKER_MIN_CONFIDENCE = float(os.getenv("TRACKER_MIN_CONFIDENCE", 0.35))
+
+# Temporal smoothing of direction/distance: per-object EMA of center and box area, hysteresis
+# bands around the bucket thresholds, and a new bucket only after N consecutive updates.
+SMOOTHING = os.getenv("SMOOTHING", "1") == "1"
+SMOOTHING_ALPHA = float(os.getenv("SMOOTHING_ALPHA", 0.5))  # weight of the newest frame
+SMOOTHING_POSITION_BAND = float(os.getenv("SMOOTHING_POSITION_BAND", 0.03))  # of frame width/height
+SMOOTHING_AREA_BAND = float(os.getenv("SMOOTHING_AREA_BAND", 0.25))  # relative to the box area
+SMOOTHING_STABLE_FRAMES = int(os.getenv("SMOOTHING_STABLE_FRAMES", 2))
+
+# Scene-change gate: near-duplicate frames reuse the session's last detections and guidance.
+# Threshold is the mean absolute difference of 32x24 grayscale thumbnails (0-255).
+SCENE_GATE = os.getenv("SCENE_GATE", "1") == "1"
+SCENE_DIFF_THRESHOLD = float(os.getenv("SCENE_DIFF_THRESHOLD", 4.0))
+SCENE_MAX_SKIPS = int(os.getenv("SCENE_MAX_SKIPS", 10))  # consecutive skipped frames before a forced refresh
+
+# Frame ingest: large JPEGs are decoded at reduced scale, no smaller than the detector input
+INGEST_REDUCED_DECODE = os.getenv("INGEST_REDUCED_DECODE", "1") == "1"
+ANNOTATED_JPEG_QUALITY = int(os.getenv("ANNOTATED_JPEG_QUALITY", 80))
+
+# Sessions: one per client (X-Session-Id header or session_id query parameter)
+SESSION_IDLE_TIMEOUT_S = float(os.getenv("SESSION_IDLE_TIMEOUT_S", 15 * 60))
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", 1000))
+
+# Anchors: read-through cache of per-user anchors (DATABASE_URL selects the database)
+ANCHOR_CACHE_USERS = int(os.getenv("ANCHOR_CACHE_USERS", 1000))
+# Only the most relevant anchors go into the guidance prompt (positions are on a 0-100 scale)
+ANCHOR_PROMPT_TOP_K = int(os.getenv("ANCHOR_PROMPT_TOP_K", 5))
+ANCHOR_NEAR_RADIUS = float(os.getenv("ANCHOR_NEAR_RADIUS", 15.0))
+ANCHOR_GRID_CELL = float(os.getenv("ANCHOR_GRID_CELL", 10.0))
+# Minimum appearance similarity (0-1) for a detection to be recognized as a saved anchor
+ANCHOR_MATCH_THRESHOLD = float(os.getenv("ANCHOR_MATCH_THRESHOLD", 0.85))
@@ -15,3 +15,9 @@ class Detection:
     confidence: float
     relative_direction: str = "" 
     distance_estimate: str = ""
+    track_id: Optional[int] = None
+    # Normalized (0.0 - 1.0) box center in the frame
+    x_center_norm: Optional[float] = None
+    y_center_norm: Optional[float] = None
+    # Name of the saved anchor this detection looks like (see vision/anchors.py)
+    anchor_name: Optional[str] = None
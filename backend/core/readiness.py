@@ -0,0 +1,43 @@
+import threading
+import time
+from typing import Dict, Optional
+
+
+class Readiness:
+    """
+    Warm-up state of the subsystems a replica needs before it can take frames.
+    Each component is "pending", "loading", "ready" or "failed"; the replica is
+    ready once every component is ready.
+    """
+
+    def __init__(self, *components: str):
+        self._lock = threading.Lock()
+        self._states: Dict[str, str] = {name: "pending" for name in components}
+        self._errors: Dict[str, str] = {}
+        self.started_at = time.monotonic()
+        self.ready_at: Optional[float] = None
+
+    def set(self, component: str, state: str, error: Optional[str] = None):
+        with self._lock:
+            self._states[component] = state
+            if error:
+                self._errors[component] = error
+            else:
+                self._errors.pop(component, None)
+            if self.ready_at is None and all(s == "ready" for s in self._states.values()):
+                self.ready_at = time.monotonic()
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(state == "ready" for state in self._states.values())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "ready": all(state == "ready" for state in self._states.values()),
+                "components": dict(self._states),
+                "errors": dict(self._errors),
+                "uptime_s": round(time.monotonic() - self.started_at, 1),
+                "warmup_s": round(self.ready_at - self.started_at, 1) if self.ready_at is not None else None,
+            }
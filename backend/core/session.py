@@ -1,19 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional, List
+from ..config import (
+    TRACKER_DETECT_INTERVAL, TRACKER_IOU_THRESHOLD, TRACKER_MAX_MISSES, TRACKER_MIN_CONFIDENCE,
+    SESSION_IDLE_TIMEOUT_S, SESSION_MAX_COUNT, SCENE_DIFF_THRESHOLD, SCENE_MAX_SKIPS,
+    TARGETED_DETECTION, DETECTOR_FULL_SCAN_INTERVAL, DETECTOR_ROI, DETECTOR_ROI_MARGIN, DETECTOR_ROI_MIN_FRACTION,
+    SMOOTHING_ALPHA, SMOOTHING_POSITION_BAND, SMOOTHING_AREA_BAND, SMOOTHING_STABLE_FRAMES,
+)
+from ..vision.scene import SceneChangeDetector
+from ..vision.targeting import DetectionPlanner
+from ..vision.tracking import ObjectTracker
+from ..utils.geometry import TemporalBucketFilter
 from .models import Detection
 
+DEFAULT_SESSION_ID = "default"
+
 class SessionManager:
-    def __init__(self):
+    """State of one client: target, detections, tracker and latest guidance."""
+
+    def __init__(self, session_id: str = DEFAULT_SESSION_ID):
+        self.session_id = session_id
+        # Held while a frame runs through the tracker, so one session's frames are applied in order
+        self.lock = threading.RLock()
+        self.last_seen = time.monotonic()
         self.current_target_name: Optional[str] = "person" 
         self.last_detections: List[Detection] = []
+        self.tracker = ObjectTracker(
+            detect_interval=TRACKER_DETECT_INTERVAL,
+            iou_threshold=TRACKER_IOU_THRESHOLD,
+            max_misses=TRACKER_MAX_MISSES,
+            min_confidence=TRACKER_MIN_CONFIDENCE,
+        )
+        self.scene = SceneChangeDetector(threshold=SCENE_DIFF_THRESHOLD, max_skips=SCENE_MAX_SKIPS)
+        # Direction/distance buckets held steady across frames (see utils/geometry.py)
+        self.smoother = TemporalBucketFilter(
+            alpha=SMOOTHING_ALPHA,
+            position_band=SMOOTHING_POSITION_BAND,
+            area_band=SMOOTHING_AREA_BAND,
+            stable_frames=SMOOTHING_STABLE_FRAMES,
+        )
+        self.planner = DetectionPlanner(
+            full_scan_interval=DETECTOR_FULL_SCAN_INTERVAL,
+            class_filter=TARGETED_DETECTION,
+            roi=TARGETED_DETECTION and DETECTOR_ROI,
+            roi_margin=DETECTOR_ROI_MARGIN,
+            roi_min_fraction=DETECTOR_ROI_MIN_FRACTION,
+        )
+        # Latest guidance produced by the background guidance worker
+        self.guidance_text: str = ""
+        self.guidance_updated_at: Optional[float] = None
+        self.guidance_scene: Optional[tuple] = None
+        self.guidance_requested_at: float = 0.0
+        # Latest annotated frame, served separately for image=url responses
+        self.annotated_frame_id: int = 0
+        self.annotated_jpeg: Optional[bytes] = None
     
     def set_target(self, target_name: str):
         self.current_target_name = target_name
+        self.reset_guidance()
+        self.scene.reset()
+        self.planner.reset()
+        self.smoother.reset()
         print(f"Target set to: {target_name}")
 
     def clear_target(self):
         self.current_target_name = None
+        self.reset_guidance()
 
     def update_detections(self, detections: List[Detection]):
         self.last_detections = detections
 
-session_state = SessionManager()
+    def store_annotated_frame(self, jpeg_bytes: bytes) -> int:
+        """Keeps only the newest annotated frame; returns its id."""
+        self.annotated_frame_id += 1
+        self.annotated_jpeg = jpeg_bytes
+        return self.annotated_frame_id
+
+    def set_guidance(self, text: str):
+        self.guidance_text = text
+        self.guidance_updated_at = time.monotonic()
+
+    def reset_guidance(self):
+        self.guidance_text = ""
+        self.guidance_updated_at = None
+        self.guidance_scene = None
+
+    def guidance_age(self) -> Optional[float]:
+        """Seconds since the current guidance was produced, or None if there is none yet."""
+        if self.guidance_updated_at is None:
+            return None
+        return time.monotonic() - self.guidance_updated_at
+
+class SessionRegistry:
+    """
+    Sessions keyed by client-provided id. Sessions idle for longer than `idle_timeout_s`
+    are evicted, and at most `max_sessions` are kept (least recently used go first).
+    """
+
+    def __init__(self, idle_timeout_s: float = SESSION_IDLE_TIMEOUT_S, max_sessions: int = SESSION_MAX_COUNT):
+        self.idle_timeout_s = idle_timeout_s
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, SessionManager]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str = DEFAULT_SESSION_ID) -> SessionManager:
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = SessionManager(session_id)
+            session.last_seen = now
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+            return session
+
+    def remove(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _evict(self, now: float):
+        # Oldest entries are first, so stop at the first one that is still active
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - oldest.last_seen <= self.idle_timeout_s:
+                break
+            del self._sessions[oldest_id]
+            print(f"Session evicted: {oldest_id}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+sessions = SessionRegistry()
@@ -0,0 +1,68 @@
+import re
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from ..core.models import Detection
+from ..utils.spatial import GridIndex
+from ..vision.anchors import build_embedding_matrix
+from .models import Anchor
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Relevance weights used by AnchorIndex.select
+NAME_MATCH_SCORE = 3.0      # anchor name is the target
+TOKEN_MATCH_SCORE = 2.0     # anchor name shares a word with the target
+LABEL_MATCH_SCORE = 1.0     # anchor name shares a word with something in view
+PROXIMITY_SCORE = 1.0       # anchor saved where something is in view now (scaled by distance)
+
+
+def tokenize(text: str) -> Set[str]:
+    return set(_TOKEN.findall((text or "").lower()))
+
+
+class AnchorIndex:
+    """
+    One user's anchors, indexed by name word and by saved position (0-100 grid).
+    select() only looks at anchors reachable through the indexes, so picking the
+    prompt anchors stays cheap as the number of saved anchors grows.
+    Appearance embeddings are stacked into `embeddings` for vectorized matching.
+    """
+
+    def __init__(self, anchors: List[Anchor], cell_size: float = 10.0):
+        self.anchors = anchors
+        self._by_name: Dict[str, List[int]] = defaultdict(list)
+        self._by_token: Dict[str, List[int]] = defaultdict(list)
+        self._grid = GridIndex(cell_size)
+        for i, anchor in enumerate(anchors):
+            self._by_name[(anchor.name or "").strip().lower()].append(i)
+            for token in tokenize(anchor.name):
+                self._by_token[token].append(i)
+            self._grid.insert(i, anchor.x_center, anchor.y_center)
+        self.embeddings, self.embedding_owners = build_embedding_matrix(anchors)
+
+    def __len__(self) -> int:
+        return len(self.anchors)
+
+    def select(self, target_name: str, detections: List[Detection], k: int, radius: float) -> List[Anchor]:
+        """Top-k anchors by relevance to the target and to what is currently in view."""
+        scores: Dict[int, float] = defaultdict(float)
+
+        for i in self._by_name.get((target_name or "").strip().lower(), ()):
+            scores[i] += NAME_MATCH_SCORE
+        for token in tokenize(target_name):
+            for i in self._by_token.get(token, ()):
+                scores[i] += TOKEN_MATCH_SCORE
+
+        for token in set().union(*(tokenize(d.label) for d in detections)) if detections else ():
+            for i in self._by_token.get(token, ()):
+                scores[i] += LABEL_MATCH_SCORE
+
+        for det in detections:
+            if det.x_center_norm is None or det.y_center_norm is None:
+                continue
+            for i, distance in self._grid.query_radius(det.x_center_norm * 100, det.y_center_norm * 100, radius):
+                scores[i] += PROXIMITY_SCORE * (1.0 - distance / radius)
+
+        # Highest score first; newer anchors win ties
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [self.anchors[i] for i, _ in ranked[:k]]
@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from ..config import ANCHOR_CACHE_USERS, ANCHOR_GRID_CELL
+from . import crud
+from .anchor_index import AnchorIndex
+from .models import Anchor
+
+
+class AnchorStore:
+    """
+    Read-through cache of each user's anchors in front of the database.
+
+    The first lookup for a user loads all their anchors in one query and indexes them
+    (see AnchorIndex); later lookups (every guidance request) are served from memory
+    until a write for that user invalidates the entry. At most `max_users` users are cached.
+    """
+
+    def __init__(self, session_factory=None, max_users: int = ANCHOR_CACHE_USERS):
+        self._session_factory = session_factory
+        self.max_users = max_users
+        self._cache: "OrderedDict[str, AnchorIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate() while a load is in flight: a load that raced with a write
+        # is not cached. Kept only for users with loads in flight (`_loads`), so it stays bounded
+        self._generations: Dict[str, int] = {}
+        self._loads: Dict[str, int] = {}
+        self._epoch = 0
+
+    def _session(self):
+        if self._session_factory is None:
+            # The engine and tables are set up on first use, not at import
+            from .db_config import SessionLocal, init_db
+            init_db()
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def get_anchors(self, user_id: str) -> List[Anchor]:
+        return self.get_index(user_id).anchors
+
+    def get_index(self, user_id: str) -> AnchorIndex:
+        with self._lock:
+            index = self._cache.get(user_id)
+            if index is not None:
+                self._cache.move_to_end(user_id)
+                return index
+            generation = (self._epoch, self._generations.get(user_id, 0))
+            self._loads[user_id] = self._loads.get(user_id, 0) + 1
+
+        try:
+            db = self._session()
+            try:
+                anchors = crud.get_anchors_for_user(db, user_id)
+                db.expunge_all()  # detached copies are safe to share across threads
+            finally:
+                db.close()
+        except Exception:
+            with self._lock:
+                self._end_load(user_id)
+            raise
+
+        index = AnchorIndex(anchors, cell_size=ANCHOR_GRID_CELL)
+        with self._lock:
+            current = (self._epoch, self._generations.get(user_id, 0))
+            self._end_load(user_id)
+            if generation != current:
+                return index  # written meanwhile: the result may be stale, do not cache it
+            self._cache[user_id] = index
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_users:
+                self._cache.popitem(last=False)
+        return index
+
+    def _end_load(self, user_id: str):
+        """Called under the lock when a load finishes; forgets the generation once none is in flight."""
+        self._loads[user_id] -= 1
+        if not self._loads[user_id]:
+            del self._loads[user_id]
+            self._generations.pop(user_id, None)
+
+    def add_anchor(
+        self, user_id: str, name: str, description: str, x_center: float, y_center: float,
+        feature_vector: Optional[bytes] = None, label: Optional[str] = None,
+    ) -> Anchor:
+        db = self._session()
+        try:
+            anchor = crud.create_anchor(
+                db, name, description, x_center, y_center,
+                user_id=user_id, feature_vector=feature_vector, label=label,
+            )
+            db.expunge(anchor)
+        finally:
+            db.close()
+        self.invalidate(user_id)
+        return anchor
+
+    def delete_anchor(self, user_id: str, anchor_id: int) -> bool:
+        db = self._session()
+        try:
+            deleted = crud.delete_anchor(db, anchor_id, user_id=user_id)
+        finally:
+            db.close()
+        self.invalidate(user_id)
+        return deleted
+
+    def invalidate(self, user_id: Optional[str] = None):
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+                self._epoch += 1
+            else:
+                self._cache.pop(user_id, None)
+                if user_id in self._loads:
+                    self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+
+anchor_store = AnchorStore()
@@ -1,26 +1,46 @@
+from typing import Optional
 from sqlalchemy.orm import Session
 from .models import Anchor
 
-def create_anchor(db: Session, name: str, description: str, x_center: float, y_center: float) -> Anchor:
+def create_anchor(
+    db: Session, name: str, description: str, x_center: float, y_center: float,
+    user_id: str = "default", feature_vector: Optional[bytes] = None, label: Optional[str] = None,
+) -> Anchor:
     anchor = Anchor(
+        user_id=user_id,
         name=name,
         description=description,
         x_center=x_center,
-        y_center=y_center
+        y_center=y_center,
+        feature_vector=feature_vector,
+        label=label,
         )
     db.add(anchor)
     db.commit()
     db.refresh(anchor)
     return anchor
 
-def get_anchor_by_name(db: Session, name:str) -> Anchor | None:
-    return db.query(Anchor).filter(Anchor.name == name).first()
+def get_anchor_by_name(db: Session, name: str, user_id: Optional[str] = None) -> Anchor | None:
+    query = db.query(Anchor).filter(Anchor.name == name)
+    if user_id is not None:
+        query = query.filter(Anchor.user_id == user_id)
+    return query.first()
 
-def get_all_anchors(db: Session, skip: int = 0, limit: int = 100) -> list[Anchor]:
-    return db.query(Anchor).offset(skip).limit(limit).all()
+def get_all_anchors(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[str] = None) -> list[Anchor]:
+    query = db.query(Anchor)
+    if user_id is not None:
+        query = query.filter(Anchor.user_id == user_id)
+    return query.order_by(Anchor.id).offset(skip).limit(limit).all()
 
-def delete_anchor(db: Session, anchor_id: int) -> bool:
-    anchor = db.query(Anchor).filter(Anchor.id == anchor_id).first()
+def get_anchors_for_user(db: Session, user_id: str) -> list[Anchor]:
+    """All of a user's anchors in one (index-backed) query."""
+    return db.query(Anchor).filter(Anchor.user_id == user_id).order_by(Anchor.id).all()
+
+def delete_anchor(db: Session, anchor_id: int, user_id: Optional[str] = None) -> bool:
+    query = db.query(Anchor).filter(Anchor.id == anchor_id)
+    if user_id is not None:
+        query = query.filter(Anchor.user_id == user_id)
+    anchor = query.first()
     if anchor:
         db.delete(anchor)
         db.commit()
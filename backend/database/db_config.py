@@ -1,24 +1,60 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base 
+import os
+import threading
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from .models import Base
 
 load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'clear_path.db')}"
+DATABASE_URL = os.getenv("DATABASE_URL") or DEFAULT_DATABASE_URL
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def _engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        # SQLite connections are shared across FastAPI's threadpool
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
 
-# Create a SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 
-Base = declarative_base()
+# Create a SessionLocal class (objects stay usable after commit, e.g. in the anchor cache)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+_initialized = False
+_init_lock = threading.Lock()
+
+def _add_missing_columns():
+    """
+    create_all() does not alter existing tables, so columns added to a model later
+    (anchors.feature_vector, anchors.label) are added here. New columns must be nullable.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            print(f"--> Adding column {table.name}.{column.name}")
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
 
 def init_db():
-    """Creates all tables defined in models.py."""
-    print("Initializing database tables")
-    from . import models 
-    Base.metadata.create_all(bind=engine)
+    """Creates all tables defined in models.py and adds missing columns (once per process)."""
+    global _initialized
+    with _init_lock:
+        if not _initialized:
+            print("Initializing database tables")
+            Base.metadata.create_all(bind=engine)
+            _add_missing_columns()
+            _initialized = True
 
 def get_db():
     """Provides a database session for API route."""
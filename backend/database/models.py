@@ -1,13 +1,20 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Index, Integer, String, Float, LargeBinary
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
 class Anchor(Base):
     __tablename__ = 'anchors'
+    __table_args__ = (
+        # Per-user lookups by name
+        Index("ix_anchors_user_name", "user_id", "name"),
+    )
 
     # Primary Key
     id = Column(Integer, primary_key=True)
+
+    # Owner (the client session id)
+    user_id = Column(String, nullable=False, index=True, default="default")
     
     # What the user called it
     name = Column(String, nullable=False, index=True) 
@@ -18,7 +25,11 @@ class Anchor(Base):
     x_center = Column(Float, nullable=False)
     y_center = Column(Float, nullable=False)
     
-    # implement later feature_vector = Column(BLOB) 
+    # Appearance embedding of the saved crop (packed float32, see vision/anchors.py)
+    feature_vector = Column(LargeBinary, nullable=True)
+
+    # Detector class of the saved object; only detections of this class can match the anchor
+    label = Column(String, nullable=True)
     
     def __repr__(self):
         return f"Anchor(id={self.id}, name='{self.name}', coords=({self.x_center:.2f}, {self.y_center:.2f}))"
@@ -1,25 +1,375 @@
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterator, Optional
 
-load_dotenv()
+from ..config import (
+    GEMINI_API_KEY, GEMINI_API_ENDPOINT, LLM_MODEL, LLM_TIMEOUT_S, LLM_DEADLINE_S, LLM_MAX_RETRIES,
+    LLM_BACKOFF_BASE_S, LLM_MAX_CONCURRENCY, LLM_HEDGE, LLM_HEDGE_MIN_SAMPLES,
+    LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_S, LLM_MODEL_CACHE_SIZE,
+)
+from ..utils.metrics import registry, timed
+
+logger = logging.getLogger(__name__)
+
+# The Gemini SDK is imported and configured on the first LLM call (it is slow to import)
+genai = None
+google_exceptions = None
+_genai_lock = threading.Lock()
+
+
+def _load_genai():
+    global genai, google_exceptions
+    with _genai_lock:
+        if genai is None:
+            import google.generativeai as sdk
+            if GEMINI_API_ENDPOINT:
+                # e.g. GEMINI_API_ENDPOINT=http://localhost:8080 for a local fake server (REST transport)
+                sdk.configure(api_key=GEMINI_API_KEY or "local", transport="rest",
+                              client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+            else:
+                sdk.configure(api_key=GEMINI_API_KEY)
+            try:
+                from google.api_core import exceptions as api_exceptions
+                google_exceptions = api_exceptions
+            except ImportError:  # installed with google-generativeai; only used to classify errors
+                pass
+            genai = sdk
+    return genai
+
+ATTEMPT_HISTOGRAM = "llm_attempt_duration_seconds"
+FIRST_CHUNK_HISTOGRAM = "llm_first_chunk_seconds"
+
+
+class LLMError(RuntimeError):
+    """The LLM did not return a response (upstream error, deadline exceeded or call rejected)."""
+
+
+class LLMUnavailableError(LLMError):
+    """The call was rejected without a response: circuit open or too many calls in flight."""
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, ValueError):
+        return False  # e.g. response.text on a reply blocked by the safety filters
+    if google_exceptions is not None and isinstance(exc, google_exceptions.ClientError):
+        return isinstance(exc, (google_exceptions.TooManyRequests, google_exceptions.RequestTimeout))
+    return True
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed calls and rejects calls for
+    `reset_timeout_s`. After that a single trial call is let through (half-open):
+    success closes the circuit, failure opens it again. A trial that ends without
+    either (e.g. rejected locally) must call end_trial() so the next one can run.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout_s:
+                return "open"
+            return "half_open"
+
+    def allow(self) -> Optional[str]:
+        """None if the call is rejected, else "closed" or "trial" (the half-open trial call)."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout_s or self._trial_in_flight:
+                return None
+            self._trial_in_flight = True
+            return "trial"
+
+    def end_trial(self):
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class LLMClient:
+    """
+    Long-lived Gemini client shared by all requests.
+
+    - GenerativeModel objects are cached per system instruction (LRU).
+    - Every call has an overall deadline; each attempt gets its own request timeout.
+    - Retryable failures are retried with full-jitter exponential backoff.
+    - With hedging on, a duplicate request is sent once an attempt outlives the p95
+      attempt latency, and the first answer wins.
+    - At most `max_concurrency` upstream requests are in flight; a circuit breaker
+      fails fast while the API is down.
+    """
+
+    def __init__(
+        self,
+        model_name: str = LLM_MODEL,
+        timeout_s: float = LLM_TIMEOUT_S,
+        deadline_s: float = LLM_DEADLINE_S,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base_s: float = LLM_BACKOFF_BASE_S,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        hedge: bool = LLM_HEDGE,
+        model_cache_size: int = LLM_MODEL_CACHE_SIZE,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.model_name = model_name
+        self.timeout_s = timeout_s
+        self.deadline_s = deadline_s
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.hedge = hedge
+        self.model_cache_size = model_cache_size
+        self.breaker = breaker or CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_S)
+        self._models: "OrderedDict[str, object]" = OrderedDict()  # genai.GenerativeModel
+        self._models_lock = threading.Lock()
+        # Every attempt holds a limiter slot, so the executor never queues work
+        self._limiter = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    def get_model(self, system_instruction: str):
+        with self._models_lock:
+            model = self._models.get(system_instruction)
+            if model is not None:
+                self._models.move_to_end(system_instruction)
+                return model
+        model = _load_genai().GenerativeModel(model_name=self.model_name, system_instruction=system_instruction)
+        with self._models_lock:
+            self._models[system_instruction] = model
+            while len(self._models) > self.model_cache_size:
+                self._models.popitem(last=False)
+        return model
+
+    def generate(self, system_instruction: str, user_prompt: str) -> str:
+        """Returns the response text or raises LLMError."""
+        permit = self.breaker.allow()
+        if not permit:
+            registry.inc("llm_rejected_total")
+            raise LLMUnavailableError("LLM circuit breaker is open.")
+        try:
+            return self._generate(system_instruction, user_prompt)
+        finally:
+            if permit == "trial":
+                self.breaker.end_trial()  # no-op if the outcome was recorded
+
+    def _generate(self, system_instruction: str, user_prompt: str) -> str:
+        deadline = time.monotonic() + self.deadline_s
+        model = self.get_model(system_instruction)
+        attempt = 0
+        with timed("llm"):
+            while True:
+                try:
+                    text = self._call_once(model, user_prompt, deadline)
+                except Exception as e:
+                    attempt += 1
+                    backoff = self._retry_delay(e, attempt, deadline)
+                    if backoff is None:
+                        if isinstance(e, LLMError):
+                            raise
+                        raise LLMError(f"Gemini API Error: {e}") from e
+                    time.sleep(backoff)
+                else:
+                    self.breaker.record_success()
+                    return text
+
+    def stream(self, system_instruction: str, user_prompt: str) -> Iterator[str]:
+        """
+        Yields response text chunks as the model produces them, or raises LLMError.
+        Failures before the first chunk are retried like generate(); after that the
+        stream cannot be restarted. Streams are not hedged.
+        """
+        permit = self.breaker.allow()
+        if not permit:
+            registry.inc("llm_rejected_total")
+            raise LLMUnavailableError("LLM circuit breaker is open.")
+        try:
+            yield from self._stream(system_instruction, user_prompt)
+        finally:
+            if permit == "trial":
+                self.breaker.end_trial()  # no-op if the outcome was recorded
+
+    def _stream(self, system_instruction: str, user_prompt: str) -> Iterator[str]:
+        deadline = time.monotonic() + self.deadline_s
+        model = self.get_model(system_instruction)
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._limiter.acquire(timeout=remaining):
+                # Rejected locally: says nothing about the upstream, so not a breaker failure
+                raise LLMUnavailableError("Too many LLM calls in flight.")
+            registry.inc("llm_calls_total")
+            with self._in_flight_lock:
+                self._in_flight += 1
+            start = time.perf_counter()
+            yielded = False
+            try:
+                response = model.generate_content(
+                    user_prompt, stream=True, request_options={"timeout": min(self.timeout_s, remaining)}
+                )
+                for chunk in response:
+                    text = chunk.text
+                    if not text:
+                        continue
+                    if not yielded:
+                        registry.observe(FIRST_CHUNK_HISTOGRAM, time.perf_counter() - start)
+                        yielded = True
+                    yield text
+                    if time.monotonic() > deadline:
+                        raise LLMError("LLM stream exceeded its deadline.")
+            except GeneratorExit:
+                self.breaker.record_success()  # the consumer stopped reading; upstream was fine
+                raise
+            except Exception as e:
+                attempt += 1
+                if yielded:
+                    registry.inc("llm_errors_total")
+                    self.breaker.record_failure()
+                    backoff = None
+                else:
+                    backoff = self._retry_delay(e, attempt, deadline)
+                if backoff is None:
+                    if isinstance(e, LLMError):
+                        raise
+                    raise LLMError(f"Gemini API Error: {e}") from e
+            else:
+                registry.observe(ATTEMPT_HISTOGRAM, time.perf_counter() - start)
+                self.breaker.record_success()
+                return
+            finally:
+                with self._in_flight_lock:
+                    self._in_flight -= 1
+                self._limiter.release()
+            time.sleep(backoff)
+
+    def _retry_delay(self, exc: Exception, attempt: int, deadline: float) -> Optional[float]:
+        """Backoff before the next attempt, or None once the query has failed for good."""
+        retryable = _is_retryable(exc)
+        backoff = random.uniform(0, self.backoff_base_s * 2 ** (attempt - 1))
+        if retryable and attempt <= self.max_retries and time.monotonic() + backoff < deadline:
+            registry.inc("llm_retries_total")
+            logger.warning(f"Gemini API Error (attempt {attempt}, retrying in {backoff:.2f}s): {exc}")
+            return backoff
+        registry.inc("llm_errors_total")
+        if isinstance(exc, LLMUnavailableError):
+            pass  # rejected locally (limiter full): no upstream outcome to record
+        elif retryable:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()  # upstream answered; the request was bad
+        return None
+
+    def _call_once(self, model, user_prompt: str, deadline: float) -> str:
+        """One attempt, plus a hedged duplicate if it runs past the p95 latency."""
+        remaining = deadline - time.monotonic()
+        timeout = min(self.timeout_s, remaining)
+        primary = self._start_attempt(model, user_prompt, timeout, block_s=remaining)
+        if primary is None:
+            raise LLMUnavailableError("Too many LLM calls in flight.")
+        pending = {primary}
+
+        hedge_after = self._hedge_delay()
+        if hedge_after is not None and hedge_after < timeout:
+            done, _ = wait(pending, timeout=hedge_after)
+            if not done:
+                hedged = self._start_attempt(model, user_prompt, min(self.timeout_s, deadline - time.monotonic()))
+                if hedged is not None:
+                    registry.inc("llm_hedged_total")
+                    pending.add(hedged)
+
+        error: Optional[Exception] = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+        # Abandoned attempts finish on their own within their request timeout
+        raise error or LLMError("LLM call exceeded its deadline.")
+
+    def _start_attempt(self, model, user_prompt: str, timeout_s: float, block_s: float = 0.0) -> Optional[Future]:
+        """Submits one upstream request if a limiter slot frees up within `block_s`."""
+        if timeout_s <= 0:
+            return None
+        acquired = self._limiter.acquire(timeout=block_s) if block_s > 0 else self._limiter.acquire(blocking=False)
+        if not acquired:
+            return None
+        registry.inc("llm_calls_total")
+        try:
+            return self._executor.submit(self._attempt, model, user_prompt, timeout_s)
+        except Exception:
+            self._limiter.release()
+            raise
+
+    def _attempt(self, model, user_prompt: str, timeout_s: float) -> str:
+        with self._in_flight_lock:
+            self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = model.generate_content(user_prompt, request_options={"timeout": timeout_s})
+            text = response.text.strip()
+            registry.observe(ATTEMPT_HISTOGRAM, time.perf_counter() - start)
+            return text
+        finally:
+            with self._in_flight_lock:
+                self._in_flight -= 1
+            self._limiter.release()
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge:
+            return None
+        return registry.quantile(ATTEMPT_HISTOGRAM, 0.95, min_samples=LLM_HEDGE_MIN_SAMPLES)
+
+    def stats(self) -> dict:
+        return {
+            "circuit_state": self.breaker.state,
+            "in_flight": self._in_flight,
+            "cached_models": len(self._models),
+        }
+
+
+llm_client = LLMClient()
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 def query_llm(system_prompt: str, user_prompt: str = "Please provide the guidance.") -> str:
     """
     Sends the prompts to Google Gemini (Flash) and returns the text response.
+    Raises LLMError if no response arrives within the call's deadline.
+    """
+    return llm_client.generate(system_prompt, user_prompt)
+
+
+def query_llm_stream(system_prompt: str, user_prompt: str = "Please provide the guidance.") -> Iterator[str]:
+    """
+    Like query_llm, but yields the response text in chunks as Gemini streams it.
     """
-    try:
-        model = genai.GenerativeModel(
-            model_name="gemini-2.5-flash",
-            system_instruction=system_prompt
-        )
-
-        response = model.generate_content(user_prompt)
-        
-        return response.text.strip()
-    
-    except Exception as e:
-        print(f"Gemini API Error: {e}")
-        return "I am unable to generate guidance right now."
+    return llm_client.stream(system_prompt, user_prompt)
@@ -1,19 +1,98 @@
 import json
 import logging
-from typing import List
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
 
+from ..config import GUIDANCE_CACHE_SIZE, GUIDANCE_CACHE_TTL_S, GUIDANCE_RULES
 from ..database.models import Anchor
 from ..core.models import Detection
-from .prompts import get_description_system_prompt, get_guidance_system_prompt
-from .client import query_llm
-from .utils import clean_llm_response
+from .prompts import get_guidance_system_prompt, get_guidance_user_prompt
+from .client import query_llm, query_llm_stream
+from .rules import rule_based_guidance
+from .utils import IncrementalCleaner, clean_llm_response
+from ..utils.metrics import registry
 
 logger = logging.getLogger(__name__)
 
+
+class GuidanceCache:
+    """
+    Size-bounded LRU cache of guidance sentences with a time-to-live.
+    Keys are scene signatures (see scene_signature).
+    """
+
+    def __init__(self, ttl_s: float, max_size: int):
+        self.ttl_s = ttl_s
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] <= self.ttl_s:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, text: str):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (text, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+guidance_cache = GuidanceCache(ttl_s=GUIDANCE_CACHE_TTL_S, max_size=GUIDANCE_CACHE_SIZE)
+
+
+def scene_signature(target_name: str, detections: List[Detection], anchors: List[Anchor]) -> tuple:
+    """
+    Normalized, order-independent summary of everything the guidance prompt depends on.
+    Confidences are left out: direction and distance are already coarse buckets, so
+    frames of a still scene map to the same signature.
+    """
+    target = (target_name or "").strip().lower()
+    detection_key = tuple(sorted(
+        (det.label, det.relative_direction, det.distance_estimate, det.anchor_name or "") for det in detections
+    ))
+    anchor_key = tuple(sorted(
+        (anchor.name, anchor.description or "", round(anchor.x_center, 1), round(anchor.y_center, 1))
+        for anchor in anchors
+    ))
+    return (target, detection_key, anchor_key)
+
 def format_anchors_for_llm(anchors: List[Anchor]) -> str:
     """
-    Converts a list of Database Anchor objects into a clean JSON string 
+    Converts a list of Database Anchor objects into a compact JSON string 
     that the LLM can easily read to understand spatial context.
+    Callers pass only the relevant anchors (see AnchorIndex.select).
     """
     anchor_list = []
     for anchor in anchors:
@@ -26,7 +105,7 @@ def format_anchors_for_llm(anchors: List[Anchor]) -> str:
             }
         })
     
-    return json.dumps(anchor_list, indent=2)
+    return json.dumps(anchor_list, separators=(",", ":"))
 
 
 def format_detections_for_llm(detections: List[Detection]) -> str:
@@ -36,18 +115,43 @@ def format_detections_for_llm(detections: List[Detection]) -> str:
     """
     detection_list = []
     for det in detections:
-        detection_list.append({
+        entry = {
             "label": det.label,
             "confidence": round(det.confidence, 2),
             "position": {
                 "relative_direction": det.relative_direction,
                 "distance_estimate": det.distance_estimate
             }
-        })
+        }
+        if det.anchor_name:
+            entry["looks_like_saved_anchor"] = det.anchor_name
+        detection_list.append(entry)
     
     return json.dumps(detection_list, indent=2)
 
 
+def build_guidance_prompt(target_name: str, detections: List[Detection], anchors: List[Anchor]) -> Tuple[str, str]:
+    """Returns the (system prompt, user prompt) pair for a guidance query."""
+    anchor_json = format_anchors_for_llm(anchors)
+    detection_json = format_detections_for_llm(detections)
+    user_prompt = get_guidance_user_prompt(
+        target_name=target_name,
+        anchor_json=anchor_json, 
+        detection_json=detection_json
+    )
+    return get_guidance_system_prompt(), user_prompt
+
+
+def local_guidance(target_name: str, detections: List[Detection], anchors: List[Anchor]) -> Optional[str]:
+    """Template answer for simple scenes (see llm/rules.py), or None if the LLM is needed."""
+    if not GUIDANCE_RULES:
+        return None
+    text = rule_based_guidance(target_name, detections, anchors)
+    if text is not None:
+        registry.inc("guidance_rule_answers_total")
+    return text
+
+
 def llm_generate_guidance(
     target_name: str,
     detections: List[Detection],
@@ -56,35 +160,70 @@ def llm_generate_guidance(
     """
     The main coordinator for generating guidance.
     
-    1. Formats visual and memory data.
-    2. Constructs the System Prompt.
-    3. Calls the LLM API.
-    4. Cleans and returns the spoken instruction.
+    0. Answers simple scenes from templates, then returns cached guidance
+       if the scene signature was seen recently.
+    1. Formats visual and memory data into the prompts.
+    2. Calls the LLM API (raises LLMError if it fails).
+    3. Cleans and returns the spoken instruction.
     """
     
-    # 1. Format Inputs
-    anchor_json = format_anchors_for_llm(anchors)
-    detection_json = format_detections_for_llm(detections)
-    
-    # 2. Construct the Prompt
-    system_prompt = get_guidance_system_prompt(
-        target_name=target_name,
-        anchor_json=anchor_json, 
-        detection_json=detection_json
-    )
-    
-    # 3. Call the LLM API
-    user_query = f"Where is the {target_name}?"
+    # 0. Simple scenes need no LLM; reuse guidance for an unchanged scene
+    local = local_guidance(target_name, detections, anchors)
+    if local is not None:
+        return local
+    signature = scene_signature(target_name, detections, anchors)
+    cached = guidance_cache.get(signature)
+    if cached is not None:
+        return cached
+
+    # 1. Construct the Prompt
+    system_prompt, user_query = build_guidance_prompt(target_name, detections, anchors)
     
+    # 2. Call the LLM API
     logger.info(f"Querying LLM for target: {target_name}")
     
-    try:
-        raw_response = query_llm(system_prompt, user_prompt=user_query)
-    except Exception as e:
-        logger.error(f"Failed to query LLM: {e}")
-        return f"I'm sorry, I'm having trouble thinking right now. Please try again."
+    # Errors propagate: the caller decides what to say, and failures are never cached
+    raw_response = query_llm(system_prompt, user_prompt=user_query)
 
-    # 4. Clean the Response
+    # 3. Clean the Response
     guidance_text = clean_llm_response(raw_response)
+    guidance_cache.put(signature, guidance_text)
     
     return guidance_text
+
+
+def stream_guidance(
+    target_name: str,
+    detections: List[Detection],
+    anchors: List[Anchor]
+) -> Iterator[str]:
+    """
+    Streaming llm_generate_guidance: yields cleaned guidance text as the model
+    produces it. Template and cached answers are yielded in one piece.
+    Raises LLMError on failure.
+    """
+    local = local_guidance(target_name, detections, anchors)
+    if local is not None:
+        yield local
+        return
+    signature = scene_signature(target_name, detections, anchors)
+    cached = guidance_cache.get(signature)
+    if cached is not None:
+        yield cached
+        return
+
+    system_prompt, user_query = build_guidance_prompt(target_name, detections, anchors)
+    logger.info(f"Streaming LLM guidance for target: {target_name}")
+
+    cleaner = IncrementalCleaner()
+    parts = []
+    for chunk in query_llm_stream(system_prompt, user_prompt=user_query):
+        text = cleaner.feed(chunk)
+        if text:
+            parts.append(text)
+            yield text
+    tail = cleaner.finish()
+    if tail:
+        parts.append(tail)
+        yield tail
+    guidance_cache.put(signature, "".join(parts))
@@ -1,17 +1,39 @@
-def get_description_system_prompt(detected_objects_json: str, target_name: str) -> str:
-    """
-    Generates a system prompt to describe the target object based on visual context.
-    The LLM helps refine the generic detection label into a useful, persistent description.
-    """
-    return f"""
+# System prompts are static so the client can reuse one GenerativeModel per prompt
+# (see LLMClient.get_model); everything that changes per request goes in the user prompt.
+
+DESCRIPTION_SYSTEM_PROMPT = """
 You are a highly detailed object descriptor for a vision assistant.
 
 **TASK:**
 1.  Analyze the provided JSON list of currently detected objects.
-2.  Find the object most closely matching the user's requested name: "{target_name}".
+2.  Find the object most closely matching the user's requested name.
 3.  Generate a **concise, single-sentence** description (max 20 words) for the chosen object.
 4.  The description must focus on color, size, and unique features that will help a user locate it later.
 5.  Do NOT include the word 'detected' or its coordinates. Only output the description text.
+"""
+
+GUIDANCE_SYSTEM_PROMPT = """
+You are an assistive navigation guide for a visually impaired user. Be concise and actionable.
+
+Each request names the object the user is looking for, the known anchors (memory of
+previous saves) and the current camera detections.
+
+Respond with ONE short sentence that tells the user where to look or move (direction + rough distance). If the target is not detected, say so and mention the most relevant nearby object instead.
+"""
+
+
+def get_description_system_prompt() -> str:
+    """System prompt for describing a saved object; the detections go in the user prompt."""
+    return DESCRIPTION_SYSTEM_PROMPT
+
+
+def get_description_user_prompt(detected_objects_json: str, target_name: str) -> str:
+    """
+    Generates the request to describe the target object based on visual context.
+    The LLM helps refine the generic detection label into a useful, persistent description.
+    """
+    return f"""
+Describe the "{target_name}".
 
 ---
 **DETECTED OBJECTS:**
@@ -19,11 +41,14 @@ You are a highly detailed object descriptor for a vision assistant.
 """
 
 
-def get_guidance_system_prompt(target_name: str, anchor_json: str, detection_json: str) -> str:
-    """Builds the guidance system prompt for the navigation LLM call."""
-    return f"""
-You are an assistive navigation guide for a visually impaired user. Be concise and actionable.
+def get_guidance_system_prompt() -> str:
+    """System prompt for the navigation LLM call; the scene goes in the user prompt."""
+    return GUIDANCE_SYSTEM_PROMPT
 
+
+def get_guidance_user_prompt(target_name: str, anchor_json: str, detection_json: str) -> str:
+    """Builds the per-request guidance prompt: the target and the current scene."""
+    return f"""
 User is looking for "{target_name}".
 
 Known anchors (memory of previous saves):
@@ -32,5 +57,5 @@ Known anchors (memory of previous saves):
 Current camera detections:
 {detection_json}
 
-Respond with ONE short sentence that tells the user where to look or move (direction + rough distance). If the target is not detected, say so and mention the most relevant nearby object instead.
+Where is the {target_name}?
 """
@@ -0,0 +1,76 @@
+import re
+from typing import List, Optional
+
+from ..core.models import Detection
+from ..database.models import Anchor
+from ..utils.geometry import DISTANCE_PHRASES, calculate_relative_direction
+from ..vision.classes import is_plural_phrase, phrase_words, resolve_class_name, strip_determiners
+
+# Spoken form of each DISTANCE_PHRASES bucket (the parenthesized meter ranges are for the LLM)
+SPOKEN_DISTANCES = dict(zip(DISTANCE_PHRASES, (
+    "very close",
+    "about an arm's length away",
+    "a few steps away",
+    "far away",
+)))
+
+NOTHING_DETECTED = "I don't see anything yet. Try turning slowly."
+
+
+def speakable_direction(phrase: str) -> str:
+    """Direction phrase without Markdown emphasis, e.g. "to your far left and up"."""
+    phrase = phrase.replace("**", "")
+    return re.sub(r"(?<=\S)and ", " and ", phrase)
+
+
+def matches_target(name: str, target_name: str) -> bool:
+    """
+    True if a label or anchor name refers to the target: the same phrase ("my keys" ~ "keys"),
+    or the detector class the whole target phrase names ("mug" ~ "cup"). A partial word
+    overlap is not a match: a detected "car" is not the target "car keys".
+    """
+    name_words = phrase_words(name)
+    if not name_words:
+        return False
+    if name_words == phrase_words(target_name):
+        return True
+    target_class = resolve_class_name(target_name)
+    return target_class is not None and name_words == phrase_words(target_class)
+
+
+def rule_based_guidance(target_name: str, detections: List[Detection], anchors: List[Anchor]) -> Optional[str]:
+    """
+    Template guidance for the common, unambiguous scenes:
+    - the target is detected in exactly one place,
+    - the target is not detected but a saved anchor with its name exists,
+    - nothing is detected at all.
+    Returns None when the scene needs the LLM.
+    """
+    target = (target_name or "").strip()
+    if not target:
+        return None
+
+    matches = [
+        det for det in detections
+        if matches_target(det.label, target) or (det.anchor_name and matches_target(det.anchor_name, target))
+    ]
+    if matches:
+        places = {(det.relative_direction, det.distance_estimate) for det in matches}
+        if len(places) > 1:
+            return None  # several candidates in different places
+        det = matches[0]
+        distance = SPOKEN_DISTANCES.get(det.distance_estimate)
+        if not det.relative_direction or distance is None:
+            return None
+        verb = "are" if is_plural_phrase(target) else "is"
+        return f"The {strip_determiners(target)} {verb} {speakable_direction(det.relative_direction)}, {distance}."
+
+    for anchor in anchors:
+        if matches_target(anchor.name, target):
+            direction = calculate_relative_direction(anchor.x_center / 100, anchor.y_center / 100)
+            saved = "them, they were" if is_plural_phrase(target) else "it, it was"
+            return f"I don't see the {strip_determiners(target)} right now. When you saved {saved} {speakable_direction(direction)}."
+
+    if not detections:
+        return NOTHING_DETECTED
+    return None
@@ -1,4 +1,5 @@
 import re
+from typing import Optional
 
 def clean_llm_response(response_text: str) -> str:
     """
@@ -8,3 +9,78 @@ def clean_llm_response(response_text: str) -> str:
     cleaned = re.sub(r"^```[a-zA-Z]*\n", "", response_text.strip())
     cleaned = re.sub(r"\n```$", "", cleaned)
     return cleaned.strip()
+
+
+class IncrementalCleaner:
+    """
+    Streaming version of clean_llm_response: feed() returns the text that is safe
+    to show so far, finish() the remainder. Joined, the outputs equal
+    clean_llm_response() of the whole response.
+    """
+
+    _OPENING_FENCE = re.compile(r"```[a-zA-Z]*\n")
+    _HOLD_BACK = re.compile(r"[\s`]*$")  # could still become the closing fence or trailing space
+
+    def __init__(self):
+        self._head = ""
+        self._started = False
+        self._emitted = False
+        self._held = ""
+
+    def feed(self, chunk: str) -> str:
+        if not self._started:
+            self._head += chunk
+            text = self._head.lstrip()
+            if not text or ("```".startswith(text) or text.startswith("```")) and "\n" not in text:
+                return ""  # cannot tell yet whether the response opens with a code fence
+            match = self._OPENING_FENCE.match(text)
+            if match:
+                if not text[match.end():].strip():
+                    return ""
+                text = text[match.end():]
+            self._started = True
+        else:
+            text = chunk
+        return self._emit(self._held + text)
+
+    def finish(self) -> str:
+        if not self._started:
+            return clean_llm_response(self._head)
+        tail = re.sub(r"\n```$", "", self._held.rstrip()).rstrip()
+        self._held = ""
+        return tail.lstrip() if not self._emitted else tail
+
+    def _emit(self, text: str) -> str:
+        cut = self._HOLD_BACK.search(text).start()
+        self._held = text[cut:]
+        if not cut:
+            return ""
+        if not self._emitted:
+            self._emitted = True
+            return text[:cut].lstrip()
+        return text[:cut]
+
+
+# Words ending in a period that do not end a sentence (the distance phrases use "approx.")
+_ABBREVIATIONS = {"approx", "ca", "e.g", "i.e", "vs", "mr", "mrs", "ms", "dr"}
+_SENTENCE_END = re.compile(r"[.!?]+(?=\s|$)")
+
+
+def first_sentence(text: str) -> Optional[str]:
+    """
+    The first complete sentence of a partial response, or None if it has not ended yet.
+    A period after a known abbreviation is not an end, and neither is one after a digit
+    at the very end of the text (it may still be "1.5").
+    """
+    start = len(text) - len(text.lstrip())
+    for match in _SENTENCE_END.finditer(text, start):
+        before = text[start:match.start()]
+        if not before.strip():
+            continue
+        last_word = before.split()[-1].lower()
+        if text[match.start()] == "." and last_word in _ABBREVIATIONS:
+            continue
+        if match.end() == len(text) and before[-1].isdigit():
+            return None
+        return text[start:match.end()]
+    return None
@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..core.models import Detection
+from ..core.session import SessionManager
+from .models import llm_generate_guidance, local_guidance, scene_signature
+
+logger = logging.getLogger(__name__)
+
+
+class GuidanceWorker:
+    """
+    Generates LLM guidance in background threads so the frame path never waits on the LLM.
+
+    Each session has at most one request in flight. Frames that arrive meanwhile only
+    replace the session's pending request, so a burst of frames collapses into a single
+    follow-up query, sent no sooner than `min_interval_s` after the previous one.
+    """
+
+    def __init__(self, num_workers: int = 2, min_interval_s: float = 1.0):
+        self.num_workers = num_workers
+        self.min_interval_s = min_interval_s
+        self._cond = threading.Condition()
+        self._pending: Dict[int, Tuple[SessionManager, tuple, list]] = {}
+        self._in_flight: set = set()
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            self._stopped = False
+            for i in range(self.num_workers):
+                thread = threading.Thread(target=self._run, name=f"guidance-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def submit(self, session: SessionManager, target_name: str, detections: List[Detection], anchors: list) -> bool:
+        """
+        Queues a guidance request for the session's latest scene.
+        Simple scenes are answered on the spot from templates.
+        Returns False if no request was queued.
+        """
+        self.start()
+        key = id(session)
+        summary = scene_signature(target_name, detections, anchors)
+        with self._cond:
+            if summary == session.guidance_scene:
+                # Scene is back to what was last queried; any newer pending request is obsolete
+                self._pending.pop(key, None)
+                return False
+        local = local_guidance(target_name, detections, anchors)
+        with self._cond:
+            if local is not None:
+                self._pending.pop(key, None)
+                session.guidance_scene = summary
+                session.set_guidance(local)
+                return False
+            self._pending[key] = (session, summary, [target_name, list(detections), list(anchors)])
+            self._cond.notify()
+        return True
+
+    def claim(self, session: SessionManager, target_name: str, detections: List[Detection], anchors: list) -> tuple:
+        """
+        Marks the scene as answered elsewhere (a streaming request), so a pending
+        request for it is dropped and the same scene is not queried twice.
+        Returns the scene signature to pass to deliver()/release().
+        """
+        summary = scene_signature(target_name, detections, anchors)
+        with self._cond:
+            self._pending.pop(id(session), None)
+            session.guidance_scene = summary
+            session.guidance_requested_at = time.monotonic()
+        return summary
+
+    def deliver(self, session: SessionManager, target_name: str, summary: tuple, text: str) -> bool:
+        """
+        Stores the answer for a claimed scene, unless the target or scene changed while
+        it was being generated (a newer answer must not be overwritten). Returns True if stored.
+        """
+        with self._cond:
+            if session.guidance_scene != summary or (session.current_target_name or "person") != target_name:
+                return False
+            session.set_guidance(text)
+            return True
+
+    def release(self, session: SessionManager, summary: tuple):
+        """Gives up a claimed scene after a failure, so the next frame can retry it."""
+        with self._cond:
+            if session.guidance_scene == summary:
+                session.guidance_scene = None
+
+    def _next_job(self) -> Tuple[Optional[tuple], Optional[float]]:
+        """Pops a runnable job (caller holds the lock). Otherwise returns how long to wait."""
+        now = time.monotonic()
+        wait = None
+        for key, (session, summary, args) in self._pending.items():
+            if key in self._in_flight:
+                continue
+            remaining = session.guidance_requested_at + self.min_interval_s - now
+            if remaining > 0:
+                wait = remaining if wait is None else min(wait, remaining)
+                continue
+            del self._pending[key]
+            self._in_flight.add(key)
+            session.guidance_scene = summary
+            session.guidance_requested_at = now
+            return (key, session, summary, args), None
+        return None, wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                job = None
+                while job is None:
+                    if self._stopped:
+                        return
+                    job, wait = self._next_job()
+                    if job is None:
+                        self._cond.wait(wait)
+
+            key, session, summary, args = job
+            try:
+                text = llm_generate_guidance(*args)
+                with self._cond:
+                    # Drop the answer if the target changed while the request was in flight
+                    if session.guidance_scene == summary:
+                        session.set_guidance(text)
+            except Exception as e:
+                logger.error(f"Guidance worker error: {e}")
+                with self._cond:
+                    if session.guidance_scene == summary:
+                        session.guidance_scene = None  # allow a retry on the next frame
+            finally:
+                with self._cond:
+                    self._in_flight.discard(key)
+                    self._cond.notify_all()
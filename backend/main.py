@@ -1,23 +1,47 @@
 import json
+import asyncio
+import anyio
 import logging
-import cv2
+import threading
 import numpy as np
 import base64
 from pathlib import Path
-from fastapi import FastAPI, UploadFile, File, HTTPException, Body
+from typing import Iterator, List, Literal, Optional, Tuple
+from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Depends, Header, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import os
 
-from .config import DATA_DIR
-from .core.session import session_state
-from .vision.detection import detect_objects
+from .config import (
+    DATA_DIR, TTS_ENABLED, STREAM_MAX_FRAME_BYTES, GUIDANCE_ASYNC, GUIDANCE_WORKERS, GUIDANCE_MIN_INTERVAL_S,
+    ANNOTATED_JPEG_QUALITY, SCENE_GATE, ANCHOR_PROMPT_TOP_K, ANCHOR_NEAR_RADIUS, ANCHOR_MATCH_THRESHOLD,
+    INFERENCE_WORKERS, INFERENCE_QUEUE_DEPTH, INFERENCE_SLOT_MB, INFERENCE_TIMEOUT_S, INFERENCE_START_METHOD,
+    HTTP_THREADPOOL_SIZE,
+    LAZY_STARTUP, SMOOTHING,
+)
+from .core.models import Detection
+from .core.readiness import Readiness
+from .core.session import SessionManager, sessions, DEFAULT_SESSION_ID
+from .database.anchor_index import AnchorIndex
+from .database.anchor_store import anchor_store
+from .vision.detection import detect_objects, get_engine, warmup_model
+from .vision.pool import InferencePool, InferenceBusyError, InferenceUnavailableError
 from .vision.visualization import draw_detections_cv2
-from .audio.stt import transcribe_audio_to_text, extract_target_object
-from .llm.models import llm_generate_guidance
-from .llm.prompts import get_description_system_prompt
-from .llm.client import query_llm 
-from .llm.utils import clean_llm_response
+from .vision.anchors import compute_appearance_embedding, pack_embedding, match_detections_to_anchors
+from .vision.ingest import load_image_from_bytes, encode_jpeg
+from .audio.stt import (
+    transcribe_audio_to_text, extract_target_object, warmup_stt, StreamingTranscriber, STTUnavailableError,
+)
+from .audio.tts import flush_audio_cache, get_audio_cache
+from .llm.models import llm_generate_guidance, stream_guidance, guidance_cache
+from .llm.prompts import get_description_system_prompt, get_description_user_prompt
+from .llm.client import query_llm, llm_client
+from .llm.utils import clean_llm_response, first_sentence
+from .llm.worker import GuidanceWorker
+from .utils.encoding import pack_stream_message, pack_detections, pack_msgpack, msgpack
+from .utils.metrics import registry, timed, begin_request_timing, server_timing_header
 
 app = FastAPI(title="Clear Path API")
 logger = logging.getLogger(__name__)
@@ -27,27 +51,247 @@ if not os.path.exists(DATA_DIR):
 
 app.mount("/data", StaticFiles(directory=DATA_DIR), name="data")
 
+guidance_worker = GuidanceWorker(num_workers=GUIDANCE_WORKERS, min_interval_s=GUIDANCE_MIN_INTERVAL_S)
+readiness = Readiness("detector", "database")
+if INFERENCE_START_METHOD == "fork" and LAZY_STARTUP:
+    # The pool would be forked from the warm-up thread while requests are served
+    logger.warning("INFERENCE_START_METHOD=fork is ignored with LAZY_STARTUP=1; spawning workers.")
+inference_pool = InferencePool(
+    INFERENCE_WORKERS,
+    queue_depth=INFERENCE_QUEUE_DEPTH,
+    slot_bytes=int(INFERENCE_SLOT_MB * 1024 * 1024),
+    timeout_s=INFERENCE_TIMEOUT_S,
+    start_method="spawn" if LAZY_STARTUP else INFERENCE_START_METHOD,
+)
+
+registry.register_collector(lambda: {
+    "llm_circuit_open": int(llm_client.breaker.state == "open"),
+    "llm_requests_in_flight": llm_client.stats()["in_flight"],
+})
+registry.register_collector(lambda: {"inference_frames_in_flight": inference_pool.in_flight()})
+registry.register_collector(lambda: {
+    f"guidance_cache_{key}": value
+    for key, value in guidance_cache.stats().items() if key in ("size", "hits", "misses")
+})
+
+def warm_up(load_stt: bool = True):
+    """Loads and warms the detector and database, then starts the guidance worker."""
+    readiness.set("detector", "loading")
+    try:
+        if INFERENCE_WORKERS > 0:
+            inference_pool.start()
+        else:
+            warmup_model()
+        readiness.set("detector", "ready")
+    except Exception as e:
+        logger.error(f"Detector warm-up failed: {e}")
+        readiness.set("detector", "failed", str(e))
+
+    readiness.set("database", "loading")
+    try:
+        from .database.db_config import init_db
+        init_db()
+        readiness.set("database", "ready")
+    except Exception as e:
+        logger.error(f"Database initialization failed: {e}")
+        readiness.set("database", "failed", str(e))
+
+    if load_stt:
+        try:
+            warmup_stt()
+        except Exception as e:
+            logger.error(f"STT warm-up failed: {e}")
+    if GUIDANCE_ASYNC:
+        guidance_worker.start()
+    snapshot = readiness.snapshot()
+    print(f"--> {'READY' if snapshot['ready'] else 'NOT READY'} after {snapshot['uptime_s']} s")
+
 @app.on_event("startup")
 def startup_event():
     Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
-    # initialize data base here later
-
-# in memory storage for anchors for now
-MOCK_ANCHORS = []
+    if HTTP_THREADPOOL_SIZE > 0:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = HTTP_THREADPOOL_SIZE
+    if LAZY_STARTUP:
+        # Accept connections now; /readyz turns ready once the detector is warm
+        threading.Thread(target=warm_up, kwargs={"load_stt": False}, name="warm-up", daemon=True).start()
+    else:
+        warm_up()
 
-class MockAnchor:
-    """Simple class to mimic the Database Anchor object"""
-    def __init__(self, name, description, x, y):
-        self.name = name
-        self.description = description
-        self.x_center = x
-        self.y_center = y
+@app.on_event("shutdown")
+def shutdown_event():
+    guidance_worker.stop()
+    inference_pool.stop()
+    flush_audio_cache()
 
 # Helpers
-def load_image_from_bytes(image_bytes: bytes) -> np.ndarray:
-    nparr = np.frombuffer(image_bytes, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    return img
+def require_ready():
+    """Rejects frame requests with 503 until the detector and database are warm."""
+    if not readiness.ready:
+        raise HTTPException(status_code=503, detail="Server is warming up.", headers={"Retry-After": "5"})
+
+def get_session(
+    x_session_id: Optional[str] = Header(None, max_length=128),
+    session_id: Optional[str] = Query(None, max_length=128),
+) -> SessionManager:
+    """Resolves the caller's session from the session_id query parameter or X-Session-Id header."""
+    return sessions.get(session_id or x_session_id or DEFAULT_SESSION_ID)
+
+def detect_with_tracking(session: SessionManager, frame: np.ndarray) -> List[Detection]:
+    """Runs the detector only when the session tracker needs it; otherwise propagates tracks."""
+    with session.lock:
+        tracker = session.tracker
+        if tracker.should_detect(frame.shape):
+            plan = session.planner.plan(session.current_target_name, frame.shape, session.last_detections)
+            if not plan.full_scan:
+                registry.inc("detections_targeted_total")
+            detections = tracker.update(
+                detect_objects(frame, classes=plan.classes, region=plan.region, affinity=session.session_id),
+                frame.shape, region=plan.region, labels=plan.labels,
+            )
+        else:
+            detections = tracker.predict(frame.shape)
+        if SMOOTHING:
+            with timed("smoothing"):
+                session.smoother.apply(detections, frame.shape)
+        session.update_detections(detections)
+    return detections
+
+def run_vision(session: SessionManager, frame: np.ndarray) -> Tuple[List[Detection], bool]:
+    """
+    Detections for the frame, or the session's last detections if the scene has not
+    changed since the last processed frame. Returns (detections, reused).
+    """
+    with session.lock:
+        if SCENE_GATE:
+            with timed("scene"):
+                changed = session.scene.should_process(frame)
+            if not changed:
+                registry.inc("frames_skipped_total")
+                return session.last_detections, True
+        with timed("detect"):
+            detections = detect_with_tracking(session, frame)
+        match_anchors(session, frame, detections)
+    return detections, False
+
+def session_anchor_index(session: SessionManager) -> AnchorIndex:
+    """
+    The session's anchor index, or an empty one if the database cannot be read:
+    anchors are optional context, so detection and guidance go on without them.
+    """
+    try:
+        return anchor_store.get_index(session.session_id)
+    except Exception as e:
+        logger.error(f"Anchor lookup failed: {e}")
+        return AnchorIndex([])
+
+def match_anchors(session: SessionManager, frame: np.ndarray, detections: List[Detection]) -> None:
+    """Labels detections that look like one of the session's saved anchors (no LLM call)."""
+    index = session_anchor_index(session)
+    if not index.embedding_owners or not detections:
+        return
+    with timed("anchor_match"):
+        match_detections_to_anchors(
+            frame, detections, index.anchors, index.embeddings, index.embedding_owners, ANCHOR_MATCH_THRESHOLD
+        )
+
+def build_detection_payload(detections: List[Detection], scale: int = 1) -> List[dict]:
+    """Detection JSON with boxes in the uploaded image's pixel coordinates."""
+    return [
+        {
+            "label": d.label,
+            "confidence": d.confidence,
+            "relative_direction": d.relative_direction,
+            "distance_estimate": d.distance_estimate,
+            "track_id": d.track_id,
+            "anchor": d.anchor_name,
+            "box": {
+                "x_min": d.box.x_min * scale,
+                "y_min": d.box.y_min * scale,
+                "x_max": d.box.x_max * scale,
+                "y_max": d.box.y_max * scale,
+            },
+        }
+        for d in detections
+    ]
+
+def generate_guidance_safe(target_name: str, detections: List[Detection], anchors: list) -> str:
+    """Runs guidance generation without letting failures block detections."""
+    try:
+        return llm_generate_guidance(target_name, detections, anchors)
+    except Exception as e:
+        logger.error(f"Guidance/TTS Error: {e}")
+        return "Vision processed, but guidance is temporarily unavailable."
+
+def select_prompt_anchors(session: SessionManager, target_name: str, detections: List[Detection]) -> list:
+    # Served from the in-process anchor cache; the database is only hit after a write.
+    # Only the anchors relevant to the target and the current view go into the prompt.
+    return session_anchor_index(session).select(
+        target_name, detections, k=ANCHOR_PROMPT_TOP_K, radius=ANCHOR_NEAR_RADIUS
+    )
+
+def request_speech(text: str) -> Tuple[str, bool]:
+    """
+    (URL, ready) of the spoken guidance. Audio that is not cached yet is generated in
+    the background at that URL, so the client can play it as soon as it exists.
+    """
+    if not TTS_ENABLED or not text:
+        return "", False
+    try:
+        url, ready = get_audio_cache().request(text)
+        return url or "", ready
+    except Exception as e:
+        logger.error(f"TTS Error: {e}")
+        return "", False
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def guidance_events(
+    session: SessionManager, target_name: str, detections: List[Detection], anchors: list, summary: tuple
+) -> Iterator[str]:
+    """
+    Server-sent events for one streamed guidance answer:
+    `delta` for each piece of cleaned text, `sentence` with the first sentence and its
+    audio as soon as it is complete, then `done` with the full text and the audio of the
+    rest (or `error`). The answer is stored as the session's guidance only if the scene
+    it was claimed for (`summary`) is still current.
+    """
+    text = ""
+    sentence = None
+    try:
+        for delta in stream_guidance(target_name, detections, anchors):
+            text += delta
+            yield sse_event("delta", {"text": delta})
+            if sentence is None:
+                sentence = first_sentence(text)
+                if sentence:
+                    audio_path, audio_ready = request_speech(sentence)
+                    yield sse_event("sentence", {"text": sentence, "audio_path": audio_path, "audio_ready": audio_ready})
+    except Exception as e:
+        logger.error(f"Guidance stream error: {e}")
+        guidance_worker.release(session, summary)  # let the background worker retry
+        yield sse_event("error", {"message": "Guidance is temporarily unavailable."})
+        return
+    guidance_worker.deliver(session, target_name, summary, text)
+    # The first sentence is already being spoken: only the rest is left
+    rest = text.lstrip()[len(sentence):].strip() if sentence else text
+    audio_path, audio_ready = request_speech(rest)
+    yield sse_event("done", {"text": text, "audio_path": audio_path, "audio_ready": audio_ready})
+
+def request_guidance(session: SessionManager, target_name: str, detections: List[Detection]) -> Tuple[str, Optional[float]]:
+    """
+    Returns (guidance_text, age in seconds) without waiting on the LLM.
+    The background worker is asked to refresh guidance if the scene changed.
+    Before the first answer the text is a placeholder and the age is None.
+    """
+    anchors = select_prompt_anchors(session, target_name, detections)
+    if not GUIDANCE_ASYNC:
+        return generate_guidance_safe(target_name, detections, anchors), 0.0
+
+    guidance_worker.submit(session, target_name, detections, anchors)
+    if not session.guidance_text:
+        return f"Looking for the {target_name}...", None
+    return session.guidance_text, session.guidance_age()
 
 class TargetRequest(BaseModel):
     name: str
@@ -55,107 +299,341 @@ class TargetRequest(BaseModel):
 # Routes
 
 @app.post("/api/set_target_text")
-def set_target_text(request: TargetRequest):
+def set_target_text(request: TargetRequest, session: SessionManager = Depends(get_session)):
     """Manually sets the target object from a text input."""
-    session_state.set_target(request.name)
+    session.set_target(request.name)
     return {"status": "success", "target": request.name}
 
 @app.post("/api/set_target_from_audio")
-def set_target_from_audio(audio_file: UploadFile = File(...)):
+def set_target_from_audio(audio_file: UploadFile = File(...), session: SessionManager = Depends(get_session)):
     """ Sets tagret from transcribed audio input. """
-    temp_audio_path = Path(DATA_DIR) / "temp_user_input.wav"
+    # Decoded in memory: concurrent uploads never share a file
     try:
-        with open(temp_audio_path, "wb") as f:
-            f.write(audio_file.file.read())
+        command = transcribe_audio_to_text(audio_file.file.read())
+    except STTUnavailableError as e:
+        raise HTTPException(status_code=503, detail=f"Speech recognition is unavailable: {e}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save audio: {e}")
-
-    command = transcribe_audio_to_text(str(temp_audio_path))
+        raise HTTPException(status_code=400, detail=f"Could not decode audio: {e}")
     if not command:
         raise HTTPException(status_code=400, detail="Could not transcribe audio.")
     
     target = extract_target_object(command)
     if target:
-        session_state.set_target(target)
+        session.set_target(target)
         return {"status": "success", "target": target}
     else:
         return {"status": "error", "message": "No target identified."}
 
-@app.post("/api/process_frame")
-def process_frame(file: UploadFile = File(...)):
-    # db: Session = Depends(get_db)
-    target_name = session_state.current_target_name or "person"
+@app.get("/api/guidance/stream")
+def stream_guidance_events(session: SessionManager = Depends(get_session)):
+    """
+    Streams guidance for the session's target and latest detections as server-sent events,
+    so the client can speak the first sentence before the model has finished.
+    """
+    target_name = session.current_target_name or "person"
+    detections = list(session.last_detections)
+    anchors = select_prompt_anchors(session, target_name, detections)
+    summary = guidance_worker.claim(session, target_name, detections, anchors)
+    return StreamingResponse(
+        guidance_events(session, target_name, detections, anchors, summary),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/tts_cache")
+def get_tts_cache_stats():
+    """Files, bytes and hit/miss counters of the spoken-guidance audio cache."""
+    return get_audio_cache().stats()
+
+@app.get("/api/guidance_cache")
+def get_guidance_cache_stats():
+    """Hit/miss counters of the scene-signature guidance cache."""
+    return guidance_cache.stats()
+
+@app.get("/api/inference_stats")
+def get_inference_stats():
+    """Batch sizes and per-batch timings of the batched inference engine, or the worker pool's state."""
+    if inference_pool.running:
+        return inference_pool.stats()
+    return get_engine().stats()
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving HTTP (the model may still be loading)."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    """
+    Readiness: 200 once the detector and database are warm, 503 before, if warm-up
+    failed, or once an inference worker has died (its sessions fail over to the others,
+    but the replica should be replaced).
+    """
+    snapshot = readiness.snapshot()
+    if inference_pool.running and not inference_pool.healthy:
+        snapshot["ready"] = False
+        snapshot["components"]["detector"] = "degraded"
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus-style metrics: per-stage latency histograms, LLM call counts, batch sizes."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/api/process_frame", dependencies=[Depends(require_ready)])
+def process_frame(
+    file: UploadFile = File(...),
+    image: Literal["none", "inline", "url"] = Query("inline", description="Annotated image: base64 data URI (default), separate URL, or omit"),
+    image_quality: int = Query(ANNOTATED_JPEG_QUALITY, ge=10, le=100),
+    image_scale: float = Query(1.0, gt=0.0, le=1.0),
+    format: Literal["json", "msgpack", "binary"] = Query("json", description="Response encoding"),
+    session: SessionManager = Depends(get_session),
+):
+    timings = begin_request_timing()
+    target_name = session.current_target_name or "person"
+    if format == "msgpack" and msgpack is None:
+        raise HTTPException(status_code=400, detail="msgpack responses require the msgpack package.")
 
     # Load Image
     try:
-        contents = file.file.read()
-        frame = load_image_from_bytes(contents)
+        with timed("decode"):
+            contents = file.file.read()
+            frame, scale = load_image_from_bytes(contents)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid image data: {e}")
+    if frame is None:
+        raise HTTPException(status_code=400, detail="Invalid image data: could not decode image.")
 
     # Vision Inference
     try:
-        detections = detect_objects(frame)
-        session_state.update_detections(detections)
+        detections, reused = run_vision(session, frame)
+    except InferenceBusyError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except InferenceUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Vision Error: {e}")
         raise HTTPException(status_code=500, detail="Vision processing failed.")
 
-    # Draw boxes on backend
-    annotated_frame = draw_detections_cv2(frame, detections)
-    detection_payload = [
-        {
-            "label": d.label,
-            "confidence": d.confidence,
-            "relative_direction": d.relative_direction,
-            "distance_estimate": d.distance_estimate,
-            "box": {
-                "x_min": d.box.x_min,
-                "y_min": d.box.y_min,
-                "x_max": d.box.x_max,
-                "y_max": d.box.y_max,
-            },
-        }
-        for d in detections
-    ]
-    
-    # Encode to Base64 for frontend display
-    success, buffer = cv2.imencode('.jpg', annotated_frame)
-    if not success:
-         raise HTTPException(status_code=500, detail="Could not encode image.")
-    img_base64 = base64.b64encode(buffer).decode('utf-8')
+    detection_payload = build_detection_payload(detections, scale)
 
-    # LLM & TTS (do not let failures block detections)
-    try:
-        guidance_text = llm_generate_guidance(target_name, detections, MOCK_ANCHORS)
-        # MVP: pause TTS and return text-only guidance
-        audio_path = ""
-    except Exception as e:
-        logger.error(f"Guidance/TTS Error: {e}")
-        guidance_text = "Vision processed, but guidance is temporarily unavailable."
-        audio_path = ""
+    # LLM & TTS (do not let failures block detections; neither waits on a remote call)
+    with timed("guidance"):
+        guidance_text, guidance_age = request_guidance(session, target_name, detections)
+    # The "Looking for..." placeholder (no guidance yet) is not spoken
+    audio_path, audio_ready = request_speech(guidance_text) if guidance_age is not None else ("", False)
+
+    result = {
+        "status": "guiding",
+        "guidance_text": guidance_text,
+        "guidance_age_s": guidance_age,
+        "audio_path": audio_path,
+        "audio_ready": audio_ready,
+        "target": target_name,
+        "scene_changed": not reused,
+    }
+
+    # Clients that draw boxes from the detections (the frontend) pass image=none
+    if image == "url" and reused and session.annotated_jpeg is not None:
+        # Unchanged scene: the last annotated frame still shows it
+        result["annotated_image"] = f"/api/annotated_frame/{session.annotated_frame_id}?session_id={session.session_id}"
+    elif image != "none":
+        # Draw boxes on backend (the decoded frame is not needed afterwards)
+        with timed("annotate"):
+            annotated_frame = draw_detections_cv2(frame, detections, in_place=True)
+        with timed("encode"):
+            jpeg_bytes = encode_jpeg(annotated_frame, image_quality, image_scale)
+        if jpeg_bytes is None:
+             raise HTTPException(status_code=500, detail="Could not encode image.")
+        if image == "inline":
+            with timed("base64"):
+                img_base64 = base64.b64encode(jpeg_bytes).decode('utf-8')
+            result["annotated_image"] = f"data:image/jpeg;base64,{img_base64}"
+        else:
+            frame_id = session.store_annotated_frame(jpeg_bytes)
+            result["annotated_image"] = f"/api/annotated_frame/{frame_id}?session_id={session.session_id}"
+
+    with timed("serialize"):
+        if format == "binary":
+            body = pack_stream_message(result, pack_detections(detection_payload))
+            media_type = "application/octet-stream"
+        elif format == "msgpack":
+            result["detections"] = detection_payload
+            body, media_type = pack_msgpack(result), "application/msgpack"
+        else:
+            result["detections"] = detection_payload
+            body, media_type = json.dumps(result).encode("utf-8"), "application/json"
+    return Response(body, media_type=media_type, headers={"Server-Timing": server_timing_header(timings)})
+
+@app.get("/api/annotated_frame/{frame_id}")
+def get_annotated_frame(frame_id: int, session: SessionManager = Depends(get_session)):
+    """Serves the latest annotated frame produced with image=url."""
+    jpeg_bytes = session.annotated_jpeg
+    if frame_id != session.annotated_frame_id or jpeg_bytes is None:
+        raise HTTPException(status_code=404, detail="Annotated frame is no longer available.")
+    return Response(jpeg_bytes, media_type="image/jpeg")
+
+@app.delete("/api/session")
+def end_session(session: SessionManager = Depends(get_session)):
+    """Drops the caller's session state (target, tracker, guidance). Saved anchors are kept."""
+    sessions.remove(session.session_id)
+    return {"status": "success", "session_id": session.session_id}
+
+def _process_stream_frame(session_id: str, frame_bytes: bytes, annotate: bool) -> Tuple[dict, bytes]:
+    """Runs the vision + guidance pipeline for one streamed frame (threadpool)."""
+    # Looked up per frame so a long-lived stream keeps its session from going idle
+    session = sessions.get(session_id)
+    target_name = session.current_target_name or "person"
+
+    with timed("decode"):
+        frame, scale = load_image_from_bytes(frame_bytes)
+    if frame is None:
+        return {"status": "error", "message": "Invalid image data."}, b""
 
-    return {
+    # Before annotating: anchor matching reads the crop pixels
+    detections, reused = run_vision(session, frame)
+
+    payload = b""
+    if annotate:
+        with timed("annotate"):
+            draw_detections_cv2(frame, detections, in_place=True)
+        with timed("encode"):
+            payload = encode_jpeg(frame) or b""
+
+    with timed("guidance"):
+        guidance_text, guidance_age = request_guidance(session, target_name, detections)
+    audio_path, audio_ready = request_speech(guidance_text) if guidance_age is not None else ("", False)
+    header = {
         "status": "guiding",
         "guidance_text": guidance_text,
+        "guidance_age_s": guidance_age,
         "audio_path": audio_path,
+        "audio_ready": audio_ready,
         "target": target_name,
-        "annotated_image": f"data:image/jpeg;base64,{img_base64}",
-        "detections": detection_payload,
+        "scene_changed": not reused,
+        "detections": build_detection_payload(detections, scale),
+        "image": "image/jpeg" if payload else None,
     }
+    return header, payload
+
+@app.websocket("/api/stream")
+async def stream_frames(
+    websocket: WebSocket,
+    annotate: bool = False,
+    session_id: str = Query(DEFAULT_SESSION_ID, max_length=128),
+):
+    """
+    Persistent frame stream. The client sends raw JPEG frames as binary messages and
+    receives one binary message per processed frame (see utils/encoding.py).
+    Only the newest frame is kept while the server is busy; older ones are dropped.
+    """
+    await websocket.accept()
+    mailbox: asyncio.Queue = asyncio.Queue(maxsize=1)
+    dropped = 0
+
+    async def receive_frames():
+        nonlocal dropped
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                frame_bytes = message.get("bytes")
+                if not frame_bytes:
+                    continue  # text messages are not frames
+                if len(frame_bytes) > STREAM_MAX_FRAME_BYTES:
+                    dropped += 1
+                    continue
+                if mailbox.full():
+                    mailbox.get_nowait()
+                    dropped += 1
+                mailbox.put_nowait(frame_bytes)
+        finally:
+            if mailbox.full():
+                mailbox.get_nowait()
+            mailbox.put_nowait(None)
 
-@app.post("/api/save_anchor")
+    receiver = asyncio.create_task(receive_frames())
+    seq = 0
+    try:
+        while True:
+            frame_bytes = await mailbox.get()
+            if frame_bytes is None:
+                break
+            if not readiness.ready:
+                seq += 1
+                header = {"status": "warming", "message": "Server is warming up.", "seq": seq, "dropped": dropped}
+                await websocket.send_bytes(pack_stream_message(header, b""))
+                continue
+            try:
+                header, payload = await run_in_threadpool(_process_stream_frame, session_id, frame_bytes, annotate)
+            except (InferenceBusyError, InferenceUnavailableError) as e:
+                header, payload = {"status": "busy", "message": str(e)}, b""
+            except Exception as e:
+                logger.error(f"Stream Vision Error: {e}")
+                header, payload = {"status": "error", "message": "Vision processing failed."}, b""
+            seq += 1
+            header.update({"seq": seq, "dropped": dropped})
+            await websocket.send_bytes(pack_stream_message(header, payload))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        receiver.cancel()
+
+@app.websocket("/api/stt/stream")
+async def stream_speech(
+    websocket: WebSocket,
+    session_id: str = Query(DEFAULT_SESSION_ID, max_length=128),
+):
+    """
+    Voice target-setting while the user speaks. The client sends 16 kHz mono PCM16
+    chunks as binary messages and the text message "end" after each utterance.
+    Partial transcripts (with the target recognized so far) are sent as JSON while
+    audio arrives; after "end" the final target is set on the session.
+    """
+    await websocket.accept()
+    transcriber = StreamingTranscriber()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                partial = await run_in_threadpool(transcriber.feed, message["bytes"])
+                if partial is not None:
+                    await websocket.send_json(
+                        {"status": "partial", "text": partial, "target": extract_target_object(partial)}
+                    )
+            elif message.get("text") == "end":
+                command = await run_in_threadpool(transcriber.finish)
+                transcriber = StreamingTranscriber()
+                target = extract_target_object(command)
+                if target:
+                    sessions.get(session_id).set_target(target)
+                    await websocket.send_json({"status": "success", "text": command, "target": target})
+                else:
+                    await websocket.send_json({"status": "error", "text": command, "message": "No target identified."})
+    except STTUnavailableError as e:
+        await websocket.send_json({"status": "error", "message": f"Speech recognition is unavailable: {e}"})
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+@app.post("/api/save_anchor", dependencies=[Depends(require_ready)])
 def save_anchor(
     file: UploadFile = File(...),
-    name: str = Body(..., description="Name of the anchor")
+    name: str = Body(..., description="Name of the anchor"),
+    session: SessionManager = Depends(get_session),
 ):
-    # db: Session = Depends(get_db)
-
     try:
         contents = file.file.read()
-        frame = load_image_from_bytes(contents)
+        frame, _ = load_image_from_bytes(contents)
         h, w, _ = frame.shape
-        detections = detect_objects(frame)
+        detections = detect_objects(frame, affinity=session.session_id)
+    except InferenceBusyError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except InferenceUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Vision failed: {e}")
 
@@ -172,18 +650,45 @@ def save_anchor(
     y_center = (best_detection.box.y_min + best_detection.box.y_max) / 2
     x_norm = x_center / w
     y_norm = y_center / h
+    embedding = compute_appearance_embedding(frame, best_detection.box)
+    feature_vector = pack_embedding(embedding) if embedding is not None else None
 
     # LLM Description
     det_json = json.dumps([{"label": best_detection.label, "box_coords": (x_norm, y_norm)}])
-    prompt = get_description_system_prompt(det_json, name)
     try:
-        raw_desc = query_llm(prompt, user_prompt=f"Describe the {name}.")
+        raw_desc = query_llm(get_description_system_prompt(), user_prompt=get_description_user_prompt(det_json, name))
         description = clean_llm_response(raw_desc)
     except:
         description = f"Auto-saved anchor for {name}"
 
-    new_anchor = MockAnchor(name, description, x_norm * 100, y_norm * 100)
-    MOCK_ANCHORS.append(new_anchor)
-    print(f"Anchor Saved to Memory: {name}")
+    try:
+        new_anchor = anchor_store.add_anchor(
+            session.session_id, name, description, x_norm * 100, y_norm * 100,
+            feature_vector=feature_vector, label=best_detection.label,
+        )
+    except Exception as e:
+        logger.error(f"Anchor DB Error: {e}")
+        raise HTTPException(status_code=500, detail="Could not save anchor.")
+    print(f"Anchor Saved: {name}")
+
+    return {"status": "Anchor saved", "anchor": {"id": new_anchor.id, "name": name}}
+
+@app.get("/api/anchors")
+def list_anchors(session: SessionManager = Depends(get_session)):
+    """Lists the caller's saved anchors."""
+    return [
+        {
+            "id": anchor.id,
+            "name": anchor.name,
+            "description": anchor.description,
+            "x_center": anchor.x_center,
+            "y_center": anchor.y_center,
+        }
+        for anchor in anchor_store.get_anchors(session.session_id)
+    ]
 
-    return {"status": "Anchor saved", "anchor": {"name": name}}
+@app.delete("/api/anchors/{anchor_id}")
+def delete_anchor(anchor_id: int, session: SessionManager = Depends(get_session)):
+    if not anchor_store.delete_anchor(session.session_id, anchor_id):
+        raise HTTPException(status_code=404, detail="Anchor not found.")
+    return {"status": "Anchor deleted", "anchor": {"id": anchor_id}}
@@ -0,0 +1,56 @@
+"""
+Tests for the anchor index in database/anchor_index.py and utils/spatial.py.
+
+    python -m pytest backend/tests
+"""
+
+from backend.core.models import BoundingBox, Detection
+from backend.database.anchor_index import AnchorIndex
+from backend.database.models import Anchor
+from backend.utils.spatial import GridIndex
+
+
+def _anchor(name: str, x: float = 50.0, y: float = 50.0) -> Anchor:
+    return Anchor(name=name, x_center=x, y_center=y)
+
+
+def _det(label: str, x_norm: float = None, y_norm: float = None) -> Detection:
+    return Detection(label, BoundingBox(0, 0, 10, 10), 0.9, x_center_norm=x_norm, y_center_norm=y_norm)
+
+
+def test_grid_query_returns_points_within_radius():
+    grid = GridIndex(cell_size=10.0)
+    for i, (x, y) in enumerate([(0, 0), (5, 5), (15, 0), (90, 90)]):
+        grid.insert(i, x, y)
+    hits = dict(grid.query_radius(2, 2, 14))
+    assert sorted(hits) == [0, 1, 2]  # (15, 0) is 13.2 away
+    assert abs(hits[1] - (18 ** 0.5)) < 1e-9
+    assert grid.query_radius(50, 50, 5) == []
+
+
+def test_target_name_ranks_first():
+    index = AnchorIndex([_anchor("front door"), _anchor("keys"), _anchor("key hook"), _anchor("sofa")])
+    names = [a.name for a in index.select("keys", [], k=2, radius=10)]
+    assert names == ["keys"]
+    names = [a.name for a in index.select("front door key", [], k=3, radius=10)]
+    assert names[0] == "front door"
+    assert set(names) == {"front door", "key hook"}
+
+
+def test_anchors_near_detections_are_selected():
+    anchors = [_anchor("lamp", 10, 10), _anchor("plant", 80, 80), _anchor("shelf", 85, 75)]
+    index = AnchorIndex(anchors)
+    names = [a.name for a in index.select("wallet", [_det("chair", 0.8, 0.8)], k=5, radius=15)]
+    assert names == ["plant", "shelf"]
+    # Detections without a position only match by label
+    assert index.select("wallet", [_det("lamp")], k=5, radius=15)[0].name == "lamp"
+
+
+def test_unrelated_anchors_are_not_selected_and_k_is_respected():
+    index = AnchorIndex([_anchor(f"cup {i}") for i in range(10)] + [_anchor("table", 0, 0)])
+    assert index.select("wallet", [], k=3, radius=10) == []
+    selected = index.select("cup", [], k=3, radius=10)
+    assert len(selected) == 3
+    # Newer anchors win ties
+    assert [a.name for a in selected] == ["cup 9", "cup 8", "cup 7"]
+    assert len(index) == 11
@@ -0,0 +1,70 @@
+"""
+Tests for the anchor appearance matching in vision/anchors.py.
+
+    python -m pytest backend/tests
+"""
+
+import numpy as np
+
+from backend.core.models import BoundingBox, Detection
+from backend.database.models import Anchor
+from backend.vision.anchors import (
+    EMBEDDING_DIM,
+    build_embedding_matrix,
+    compute_appearance_embedding,
+    match_detections_to_anchors,
+    pack_embedding,
+    unpack_embedding,
+)
+
+RED, BLUE = (0, 0, 255), (255, 0, 0)  # BGR
+LEFT, RIGHT = BoundingBox(0, 0, 50, 50), BoundingBox(50, 0, 100, 50)
+
+
+def _frame() -> np.ndarray:
+    frame = np.zeros((50, 100, 3), dtype=np.uint8)
+    frame[:, :50] = RED
+    frame[:, 50:] = BLUE
+    return frame
+
+
+def _anchor(name: str, label, box: BoundingBox) -> Anchor:
+    embedding = compute_appearance_embedding(_frame(), box)
+    return Anchor(name=name, label=label, x_center=50.0, y_center=50.0, feature_vector=pack_embedding(embedding))
+
+
+def test_embedding_round_trip_and_normalization():
+    embedding = compute_appearance_embedding(_frame(), LEFT)
+    assert embedding.shape == (EMBEDDING_DIM,)
+    assert abs(float(embedding @ embedding) - 1.0) < 1e-5
+    assert np.array_equal(unpack_embedding(pack_embedding(embedding)), embedding)
+    assert compute_appearance_embedding(_frame(), BoundingBox(200, 200, 300, 300)) is None
+
+
+def test_matrix_skips_anchors_without_embedding_or_label():
+    anchors = [
+        _anchor("red mug", "cup", LEFT),
+        Anchor(name="old", x_center=0.0, y_center=0.0),
+        _anchor("unlabeled", None, LEFT),
+        _anchor("blue mug", "cup", RIGHT),
+    ]
+    matrix, owners = build_embedding_matrix(anchors)
+    assert owners == [0, 3]
+    assert matrix.shape == (2, EMBEDDING_DIM)
+    assert build_embedding_matrix([])[0].shape == (0, EMBEDDING_DIM)
+
+
+def test_detections_match_the_anchor_that_looks_alike():
+    anchors = [_anchor("red mug", "cup", LEFT), _anchor("blue mug", "cup", RIGHT)]
+    matrix, owners = build_embedding_matrix(anchors)
+    detections = [Detection("cup", RIGHT, 0.9), Detection("cup", LEFT, 0.9)]
+    assert match_detections_to_anchors(_frame(), detections, anchors, matrix, owners, threshold=0.9) == 2
+    assert [d.anchor_name for d in detections] == ["blue mug", "red mug"]
+
+
+def test_detections_of_another_class_never_match():
+    anchors = [_anchor("red mug", "cup", LEFT)]
+    matrix, owners = build_embedding_matrix(anchors)
+    detections = [Detection("book", LEFT, 0.9)]
+    assert match_detections_to_anchors(_frame(), detections, anchors, matrix, owners, threshold=0.5) == 0
+    assert detections[0].anchor_name is None
@@ -0,0 +1,105 @@
+"""
+Tests for the hysteresis bucketing and temporal smoothing in utils/geometry.py.
+
+    python -m pytest backend/tests
+"""
+
+import numpy as np
+
+from backend.core.models import BoundingBox, Detection
+from backend.utils.geometry import (
+    DISTANCE_BUCKETS,
+    X_DIRECTION_BUCKETS,
+    TemporalBucketFilter,
+    bucket_index,
+    calculate_relative_direction,
+    estimate_distance_simple,
+    hysteresis_bucket_index,
+)
+
+W, H = 640, 480
+LEFT, AHEAD = 1, 4  # X_DIRECTION_BUCKETS indices: "slightly left" (< 0.45) and the default
+
+
+def _detection(x_norm: float, area: float = 0.03, track_id: int = 1) -> Detection:
+    side = np.sqrt(area * W * H)
+    cx, cy = x_norm * W, 0.5 * H
+    box = BoundingBox(int(cx - side / 2), int(cy - side / 2), int(cx + side / 2), int(cy + side / 2))
+    return Detection("cup", box, 0.9, track_id=track_id, x_center_norm=x_norm, y_center_norm=0.5)
+
+
+def test_hysteresis_without_current_bucket_is_plain_bucketing():
+    for value in (0.1, 0.44, 0.46, 0.9):
+        assert hysteresis_bucket_index(value, X_DIRECTION_BUCKETS, None, 0.03) == bucket_index(value, X_DIRECTION_BUCKETS)
+
+
+def test_hysteresis_keeps_current_bucket_within_band():
+    assert hysteresis_bucket_index(0.46, X_DIRECTION_BUCKETS, LEFT, 0.03) == LEFT
+    assert hysteresis_bucket_index(0.44, X_DIRECTION_BUCKETS, AHEAD, 0.03) == AHEAD
+
+
+def test_hysteresis_switches_outside_band():
+    assert hysteresis_bucket_index(0.49, X_DIRECTION_BUCKETS, LEFT, 0.03) == AHEAD
+    assert hysteresis_bucket_index(0.41, X_DIRECTION_BUCKETS, AHEAD, 0.03) == LEFT
+
+
+def test_hysteresis_relative_band_scales_with_value():
+    # 0.028 is within 25% of the 0.03 threshold, 0.02 is not
+    close = bucket_index(0.05, DISTANCE_BUCKETS)
+    assert hysteresis_bucket_index(0.028, DISTANCE_BUCKETS, close, 0.25, relative=True) == close
+    assert hysteresis_bucket_index(0.02, DISTANCE_BUCKETS, close, 0.25, relative=True) != close
+
+
+def test_filter_needs_stable_frames_before_switching():
+    smoother = TemporalBucketFilter(alpha=1.0, stable_frames=3)
+    start = _detection(0.5)
+    smoother.apply([start], (H, W, 3))
+    ahead = start.relative_direction
+
+    outputs = []
+    for _ in range(3):
+        det = _detection(0.2)
+        smoother.apply([det], (H, W, 3))
+        outputs.append(det.relative_direction)
+    assert outputs[:2] == [ahead, ahead]
+    assert outputs[2] == calculate_relative_direction(0.2, 0.5)
+
+
+def test_filter_vote_resets_when_candidate_returns():
+    smoother = TemporalBucketFilter(alpha=1.0, stable_frames=2)
+    for x in (0.5, 0.2, 0.5, 0.2):  # never two consecutive votes for "far left"
+        det = _detection(x)
+        smoother.apply([det], (H, W, 3))
+        assert det.relative_direction == calculate_relative_direction(0.5, 0.5)
+
+
+def test_filter_reset_forgets_objects():
+    smoother = TemporalBucketFilter(alpha=1.0, stable_frames=5)
+    smoother.apply([_detection(0.5)], (H, W, 3))
+    smoother.reset()
+    det = _detection(0.2)
+    smoother.apply([det], (H, W, 3))
+    assert det.relative_direction == calculate_relative_direction(0.2, 0.5)
+
+
+def test_jittering_track_changes_once_when_the_object_moves():
+    """200 frames jittering around x = 0.45 and area = 0.03; the object moves right at frame 120."""
+    rng = np.random.default_rng(0)
+    smoother = TemporalBucketFilter()
+    raw_changes = smoothed_changes = 0
+    previous_raw = previous_smoothed = None
+    for frame in range(200):
+        cx = 0.45 * W + rng.normal(0, 8) + (0.3 * W if frame >= 120 else 0)
+        side = np.sqrt(0.03 * W * H) * (1 + rng.normal(0, 0.08))
+        box = BoundingBox(int(cx - side / 2), int(H / 2 - side / 2), int(cx + side / 2), int(H / 2 + side / 2))
+        det = Detection("cup", box, 0.9, track_id=1, x_center_norm=cx / W, y_center_norm=0.5)
+        raw = (calculate_relative_direction(cx / W, 0.5), estimate_distance_simple(side / W, side / H))
+        smoother.apply([det], (H, W, 3))
+        smoothed = (det.relative_direction, det.distance_estimate)
+        raw_changes += previous_raw is not None and raw != previous_raw
+        smoothed_changes += previous_smoothed is not None and smoothed != previous_smoothed
+        previous_raw, previous_smoothed = raw, smoothed
+
+    assert raw_changes > 50
+    assert smoothed_changes == 1
+    assert previous_smoothed[0] == calculate_relative_direction(0.75, 0.5)
@@ -0,0 +1,48 @@
+"""
+Tests for the streaming text helpers in llm/utils.py.
+
+    python -m pytest backend/tests
+"""
+
+import pytest
+
+from backend.llm.utils import IncrementalCleaner, clean_llm_response, first_sentence
+
+
+def _stream(chunks):
+    cleaner = IncrementalCleaner()
+    parts = [cleaner.feed(chunk) for chunk in chunks]
+    parts.append(cleaner.finish())
+    return parts
+
+
+@pytest.mark.parametrize("chunks", [
+    ["The cup is ", "to your left."],
+    ["```text\n", "Turn ", "left.", "\n```"],
+    ["``", "`\nTurn left.\n", "``", "`"],
+    ["  The cup ", "is ahead.  "],
+    ["```"],
+    [""],
+])
+def test_incremental_cleaner_matches_clean_llm_response(chunks):
+    assert "".join(_stream(chunks)) == clean_llm_response("".join(chunks))
+
+
+def test_incremental_cleaner_emits_before_the_end():
+    parts = _stream(["```\n", "Turn left. ", "The cup ", "is ahead.\n```"])
+    assert parts[1] == "Turn left."
+    assert "`" not in "".join(parts)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Turn left.", "Turn left."),
+    ("  Turn left. The cup", "Turn left."),
+    ("The cup is ahead! Walk", "The cup is ahead!"),
+    ("The cup is approx. 1 meter ahead. Walk", "The cup is approx. 1 meter ahead."),
+    ("The cup is 1.5 meters away. Walk", "The cup is 1.5 meters away."),
+    ("The cup is about 1.", None),
+    ("The cup is", None),
+    ("", None),
+])
+def test_first_sentence(text, expected):
+    assert first_sentence(text) == expected
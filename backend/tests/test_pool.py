@@ -0,0 +1,98 @@
+"""
+Tests for the inference worker pool in vision/pool.py. The detector is replaced by a
+fake before the workers are forked, so no model is loaded.
+
+    python -m pytest backend/tests
+"""
+
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pytest
+
+from backend.core.models import BoundingBox, Detection
+from backend.vision import pool as pool_module
+from backend.vision.pool import InferenceBusyError, InferencePool, InferenceUnavailableError
+
+pytestmark = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="the fake detector is inherited through fork"
+)
+
+SLOW, CRASH = 1, 255  # first pixel values the fake detector reacts to
+
+
+def _fake_detect_batch(frames, classes=None, placements=None):
+    detections = []
+    for frame in frames:
+        if frame[0, 0, 0] == CRASH:
+            os._exit(1)
+        if frame[0, 0, 0] == SLOW:
+            time.sleep(0.6)
+        detections.append([Detection("cup", BoundingBox(0, 0, frame.shape[1], frame.shape[0]), 0.9)])
+    return detections
+
+
+def _frame(value: int = 0) -> np.ndarray:
+    return np.full((48, 64, 3), value, dtype=np.uint8)
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    monkeypatch.setattr(pool_module, "warmup_model", lambda: None)
+    monkeypatch.setattr(pool_module, "get_model", lambda: None)
+    monkeypatch.setattr(pool_module, "detect_batch", _fake_detect_batch)
+    monkeypatch.setattr(pool_module.detection, "DETECTOR_BACKEND", "torch")
+    monkeypatch.setattr(pool_module.detection, "_set_thread_count", lambda threads: None)
+    pools = []
+
+    def make(**kwargs):
+        pool = InferencePool(num_workers=1, slot_bytes=64 * 1024, start_method="fork", **kwargs)
+        pool.start(ready_timeout_s=30)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.stop()
+
+
+def test_frames_are_detected_through_shared_memory(make_pool):
+    pool = make_pool()
+    detections = pool.detect(_frame(), affinity="a")
+    assert [(d.label, d.box.x_max, d.box.y_max) for d in detections] == [("cup", 64, 48)]
+    # Larger than a slot: sent inline instead
+    assert pool.detect(np.zeros((200, 200, 3), dtype=np.uint8))[0].box.x_max == 200
+    assert pool.stats()["inline_frames"] == 1
+    assert pool.in_flight() == 0
+
+
+def test_frame_is_rejected_when_every_slot_is_in_use(make_pool):
+    pool = make_pool(queue_depth=1)
+    future = pool.submit(_frame(SLOW), affinity="a")
+    with pytest.raises(InferenceBusyError):
+        pool.submit(_frame(), affinity="a")
+    assert pool.stats()["rejected"] == 1
+    future.result(5)
+    assert pool.detect(_frame(), affinity="a")
+
+
+def test_timed_out_frame_keeps_its_slot_until_the_worker_answers(make_pool):
+    pool = make_pool(queue_depth=1, timeout_s=0.2)
+    with pytest.raises(InferenceUnavailableError):
+        pool.detect(_frame(SLOW), affinity="a")
+    # The worker is still reading the slot
+    with pytest.raises(InferenceBusyError):
+        pool.submit(_frame(), affinity="a")
+    time.sleep(1.0)
+    assert pool.detect(_frame(), affinity="a")
+
+
+def test_dead_worker_fails_its_frames(make_pool):
+    pool = make_pool(timeout_s=5)
+    with pytest.raises(InferenceUnavailableError):
+        pool.detect(_frame(CRASH), affinity="a")
+    assert not pool.healthy
+    with pytest.raises(InferenceUnavailableError):
+        pool.submit(_frame(), affinity="a")
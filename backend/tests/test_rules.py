@@ -0,0 +1,49 @@
+"""
+Tests for the template guidance in llm/rules.py.
+
+    python -m pytest backend/tests
+"""
+
+from backend.core.models import BoundingBox, Detection
+from backend.database.models import Anchor
+from backend.llm.rules import matches_target, rule_based_guidance
+from backend.utils.geometry import DISTANCE_PHRASES, calculate_relative_direction
+
+AHEAD = calculate_relative_direction(0.5, 0.5)
+FEW_STEPS = DISTANCE_PHRASES[2]
+
+
+def _detection(label: str, direction: str = AHEAD, distance: str = FEW_STEPS) -> Detection:
+    return Detection(label, BoundingBox(0, 0, 10, 10), 0.9, direction, distance)
+
+
+def test_target_with_determiner_is_rendered_without_it():
+    text = rule_based_guidance("my keys", [_detection("keys")], [])
+    assert text == "The keys are directly ahead, a few steps away."
+
+
+def test_missing_target_with_determiner_uses_anchor():
+    anchor = Anchor(name="keys", x_center=20.0, y_center=50.0)
+    text = rule_based_guidance("my keys", [_detection("chair")], [anchor])
+    assert text.startswith("I don't see the keys right now. When you saved them, they were")
+
+
+def test_matches_target_needs_the_whole_phrase():
+    assert matches_target("keys", "my keys")
+    assert matches_target("cup", "my mug")
+    assert matches_target("cups", "the cup")
+    assert not matches_target("car", "car keys")
+    assert not matches_target("", "cup")
+
+
+def test_single_match_is_answered_with_the_target_verb():
+    assert rule_based_guidance("my mug", [_detection("cup")], []) == "The mug is directly ahead, a few steps away."
+    assert rule_based_guidance("glasses", [_detection("glasses")], []).startswith("The glasses are ")
+
+
+def test_ambiguous_scenes_are_left_to_the_llm():
+    left = calculate_relative_direction(0.1, 0.5)
+    assert rule_based_guidance("cup", [_detection("cup"), _detection("cup", direction=left)], []) is None
+    assert rule_based_guidance("car keys", [_detection("car")], []) is None
+    assert rule_based_guidance("cup", [], []) == "I don't see anything yet. Try turning slowly."
+    assert rule_based_guidance("", [], []) is None
@@ -0,0 +1,51 @@
+"""
+Tests for the scene-change gate in vision/scene.py.
+
+    python -m pytest backend/tests
+"""
+
+import numpy as np
+
+from backend.vision.scene import SceneChangeDetector
+
+
+def _frame(value: int, shape=(240, 320, 3)) -> np.ndarray:
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_first_frame_is_always_processed():
+    assert SceneChangeDetector().should_process(_frame(0))
+
+
+def test_small_changes_are_skipped_large_ones_processed():
+    detector = SceneChangeDetector(threshold=4.0)
+    detector.should_process(_frame(100))
+    assert not detector.should_process(_frame(102))
+    assert detector.skipped == 1
+    assert detector.should_process(_frame(120))
+    assert detector.last_difference == 20.0
+    assert detector.skipped == 0
+
+
+def test_sensor_noise_is_averaged_away():
+    rng = np.random.default_rng(0)
+    detector = SceneChangeDetector(threshold=4.0)
+    base = _frame(128).astype(np.int16)
+    detector.should_process(base.astype(np.uint8))
+    noisy = np.clip(base + rng.integers(-20, 21, base.shape), 0, 255).astype(np.uint8)
+    assert not detector.should_process(noisy)
+
+
+def test_static_scene_is_refreshed_after_max_skips():
+    detector = SceneChangeDetector(max_skips=3)
+    results = [detector.should_process(_frame(50)) for _ in range(9)]
+    assert results == [True, False, False, False, True, False, False, False, True]
+
+
+def test_resolution_change_and_reset_force_processing():
+    detector = SceneChangeDetector()
+    detector.should_process(_frame(50))
+    assert detector.should_process(_frame(50, shape=(480, 640, 3)))
+    assert not detector.should_process(_frame(50, shape=(480, 640, 3)))
+    detector.reset()
+    assert detector.should_process(_frame(50, shape=(480, 640, 3)))
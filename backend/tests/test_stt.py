@@ -0,0 +1,77 @@
+"""
+Tests for the audio handling and target extraction in audio/stt.py (no Whisper model needed).
+
+    python -m pytest backend/tests
+"""
+
+import io
+import wave
+
+import numpy as np
+
+from backend.audio import stt
+from backend.audio.stt import SAMPLE_RATE, StreamingTranscriber, decode_audio, extract_target_object, pcm16_to_float
+
+
+def _wav(samples: np.ndarray, rate: int, channels: int = 1) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def test_pcm16_to_float_ignores_a_trailing_odd_byte():
+    samples = pcm16_to_float(np.array([0, 16384, -32768], dtype="<i2").tobytes() + b"\x01")
+    assert samples.dtype == np.float32
+    assert samples.tolist() == [0.0, 0.5, -1.0]
+
+
+def test_wav_is_decoded_to_16khz_mono():
+    stereo = np.repeat(np.full(8000, 16384, dtype=np.int16), 2)  # 1 s at 8 kHz
+    samples = decode_audio(_wav(stereo, 8000, channels=2))
+    assert isinstance(samples, np.ndarray)
+    assert len(samples) == SAMPLE_RATE
+    assert np.allclose(samples, 0.5)
+
+
+def test_other_containers_are_passed_through_in_memory():
+    data = b"\x1aE\xdf\xa3webm"
+    decoded = decode_audio(data)
+    assert decoded.read() == data
+
+
+def test_streaming_transcriber_transcribes_every_step(monkeypatch):
+    lengths = []
+
+    def transcribe(audio):
+        lengths.append(len(audio))
+        return f"text {len(lengths)}"
+
+    monkeypatch.setattr(stt, "transcribe", transcribe)
+    transcriber = StreamingTranscriber(step_s=0.5, max_s=1.0)
+    chunk = np.zeros(SAMPLE_RATE // 4, dtype="<i2").tobytes()  # 0.25 s
+    results = [transcriber.feed(chunk) for _ in range(6)]
+    assert results == [None, "text 1", None, "text 2", None, "text 3"]
+    # Only the last max_s seconds are sent to the model
+    assert lengths == [SAMPLE_RATE // 2, SAMPLE_RATE, SAMPLE_RATE]
+    assert transcriber.finish() == "text 3"
+    transcriber.feed(chunk)
+    assert transcriber.finish() == "text 4"
+
+
+def test_target_is_extracted_from_commands():
+    assert extract_target_object("Where are my keys?") == "keys"
+    assert extract_target_object("can you find my phone please") == "cell phone"
+    assert extract_target_object("help me find the coffee mug") == "cup"
+    assert extract_target_object("Where did I leave my car keys") == "car keys"
+    assert extract_target_object("look for the remote on the table") == "remote"
+
+
+def test_target_without_command_words_must_be_a_class():
+    assert extract_target_object("a bottle") == "bottle"
+    assert extract_target_object("hello there") is None
+    assert extract_target_object("find") is None
+    assert extract_target_object("") is None
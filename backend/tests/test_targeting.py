@@ -0,0 +1,74 @@
+"""
+Tests for the class filter and region planning in vision/targeting.py and vision/classes.py.
+
+    python -m pytest backend/tests
+"""
+
+from backend.core.models import BoundingBox, Detection
+from backend.vision.classes import (
+    CLASS_IDS,
+    class_ids_for,
+    find_class_names,
+    match_class_name,
+    phrase_words,
+    resolve_class_name,
+    strip_determiners,
+)
+from backend.vision.targeting import DetectionPlanner
+
+SHAPE = (480, 640, 3)
+
+
+def _cup(x_min: int = 300, y_min: int = 200, size: int = 40) -> Detection:
+    return Detection("cup", BoundingBox(x_min, y_min, x_min + size, y_min + size), 0.8)
+
+
+def test_whole_phrase_must_name_a_class():
+    assert resolve_class_name("my mug") == "cup"
+    assert resolve_class_name("the cell phones") == "cell phone"
+    assert resolve_class_name("car keys") is None
+    assert resolve_class_name("my") is None
+
+
+def test_class_names_in_free_text():
+    assert find_class_names("a mug next to my phone and another cup") == ["cup", "cell phone"]
+    assert match_class_name("the tv remote") == "remote"
+
+
+def test_determiners_are_stripped():
+    assert strip_determiners("my Car Keys") == "Car Keys"
+    assert strip_determiners("the") == "the"
+    assert phrase_words("Your reading glasses") == ("reading", "glass")
+    assert class_ids_for(["cup", "unknown", "person"]) == sorted([CLASS_IDS["cup"], CLASS_IDS["person"]])
+
+
+def test_non_class_targets_always_get_full_scans():
+    planner = DetectionPlanner()
+    for _ in range(6):
+        assert planner.plan("car keys", SHAPE, [_cup()]).full_scan
+
+
+def test_class_target_narrows_between_full_scans():
+    planner = DetectionPlanner(full_scan_interval=3, roi=False)
+    plans = [planner.plan("my mug", SHAPE, []) for _ in range(6)]
+    assert [p.full_scan for p in plans] == [True, False, False, True, False, False]
+    labels = plans[1].labels
+    assert "cup" in labels and "person" in labels and "book" not in labels
+    planner.reset()
+    assert planner.plan("my mug", SHAPE, []).full_scan
+
+
+def test_region_surrounds_the_last_target_box():
+    planner = DetectionPlanner(full_scan_interval=10, class_filter=False, roi_margin=1.0, roi_min_fraction=0.35)
+    planner.plan("cup", SHAPE, [])
+    plan = planner.plan("cup", SHAPE, [_cup(300, 200, 40)])
+    assert plan.classes is None
+    x_min, y_min, x_max, y_max = plan.region
+    assert x_min <= 300 and y_min <= 200 and x_max >= 340 and y_max >= 240
+    assert (x_max - x_min, y_max - y_min) == (224, 168)  # the minimum fraction of the frame
+    # A box near the edge is shifted inside the frame
+    x_min, y_min, x_max, y_max = planner.plan("cup", SHAPE, [_cup(620, 460, 20)]).region
+    assert (x_max, y_max) == (640, 480)
+    # Not seen yet, or the box is too large for a useful crop
+    assert planner.plan("cup", SHAPE, []).region is None
+    assert planner.plan("cup", SHAPE, [_cup(100, 100, 300)]).region is None
@@ -0,0 +1,78 @@
+"""
+Tests for the IoU tracker in vision/tracking.py.
+
+    python -m pytest backend/tests
+"""
+
+import numpy as np
+
+from backend.core.models import BoundingBox, Detection
+from backend.vision.tracking import ObjectTracker, iou_matrix
+
+SHAPE = (480, 640, 3)
+
+
+def _det(label: str, x_min: int, y_min: int, size: int = 100, confidence: float = 0.9) -> Detection:
+    return Detection(label, BoundingBox(x_min, y_min, x_min + size, y_min + size), confidence)
+
+
+def test_iou_matrix():
+    boxes = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=float)
+    ious = iou_matrix(boxes, np.array([[0, 0, 10, 10], [5, 0, 15, 10]], dtype=float))
+    assert ious[0, 0] == 1.0
+    assert abs(ious[0, 1] - 50 / 150) < 1e-9
+    assert not ious[1].any()
+    assert iou_matrix(boxes, np.zeros((0, 4))).shape == (2, 0)
+
+
+def test_overlapping_detection_keeps_its_track_id():
+    tracker = ObjectTracker()
+    first = tracker.update([_det("cup", 100, 100), _det("chair", 400, 200)], SHAPE)
+    second = tracker.update([_det("chair", 410, 205), _det("cup", 105, 100)], SHAPE)
+    ids = {d.label: d.track_id for d in first}
+    assert len(set(ids.values())) == 2
+    assert {d.label: d.track_id for d in second} == ids
+
+
+def test_tracks_only_match_detections_of_the_same_label():
+    tracker = ObjectTracker()
+    cup = tracker.update([_det("cup", 100, 100)], SHAPE)[0]
+    bowl = [d for d in tracker.update([_det("bowl", 100, 100)], SHAPE) if d.label == "bowl"][0]
+    assert bowl.track_id != cup.track_id
+
+
+def test_unmatched_track_is_dropped_after_max_misses():
+    tracker = ObjectTracker(max_misses=2)
+    tracker.update([_det("cup", 100, 100)], SHAPE)
+    for _ in range(2):
+        assert tracker.update([], SHAPE) == []  # missed: hidden, but still tracked
+        assert len(tracker.tracks) == 1
+    tracker.update([], SHAPE)
+    assert tracker.tracks == []
+
+
+def test_partial_pass_does_not_count_unsearched_tracks_as_missed():
+    tracker = ObjectTracker(max_misses=0)
+    tracker.update([_det("cup", 100, 100), _det("chair", 400, 200)], SHAPE)
+    # Only the cup's region was searched, and only for cups
+    result = tracker.update([_det("cup", 100, 100)], SHAPE, region=(0, 0, 300, 300), labels=frozenset({"cup"}))
+    assert sorted(d.label for d in result) == ["chair", "cup"]
+
+
+def test_predict_moves_tracks_along_their_velocity():
+    tracker = ObjectTracker(beta=1.0, alpha=1.0)
+    tracker.update([_det("cup", 100, 100)], SHAPE)
+    tracker.update([_det("cup", 110, 100)], SHAPE)  # 10 px per frame to the right
+    predicted = tracker.predict(SHAPE)[0]
+    assert predicted.box.x_min == 120
+    assert predicted.confidence < 0.9
+
+
+def test_should_detect_follows_interval_and_confidence():
+    tracker = ObjectTracker(detect_interval=3, min_confidence=0.5, confidence_decay=0.5)
+    assert tracker.should_detect(SHAPE)  # nothing tracked yet
+    tracker.update([_det("cup", 100, 100, confidence=0.9)], SHAPE)
+    assert not tracker.should_detect(SHAPE)
+    tracker.predict(SHAPE)  # confidence 0.45 < 0.5
+    assert tracker.should_detect(SHAPE)
+    assert tracker.should_detect((240, 320, 3))  # the frame size changed
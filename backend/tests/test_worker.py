@@ -0,0 +1,147 @@
+"""
+Tests for the background guidance worker in llm/worker.py.
+
+    python -m pytest backend/tests
+"""
+
+import threading
+import time
+
+import pytest
+
+from backend.core.models import BoundingBox, Detection
+from backend.core.session import SessionManager
+from backend.llm import worker as worker_module
+from backend.llm.worker import GuidanceWorker
+
+
+def _det(label: str, direction: str = "ahead") -> Detection:
+    return Detection(label, BoundingBox(0, 0, 10, 10), 0.9, relative_direction=direction, distance_estimate="near")
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake LLM that blocks until released and records every call."""
+    calls = []
+    release = threading.Event()
+
+    def generate(target_name, detections, anchors):
+        calls.append(tuple(d.relative_direction for d in detections))
+        release.wait(2.0)
+        return f"guidance {len(calls)}"
+
+    monkeypatch.setattr(worker_module, "llm_generate_guidance", generate)
+    monkeypatch.setattr(worker_module, "local_guidance", lambda *args: None)
+    return calls, release
+
+
+@pytest.fixture
+def worker():
+    worker = GuidanceWorker(num_workers=1, min_interval_s=0.0)
+    yield worker
+    worker.stop()
+
+
+def test_burst_of_frames_collapses_into_one_follow_up(llm, worker):
+    calls, release = llm
+    session = SessionManager("s")
+    assert worker.submit(session, "cup", [_det("cup", "left")], [])
+    assert _wait_for(lambda: len(calls) == 1)
+    # While the first request is in flight, newer frames only replace the pending one
+    for direction in ("right", "ahead", "behind"):
+        assert worker.submit(session, "cup", [_det("cup", direction)], [])
+    release.set()
+    assert _wait_for(lambda: session.guidance_text == "guidance 2")
+    time.sleep(0.05)
+    assert calls == [("left",), ("behind",)]
+
+
+def test_same_scene_is_not_queued_again(llm, worker):
+    calls, release = llm
+    release.set()
+    session = SessionManager("s")
+    assert worker.submit(session, "cup", [_det("cup")], [])
+    assert _wait_for(lambda: session.guidance_text == "guidance 1")
+    assert not worker.submit(session, "cup", [_det("cup")], [])
+    assert len(calls) == 1
+
+
+def test_local_answer_is_applied_without_the_llm(llm, worker, monkeypatch):
+    calls, _ = llm
+    monkeypatch.setattr(worker_module, "local_guidance", lambda *args: "The cup is ahead.")
+    session = SessionManager("s")
+    assert not worker.submit(session, "cup", [_det("cup")], [])
+    assert session.guidance_text == "The cup is ahead."
+    assert session.guidance_scene is not None
+    assert calls == []
+
+
+def test_answer_is_dropped_if_the_target_changed_in_flight(llm, worker):
+    calls, release = llm
+    session = SessionManager("s")
+    worker.submit(session, "cup", [_det("cup")], [])
+    assert _wait_for(lambda: len(calls) == 1)
+    session.set_target("bottle")
+    release.set()
+    assert _wait_for(lambda: not worker._in_flight)
+    assert session.guidance_text == ""
+
+
+def test_failed_request_allows_a_retry(worker, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("LLM down")
+
+    monkeypatch.setattr(worker_module, "llm_generate_guidance", fail)
+    monkeypatch.setattr(worker_module, "local_guidance", lambda *args: None)
+    session = SessionManager("s")
+    worker.submit(session, "cup", [_det("cup")], [])
+    assert _wait_for(lambda: not worker._pending and not worker._in_flight)
+    assert session.guidance_scene is None
+    assert worker.submit(session, "cup", [_det("cup")], [])
+
+
+def test_claim_drops_the_pending_request_for_a_streamed_scene(llm, worker):
+    calls, release = llm
+    session = SessionManager("s")
+    worker.submit(session, "cup", [_det("cup", "left")], [])
+    assert _wait_for(lambda: len(calls) == 1)
+    worker.submit(session, "cup", [_det("cup", "right")], [])
+    summary = worker.claim(session, "cup", [_det("cup", "right")], [])
+    assert session.guidance_scene == summary
+    assert not worker._pending
+    # The same scene is now answered by the stream
+    assert not worker.submit(session, "cup", [_det("cup", "right")], [])
+    release.set()
+
+
+def test_deliver_only_stores_answers_for_the_current_scene_and_target(worker):
+    session = SessionManager("s")
+    session.current_target_name = "cup"
+    summary = worker.claim(session, "cup", [_det("cup", "left")], [])
+    newer = worker.claim(session, "cup", [_det("cup", "right")], [])
+    assert not worker.deliver(session, "cup", summary, "stale")
+    assert worker.deliver(session, "cup", newer, "The cup is to your right.")
+    assert session.guidance_text == "The cup is to your right."
+
+    session.set_target("bottle")
+    assert not worker.deliver(session, "cup", newer, "stale")
+    assert session.guidance_text == ""
+
+
+def test_release_only_clears_its_own_scene(worker):
+    session = SessionManager("s")
+    summary = worker.claim(session, "cup", [_det("cup", "left")], [])
+    newer = worker.claim(session, "cup", [_det("cup", "right")], [])
+    worker.release(session, summary)
+    assert session.guidance_scene == newer
+    worker.release(session, newer)
+    assert session.guidance_scene is None
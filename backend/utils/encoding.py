@@ -0,0 +1,98 @@
+# backend/utils/encoding.py
+
+import json
+import struct
+from typing import List, Tuple
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for format=msgpack responses
+    msgpack = None
+
+from .geometry import DIRECTION_PHRASES, DISTANCE_PHRASES
+
+# Binary stream messages are laid out as:
+#   [4-byte big-endian header length][UTF-8 JSON header][raw payload bytes]
+# The payload is optional (e.g. an annotated JPEG) and may be empty.
+_HEADER_LEN = struct.Struct(">I")
+
+
+def pack_stream_message(header: dict, payload: bytes = b"") -> bytes:
+    """
+    Packs a JSON header and an optional binary payload into one WebSocket message.
+    """
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return b"".join((_HEADER_LEN.pack(len(header_bytes)), header_bytes, payload))
+
+
+def unpack_stream_message(message: bytes) -> Tuple[dict, bytes]:
+    """
+    Inverse of pack_stream_message. Returns (header, payload).
+    """
+    if len(message) < _HEADER_LEN.size:
+        raise ValueError("Stream message is too short.")
+    (header_len,) = _HEADER_LEN.unpack_from(message)
+    start = _HEADER_LEN.size
+    header = json.loads(message[start:start + header_len].decode("utf-8"))
+    return header, message[start + header_len:]
+
+
+# Compact detection encoding. Directions and distances are sent as indices into the
+# geometry phrase tables, so a detection costs ~15 bytes plus its label:
+#   [u16 count] then per detection:
+#   [u8 label length][label][u16 x_min, y_min, x_max, y_max][u8 confidence * 255]
+#   [u8 direction code][u8 distance code][u32 track id, 0 = untracked]
+_COUNT = struct.Struct(">H")
+_DETECTION_RECORD = struct.Struct(">4HBBBI")
+DIRECTION_CODES = tuple(phrase for row in DIRECTION_PHRASES for phrase in row)
+DISTANCE_CODES = DISTANCE_PHRASES
+_UNKNOWN_CODE = 255
+
+
+def _code(phrase: str, table: tuple) -> int:
+    return table.index(phrase) if phrase in table else _UNKNOWN_CODE
+
+
+def pack_detections(detection_payload: List[dict]) -> bytes:
+    """Packs detection payload dicts (see build_detection_payload) into the compact format."""
+    parts = [_COUNT.pack(len(detection_payload))]
+    for det in detection_payload:
+        label = det["label"].encode("utf-8")[:255]
+        box = det["box"]
+        parts.append(bytes((len(label),)) + label)
+        parts.append(_DETECTION_RECORD.pack(
+            *(min(max(int(box[k]), 0), 0xFFFF) for k in ("x_min", "y_min", "x_max", "y_max")),
+            round(det["confidence"] * 255),
+            _code(det["relative_direction"], DIRECTION_CODES),
+            _code(det["distance_estimate"], DISTANCE_CODES),
+            det.get("track_id") or 0,
+        ))
+    return b"".join(parts)
+
+
+def unpack_detections(data: bytes) -> List[dict]:
+    """Inverse of pack_detections (confidence is quantized to 1/255)."""
+    (count,) = _COUNT.unpack_from(data)
+    offset = _COUNT.size
+    detections = []
+    for _ in range(count):
+        label_len = data[offset]
+        label = data[offset + 1:offset + 1 + label_len].decode("utf-8")
+        offset += 1 + label_len
+        x_min, y_min, x_max, y_max, conf, direction, distance, track_id = _DETECTION_RECORD.unpack_from(data, offset)
+        offset += _DETECTION_RECORD.size
+        detections.append({
+            "label": label,
+            "confidence": conf / 255,
+            "relative_direction": DIRECTION_CODES[direction] if direction < len(DIRECTION_CODES) else "",
+            "distance_estimate": DISTANCE_CODES[distance] if distance < len(DISTANCE_CODES) else "",
+            "track_id": track_id or None,
+            "box": {"x_min": x_min, "y_min": y_min, "x_max": x_max, "y_max": y_max},
+        })
+    return detections
+
+
+def pack_msgpack(payload: dict) -> bytes:
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed.")
+    return msgpack.packb(payload, use_bin_type=True)
@@ -1,6 +1,70 @@
 # backend/utils/geometry.py
 
-from typing import Tuple
+import operator
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Bucket tables: (comparison, threshold, phrase), checked in order; the first match wins
+# and the *_DEFAULT phrase is used when none match. operator.lt/gt work on both floats and
+# NumPy arrays, so the same tables drive the scalar and the vectorized helpers below.
+X_DIRECTION_BUCKETS = (
+    (operator.lt, 0.35, "to your **far left**"),
+    (operator.lt, 0.45, "slightly to your **left**"),
+    (operator.gt, 0.65, "to your **far right**"),
+    (operator.gt, 0.55, "slightly to your **right**"),
+)
+X_DIRECTION_DEFAULT = "directly **ahead**"
+
+Y_DIRECTION_BUCKETS = (
+    (operator.lt, 0.35, "and **up**"),
+    (operator.gt, 0.65, "and **down**"),
+)
+Y_DIRECTION_DEFAULT = ""
+
+# Thresholds are on the fraction of the frame area covered by the box
+DISTANCE_BUCKETS = (
+    (operator.gt, 0.10, "very close (less than half an arm's length)"),
+    (operator.gt, 0.03, "about an arm's length (approx. 0.5 - 1.0 meter)"),
+    (operator.gt, 0.01, "a few steps away (approx. 1.0 - 2.5 meters)"),
+)
+DISTANCE_DEFAULT = "far away (more than 2.5 meters)"
+
+
+def bucket_phrases(buckets: Sequence[tuple], default: str) -> Tuple[str, ...]:
+    """All phrases of a bucket table, indexed by bucket_index/bucket_indices."""
+    return tuple(phrase for _, _, phrase in buckets) + (default,)
+
+
+def bucket_index(value: float, buckets: Sequence[tuple]) -> int:
+    """Index of the first bucket matching value, or len(buckets) for the default."""
+    for i, (compare, threshold, _) in enumerate(buckets):
+        if compare(value, threshold):
+            return i
+    return len(buckets)
+
+
+def bucket_indices(values: np.ndarray, buckets: Sequence[tuple]) -> np.ndarray:
+    """Vectorized bucket_index over an array of values."""
+    values = np.asarray(values)
+    conditions = [compare(values, threshold) for compare, threshold, _ in buckets]
+    return np.select(conditions, np.arange(len(buckets)), default=len(buckets))
+
+
+def _compose_direction(x_dir: str, y_dir: str) -> str:
+    if x_dir == X_DIRECTION_DEFAULT and y_dir == "":
+        return X_DIRECTION_DEFAULT
+    return f"{x_dir}{y_dir}".strip().replace("ahead and", "ahead,")
+
+
+# DIRECTION_PHRASES[x_index][y_index] -> full direction phrase
+DIRECTION_PHRASES = tuple(
+    tuple(_compose_direction(x_dir, y_dir) for y_dir in bucket_phrases(Y_DIRECTION_BUCKETS, Y_DIRECTION_DEFAULT))
+    for x_dir in bucket_phrases(X_DIRECTION_BUCKETS, X_DIRECTION_DEFAULT)
+)
+DISTANCE_PHRASES = bucket_phrases(DISTANCE_BUCKETS, DISTANCE_DEFAULT)
+
 
 def calculate_relative_direction(x_center_norm: float, y_center_norm: float) -> str:
     """
@@ -13,31 +77,9 @@ def calculate_relative_direction(x_center_norm: float, y_center_norm: float) ->
     Returns:
         A string like "ahead and slightly to your left" or "directly down".
     """
-    
-    # X-Axis
-    if x_center_norm < 0.35:
-        x_dir = "to your **far left**"
-    elif x_center_norm < 0.45:
-        x_dir = "slightly to your **left**"
-    elif x_center_norm > 0.65:
-        x_dir = "to your **far right**"
-    elif x_center_norm > 0.55:
-        x_dir = "slightly to your **right**"
-    else: 
-        x_dir = "directly **ahead**"
-
-    # Y-Axis
-    if y_center_norm < 0.35:
-        y_dir = "and **up**"
-    elif y_center_norm > 0.65:
-        y_dir = "and **down**"
-    else:
-        y_dir = "" 
-        
-    if x_dir == "directly **ahead**" and y_dir == "":
-        return "directly **ahead**"
-    
-    return f"{x_dir}{y_dir}".strip().replace("ahead and", "ahead,")
+    x_index = bucket_index(x_center_norm, X_DIRECTION_BUCKETS)
+    y_index = bucket_index(y_center_norm, Y_DIRECTION_BUCKETS)
+    return DIRECTION_PHRASES[x_index][y_index]
 
 
 def estimate_distance_simple(box_width_norm: float, box_height_norm: float) -> str:
@@ -45,12 +87,139 @@ def estimate_distance_simple(box_width_norm: float, box_height_norm: float) -> s
     Simple heuristic for distance based on object size in the frame.
     """
     area = box_width_norm * box_height_norm
-    
-    if area > 0.10: # Object takes up more than 10% of the frame area
-        return "very close (less than half an arm's length)"
-    elif area > 0.03:
-        return "about an arm's length (approx. 0.5 - 1.0 meter)"
-    elif area > 0.01:
-        return "a few steps away (approx. 1.0 - 2.5 meters)"
-    else:
-        return "far away (more than 2.5 meters)"
+    return DISTANCE_PHRASES[bucket_index(area, DISTANCE_BUCKETS)]
+
+
+def relative_directions(x_centers_norm: np.ndarray, y_centers_norm: np.ndarray) -> List[str]:
+    """Vectorized calculate_relative_direction for arrays of normalized centers."""
+    x_indices = bucket_indices(x_centers_norm, X_DIRECTION_BUCKETS)
+    y_indices = bucket_indices(y_centers_norm, Y_DIRECTION_BUCKETS)
+    return [DIRECTION_PHRASES[x][y] for x, y in zip(x_indices.tolist(), y_indices.tolist())]
+
+
+def distance_estimates(box_widths_norm: np.ndarray, box_heights_norm: np.ndarray) -> List[str]:
+    """Vectorized estimate_distance_simple for arrays of normalized box sizes."""
+    areas = np.asarray(box_widths_norm) * np.asarray(box_heights_norm)
+    return [DISTANCE_PHRASES[i] for i in bucket_indices(areas, DISTANCE_BUCKETS).tolist()]
+
+
+def hysteresis_bucket_index(
+    value: float, buckets: Sequence[tuple], current: Optional[int], band: float, relative: bool = False
+) -> int:
+    """
+    bucket_index that sticks to `current` while the value is within `band` of that bucket
+    (an absolute margin, or a fraction of the value when `relative`), so values hovering
+    at a threshold do not flip between buckets.
+    """
+    index = bucket_index(value, buckets)
+    if current is None or index == current:
+        return index
+    low, high = (value / (1 + band), value * (1 + band)) if relative else (value - band, value + band)
+    if current in (bucket_index(low, buckets), bucket_index(high, buckets)):
+        return current
+    return index
+
+
+@dataclass
+class _SmoothedObject:
+    x: float
+    y: float
+    area: float
+    direction: Tuple[int, int]       # emitted (x, y) bucket indices
+    distance: int                    # emitted distance bucket index
+    pending_direction: Optional[Tuple[int, int]] = None
+    pending_distance: Optional[int] = None
+    direction_votes: int = 0
+    distance_votes: int = 0
+    last_update: int = 0
+
+
+class TemporalBucketFilter:
+    """
+    Per-object smoothing of the direction and distance buckets across frames.
+
+    Centers and box areas are averaged with an exponential moving average (weight `alpha`
+    for the newest frame), bucketed with hysteresis bands around the thresholds, and a
+    new bucket is only emitted after it was seen on `stable_frames` consecutive updates.
+    Objects are keyed by track id (by label when untracked) and forgotten after
+    `max_age` updates without a detection.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.5,
+        position_band: float = 0.03,
+        area_band: float = 0.25,
+        stable_frames: int = 2,
+        max_age: int = 30,
+    ):
+        self.alpha = alpha
+        self.position_band = position_band
+        self.area_band = area_band
+        self.stable_frames = max(1, stable_frames)
+        self.max_age = max_age
+        self._objects: Dict[object, _SmoothedObject] = {}
+        self._updates = 0
+
+    def reset(self):
+        self._objects = {}
+
+    def apply(self, detections: List, frame_shape: Tuple[int, ...]) -> None:
+        """Replaces relative_direction and distance_estimate of each detection with the smoothed buckets."""
+        self._updates += 1
+        frame_height, frame_width = frame_shape[:2]
+        for det in detections:
+            box = det.box
+            x = det.x_center_norm if det.x_center_norm is not None else (box.x_min + box.x_max) / (2 * frame_width)
+            y = det.y_center_norm if det.y_center_norm is not None else (box.y_min + box.y_max) / (2 * frame_height)
+            area = (box.x_max - box.x_min) * (box.y_max - box.y_min) / float(frame_width * frame_height)
+            key = det.track_id if det.track_id is not None else det.label
+
+            state = self._objects.get(key)
+            if state is None:
+                state = self._objects[key] = _SmoothedObject(
+                    x, y, area,
+                    direction=(bucket_index(x, X_DIRECTION_BUCKETS), bucket_index(y, Y_DIRECTION_BUCKETS)),
+                    distance=bucket_index(area, DISTANCE_BUCKETS),
+                )
+            else:
+                state.x += self.alpha * (x - state.x)
+                state.y += self.alpha * (y - state.y)
+                state.area += self.alpha * (area - state.area)
+                self._vote_direction(state)
+                self._vote_distance(state)
+            state.last_update = self._updates
+
+            det.relative_direction = DIRECTION_PHRASES[state.direction[0]][state.direction[1]]
+            det.distance_estimate = DISTANCE_PHRASES[state.distance]
+
+        stale = [key for key, state in self._objects.items() if self._updates - state.last_update > self.max_age]
+        for key in stale:
+            del self._objects[key]
+
+    def _vote_direction(self, state: _SmoothedObject):
+        candidate = (
+            hysteresis_bucket_index(state.x, X_DIRECTION_BUCKETS, state.direction[0], self.position_band),
+            hysteresis_bucket_index(state.y, Y_DIRECTION_BUCKETS, state.direction[1], self.position_band),
+        )
+        if candidate == state.direction:
+            state.pending_direction, state.direction_votes = None, 0
+            return
+        if candidate != state.pending_direction:
+            state.pending_direction, state.direction_votes = candidate, 0
+        state.direction_votes += 1
+        if state.direction_votes >= self.stable_frames:
+            state.direction, state.pending_direction, state.direction_votes = candidate, None, 0
+
+    def _vote_distance(self, state: _SmoothedObject):
+        candidate = hysteresis_bucket_index(
+            state.area, DISTANCE_BUCKETS, state.distance, self.area_band, relative=True
+        )
+        if candidate == state.distance:
+            state.pending_distance, state.distance_votes = None, 0
+            return
+        if candidate != state.pending_distance:
+            state.pending_distance, state.distance_votes = candidate, 0
+        state.distance_votes += 1
+        if state.distance_votes >= self.stable_frames:
+            state.distance, state.pending_distance, state.distance_votes = candidate, None, 0
@@ -0,0 +1,228 @@
+# backend/utils/metrics.py
+
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Latency buckets in seconds (Prometheus `le` bounds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """
+    Cumulative bucket counts for Prometheus, plus a bounded window of recent
+    samples so p50/p95/p99 can be reported directly.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...], window: int = 1024):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self._recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+        self._recent.append(value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        samples = sorted(self._recent)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def quantiles(self) -> Dict[float, float]:
+        samples = sorted(self._recent)
+        if not samples:
+            return {}
+        return {q: samples[min(len(samples) - 1, int(q * len(samples)))] for q in QUANTILES}
+
+
+class MetricsRegistry:
+    """Process-wide histograms and counters, rendered in the Prometheus text format."""
+
+    def __init__(self, prefix: str = "clearpath"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+        self._histogram_meta: Dict[str, Tuple[str, Tuple[float, ...]]] = {}
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._counter_help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+
+    def describe_histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self._histogram_meta[name] = (help_text, buckets)
+
+    def describe_counter(self, name: str, help_text: str):
+        self._counter_help[name] = help_text
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                buckets = self._histogram_meta.get(name, ("", LATENCY_BUCKETS))[1]
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def quantile(self, name: str, q: float, min_samples: int = 1, **labels) -> Optional[float]:
+        """Recent-window quantile of a histogram, or None with fewer than `min_samples` samples."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None or len(histogram._recent) < min_samples:
+                return None
+            return histogram.quantile(q)
+
+    def reset(self):
+        """Drops all recorded values (descriptions and collectors are kept)."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def register_collector(self, collector: Callable[[], Dict[str, float]]):
+        """Adds a callable returning {metric_name: value} gauges, evaluated on every render."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Per-histogram count/mean/quantiles, for logs and benchmarks."""
+        with self._lock:
+            return {
+                _series_name(name, labels): {
+                    "count": h.count,
+                    "mean": h.total / h.count if h.count else 0.0,
+                    **{f"p{int(q * 100)}": v for q, v in h.quantiles().items()},
+                }
+                for (name, labels), h in self._histograms.items()
+            }
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            described = set()
+            for (name, labels), h in sorted(self._histograms.items()):
+                full = f"{self.prefix}_{name}"
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {full} {self._histogram_meta.get(name, ('',))[0]}")
+                    lines.append(f"# TYPE {full} histogram")
+                cumulative = 0
+                for bound, count in zip(h.buckets + (float("inf"),), h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{full}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{full}_sum{_labels(labels)} {h.total}")
+                lines.append(f"{full}_count{_labels(labels)} {h.count}")
+            # Recent-window quantiles as a separate gauge family
+            for (name, labels), h in sorted(self._histograms.items()):
+                for q, v in h.quantiles().items():
+                    lines.append(f"{self.prefix}_{name}_quantile{_labels(labels + (('quantile', str(q)),))} {v}")
+
+            described = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                full = f"{self.prefix}_{name}"
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {full} {self._counter_help.get(name, '')}")
+                    lines.append(f"# TYPE {full} counter")
+                lines.append(f"{full}{_labels(labels)} {value}")
+            collectors = list(self._collectors)
+
+        for collector in collectors:
+            for name, value in collector().items():
+                lines.append(f"# TYPE {self.prefix}_{name} gauge")
+                lines.append(f"{self.prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def _series_name(name: str, labels: Tuple) -> str:
+    return name + "".join(f".{v}" for _, v in labels)
+
+
+registry = MetricsRegistry()
+registry.describe_histogram("stage_duration_seconds", "Latency of each frame pipeline stage.")
+registry.describe_histogram("inference_batch_size", "Frames per batched model.predict call.", BATCH_SIZE_BUCKETS)
+registry.describe_histogram("llm_attempt_duration_seconds", "Latency of successful LLM API requests.")
+registry.describe_histogram("llm_first_chunk_seconds", "Time to the first chunk of a streamed LLM response.")
+registry.describe_counter("frames_skipped_total", "Frames answered from cache because the scene had not changed.")
+registry.describe_counter("inference_rejected_total", "Frames rejected because their inference worker had no free slot.")
+registry.describe_counter("inference_timeouts_total", "Frames that timed out waiting for their inference worker (the slot is held until it answers).")
+registry.describe_counter("detections_targeted_total", "Detection passes restricted to the target's classes and/or a region of interest.")
+registry.describe_counter("guidance_rule_answers_total", "Guidance answered from templates without the LLM.")
+registry.describe_counter("llm_calls_total", "Requests sent to the LLM API (retries and hedges included).")
+registry.describe_counter("llm_errors_total", "LLM queries that failed after retries.")
+registry.describe_counter("llm_retries_total", "LLM queries retried after a retryable error.")
+registry.describe_counter("llm_hedged_total", "Hedged duplicate LLM requests sent after the p95 latency.")
+registry.describe_counter("llm_rejected_total", "LLM queries rejected by the open circuit breaker.")
+
+# Per-request stage timings, used for the Server-Timing header
+# (stage, seconds) pairs in the order the stages finished
+StageTimings = List[Tuple[str, float]]
+
+_request_timings: ContextVar[Optional[StageTimings]] = ContextVar("request_timings", default=None)
+
+
+def begin_request_timing() -> StageTimings:
+    """Starts collecting stage timings for the current request (call from the endpoint)."""
+    timings: StageTimings = []
+    _request_timings.set(timings)
+    return timings
+
+
+@contextmanager
+def capture_timings() -> Iterator[StageTimings]:
+    """
+    Collects the stages timed inside the block on this thread, e.g. on the batch engine
+    or in an inference worker, so they can be handed back to the requests they served.
+    """
+    timings: StageTimings = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def add_request_timings(timings: StageTimings):
+    """Adds stages timed on another thread or process to the current request's timings."""
+    current = _request_timings.get()
+    if current is not None:
+        current.extend(timings)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Records the duration of a pipeline stage in the stage histogram and the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("stage_duration_seconds", elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def server_timing_header(timings: StageTimings) -> str:
+    """Formats stage timings as a Server-Timing header value (durations in ms)."""
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in timings)
@@ -0,0 +1,35 @@
+# backend/utils/spatial.py
+
+import math
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+
+class GridIndex:
+    """
+    Uniform grid over 2D points for radius queries. A query only visits the cells the
+    search circle overlaps, so its cost depends on local density, not on the total count.
+    """
+
+    def __init__(self, cell_size: float = 10.0):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[Tuple[int, float, float]]] = defaultdict(list)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, item_id: int, x: float, y: float):
+        self._cells[self._cell(x, y)].append((item_id, x, y))
+
+    def query_radius(self, x: float, y: float, radius: float) -> List[Tuple[int, float]]:
+        """Returns (item_id, distance) for every point within `radius` of (x, y)."""
+        min_cx, min_cy = self._cell(x - radius, y - radius)
+        max_cx, max_cy = self._cell(x + radius, y + radius)
+        hits = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for item_id, px, py in self._cells.get((cx, cy), ()):
+                    distance = math.hypot(px - x, py - y)
+                    if distance <= radius:
+                        hits.append((item_id, distance))
+        return hits
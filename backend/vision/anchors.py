@@ -1 +1,94 @@
+from typing import List, Optional, Tuple
 
+import cv2
+import numpy as np
+
+from ..core.models import Detection, BoundingBox
+
+# HSV color histogram: 8 hue x 4 saturation x 4 value bins
+EMBEDDING_BINS = (8, 4, 4)
+EMBEDDING_DIM = int(np.prod(EMBEDDING_BINS))
+_HIST_RANGES = [0, 180, 0, 256, 0, 256]
+
+
+def compute_appearance_embedding(frame: np.ndarray, box: BoundingBox) -> Optional[np.ndarray]:
+    """
+    Compact appearance descriptor of the box crop: a square-rooted, L2-normalized HSV
+    histogram, so the dot product of two embeddings is their Bhattacharyya coefficient.
+    Returns None for an empty crop.
+    """
+    height, width = frame.shape[:2]
+    x_min, x_max = max(0, box.x_min), min(width, box.x_max)
+    y_min, y_max = max(0, box.y_min), min(height, box.y_max)
+    if x_max <= x_min or y_max <= y_min:
+        return None
+
+    hsv = cv2.cvtColor(frame[y_min:y_max, x_min:x_max], cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1, 2], None, list(EMBEDDING_BINS), _HIST_RANGES).ravel()
+    hist = np.sqrt(hist / max(hist.sum(), 1.0))
+    return (hist / max(np.linalg.norm(hist), 1e-6)).astype(np.float32)
+
+
+def pack_embedding(embedding: np.ndarray) -> bytes:
+    """Little-endian float32 blob for the feature_vector column."""
+    return np.asarray(embedding, dtype="<f4").tobytes()
+
+
+def unpack_embedding(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype="<f4")
+
+
+def build_embedding_matrix(anchors: list) -> Tuple[np.ndarray, List[int]]:
+    """
+    Stacks the anchors' stored embeddings into one contiguous (N, EMBEDDING_DIM) matrix.
+    Returns the matrix and, per row, the index of its anchor in `anchors`.
+    Anchors saved without a detector label are left out: their class cannot be checked.
+    """
+    rows, owners = [], []
+    for i, anchor in enumerate(anchors):
+        blob = getattr(anchor, "feature_vector", None)
+        if blob and len(blob) == EMBEDDING_DIM * 4 and getattr(anchor, "label", None):
+            rows.append(unpack_embedding(blob))
+            owners.append(i)
+    if not rows:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32), []
+    return np.ascontiguousarray(np.vstack(rows), dtype=np.float32), owners
+
+
+def match_detections_to_anchors(
+    frame: np.ndarray,
+    detections: List[Detection],
+    anchors: list,
+    matrix: np.ndarray,
+    owners: List[int],
+    threshold: float,
+) -> int:
+    """
+    Sets `anchor_name` on every detection whose appearance matches a saved anchor
+    of the same detector class. All detections are compared against all anchors with
+    one matrix product; pairs of different classes are masked out.
+    Returns the number of matched detections.
+    """
+    if not detections or len(owners) == 0:
+        return 0
+
+    embeddings, kept = [], []
+    for det in detections:
+        embedding = compute_appearance_embedding(frame, det.box)
+        if embedding is not None:
+            embeddings.append(embedding)
+            kept.append(det)
+    if not embeddings:
+        return 0
+
+    similarity = np.vstack(embeddings) @ matrix.T  # (detections, anchors)
+    anchor_labels = np.array([anchors[i].label for i in owners], dtype=object)
+    same_class = np.array([det.label for det in kept], dtype=object)[:, None] == anchor_labels[None, :]
+    similarity = np.where(same_class, similarity, -1.0)
+    best = similarity.argmax(axis=1)
+    matched = 0
+    for det, row, anchor_row in zip(kept, similarity, best):
+        if row[anchor_row] >= threshold:
+            det.anchor_name = anchors[owners[anchor_row]].name
+            matched += 1
+    return matched
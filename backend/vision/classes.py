@@ -0,0 +1,155 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# COCO class names in YOLOv8 class-id order (yolov8n.pt)
+COCO_CLASSES = (
+    "person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat",
+    "traffic light", "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat", "dog",
+    "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe", "backpack", "umbrella",
+    "handbag", "tie", "suitcase", "frisbee", "skis", "snowboard", "sports ball", "kite",
+    "baseball bat", "baseball glove", "skateboard", "surfboard", "tennis racket", "bottle",
+    "wine glass", "cup", "fork", "knife", "spoon", "bowl", "banana", "apple", "sandwich", "orange",
+    "broccoli", "carrot", "hot dog", "pizza", "donut", "cake", "chair", "couch", "potted plant",
+    "bed", "dining table", "toilet", "tv", "laptop", "mouse", "remote", "keyboard", "cell phone",
+    "microwave", "oven", "toaster", "sink", "refrigerator", "book", "clock", "vase", "scissors",
+    "teddy bear", "hair drier", "toothbrush",
+)
+
+# Everyday words for COCO classes
+CLASS_ALIASES = {
+    "people": "person", "man": "person", "woman": "person", "someone": "person", "somebody": "person",
+    "child": "person", "kid": "person",
+    "bike": "bicycle", "motorbike": "motorcycle", "scooter": "motorcycle", "plane": "airplane",
+    "purse": "handbag", "bag": "handbag", "rucksack": "backpack", "luggage": "suitcase",
+    "ball": "sports ball", "racket": "tennis racket",
+    "water bottle": "bottle", "mug": "cup", "coffee cup": "cup",
+    "doughnut": "donut", "hotdog": "hot dog",
+    "sofa": "couch", "plant": "potted plant", "flower pot": "potted plant",
+    "table": "dining table", "desk": "dining table", "kitchen table": "dining table",
+    "television": "tv", "monitor": "tv", "screen": "tv", "computer": "laptop",
+    "remote control": "remote", "controller": "remote",
+    "phone": "cell phone", "cellphone": "cell phone", "mobile": "cell phone", "mobile phone": "cell phone",
+    "smartphone": "cell phone", "iphone": "cell phone",
+    "fridge": "refrigerator", "hair dryer": "hair drier", "hairdryer": "hair drier",
+    "teddy": "teddy bear", "stuffed animal": "teddy bear",
+}
+
+# Classes worth reporting whatever the target is: things the user could walk into
+OBSTACLE_CLASSES = (
+    "person", "bicycle", "car", "motorcycle", "bus", "truck", "bench", "dog",
+    "chair", "couch", "potted plant", "bed", "dining table", "toilet", "suitcase",
+)
+
+CLASS_IDS = {name: i for i, name in enumerate(COCO_CLASSES)}
+
+_WORD = re.compile(r"[a-z]+")
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _build_phrases() -> Dict[Tuple[str, ...], str]:
+    # Keyed on singularized words, like the text they are matched against
+    phrases = {}
+    for phrase, name in [(name, name) for name in COCO_CLASSES] + list(CLASS_ALIASES.items()):
+        phrases[tuple(_singular(word) for word in phrase.split())] = name
+    return phrases
+
+
+_PHRASES = _build_phrases()
+_MAX_PHRASE_WORDS = max(len(words) for words in _PHRASES)
+
+
+def _class_spans(text: str) -> List[Tuple[int, int, str]]:
+    """(first word, end word, class name) of every class phrase in the text, left to right."""
+    words = [_singular(w) for w in _WORD.findall((text or "").lower())]
+    spans = []
+    i = 0
+    while i < len(words):
+        for n in range(min(_MAX_PHRASE_WORDS, len(words) - i), 0, -1):
+            name = _PHRASES.get(tuple(words[i:i + n]))
+            if name is not None:
+                spans.append((i, i + n, name))
+                i += n
+                break
+        else:
+            i += 1
+    return spans
+
+
+def find_class_names(text: str) -> List[str]:
+    """
+    COCO class names mentioned in free text, in order of appearance.
+    Longer phrases win ("cell phone" over "phone"); aliases and plurals are mapped.
+    """
+    found = []
+    for _, _, name in _class_spans(text):
+        if name not in found:
+            found.append(name)
+    return found
+
+
+def match_class_name(text: str) -> Optional[str]:
+    """
+    The class the text asks about: the first one mentioned, except that in a run of
+    adjacent class words the last is the head noun ("the tv remote" -> remote).
+    """
+    spans = _class_spans(text)
+    if not spans:
+        return None
+    start, end, name = spans[0]
+    for next_start, next_end, next_name in spans[1:]:
+        if next_start != end:
+            break
+        end, name = next_end, next_name
+    return name
+
+
+# Words that do not change what a target phrase refers to ("my keys" = "keys")
+_DETERMINERS = {"my", "the", "a", "an", "our", "your", "his", "her", "their", "some"}
+
+
+def strip_determiners(text: str) -> str:
+    """The phrase as written, without leading determiners and possessives ("my keys" -> "keys")."""
+    words = (text or "").split()
+    start = 0
+    while start < len(words) - 1 and words[start].lower().strip(".,!?") in _DETERMINERS:
+        start += 1
+    return " ".join(words[start:])
+
+
+def phrase_words(text: str) -> Tuple[str, ...]:
+    """Singularized words of a phrase without leading determiners, for comparing names."""
+    words = [_singular(w) for w in _WORD.findall((text or "").lower())]
+    while words and words[0] in _DETERMINERS:
+        words.pop(0)
+    return tuple(words)
+
+
+def is_plural_phrase(text: str) -> bool:
+    """True if the head (last) word of the phrase is a plural ("keys", "glasses")."""
+    words = _WORD.findall((text or "").lower())
+    return bool(words) and _singular(words[-1]) != words[-1]
+
+
+def resolve_class_name(text: str) -> Optional[str]:
+    """
+    The class the whole phrase names ("my mug" -> cup), or None if any word is not part
+    of that class name: "car keys", "phone charger" and "tv remote stand" are not classes.
+    """
+    words = phrase_words(text)
+    if not words:
+        return None
+    return _PHRASES.get(words)
+
+
+def class_ids_for(names) -> List[int]:
+    """Class ids for COCO names (unknown names are skipped)."""
+    return sorted({CLASS_IDS[name] for name in names if name in CLASS_IDS})
@@ -1,59 +1,342 @@
 import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
 from pathlib import Path
 import numpy as np
-from typing import List
-from ultralytics import YOLO
+from typing import List, Optional, Sequence, Tuple
+from ..config import (
+    DETECTION_BATCH_SIZE, DETECTION_BATCH_WAIT_MS,
+    DETECTOR_BACKEND, DETECTOR_IMGSZ, DETECTOR_THREADS, DETECTOR_WARMUP_RUNS,
+)
 from ..core.models import Detection, BoundingBox
-from ..utils.geometry import calculate_relative_direction, estimate_distance_simple
+from ..utils.geometry import relative_directions, distance_estimates
+from ..utils.metrics import StageTimings, add_request_timings, capture_timings, registry, timed
 
 logger = logging.getLogger(__name__)
 _model = None
+_model_lock = threading.Lock()
+_predict_lock = threading.Lock()
+_engine = None
+_pool = None  # InferencePool when INFERENCE_WORKERS > 0 (see vision/pool.py)
 MODEL_PATH = Path(__file__).resolve().parents[2] / "yolov8n.pt"
 
+# Batched inference needs a dynamic batch axis; a static export only accepts one frame
+EXPORT_DYNAMIC = DETECTION_BATCH_SIZE > 1
+
+# Where each exported backend lives; the input size and batch axis are part of the name since both are baked in
+_EXPORT_STEM = f"{MODEL_PATH.stem}_{DETECTOR_IMGSZ}_{'dynamic' if EXPORT_DYNAMIC else 'static'}"
+EXPORT_PATHS = {
+    "onnx": MODEL_PATH.parent / f"{_EXPORT_STEM}.onnx",
+    "openvino": MODEL_PATH.parent / f"{_EXPORT_STEM}_openvino_model",
+}
+
+def _yolo(*args, **kwargs):
+    # Imported on first use: ultralytics (and torch) take seconds to import
+    from ultralytics import YOLO
+    return YOLO(*args, **kwargs)
+
+_threads = DETECTOR_THREADS  # intra-op threads of this process (0 = library default)
+
+def _set_thread_count(threads: int = DETECTOR_THREADS):
+    """Threads for the model loaded next (PyTorch now, exported backends in their session options)."""
+    global _threads
+    if threads <= 0:
+        return
+    _threads = threads
+    import torch
+    torch.set_num_threads(threads)
+
+def _setup_backend(model):
+    """
+    Creates the backend session ultralytics opens on the first predict(),
+    so its thread settings can be replaced before any frame is served.
+    """
+    model.predict(np.zeros((DETECTOR_IMGSZ, DETECTOR_IMGSZ, 3), dtype=np.uint8), imgsz=DETECTOR_IMGSZ, verbose=False)
+    return model.predictor.model
+
+def export_model(fmt: str) -> Path:
+    """Exports the PyTorch weights to `fmt` (once) and returns the exported model path."""
+    target = EXPORT_PATHS[fmt]
+    if not target.exists():
+        print(f"--> EXPORTING YOLO MODEL to {fmt} (imgsz={DETECTOR_IMGSZ}, dynamic={EXPORT_DYNAMIC})...")
+        exported = _yolo(str(MODEL_PATH)).export(format=fmt, imgsz=DETECTOR_IMGSZ, dynamic=EXPORT_DYNAMIC)
+        Path(exported).rename(target)
+    return target
+
+def _load_torch():
+    return _yolo(str(MODEL_PATH))
+
+def _load_onnx():
+    path = export_model("onnx")
+    model = _yolo(str(path), task="detect")
+    if _threads > 0:
+        # ONNX Runtime sizes its own thread pool (OMP_NUM_THREADS is not read): reopen the session with it
+        import onnxruntime
+        backend = _setup_backend(model)
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = _threads
+        options.inter_op_num_threads = 1
+        backend.session = onnxruntime.InferenceSession(
+            str(path), sess_options=options, providers=backend.session.get_providers()
+        )
+    return model
+
+def _load_openvino():
+    path = export_model("openvino")
+    model = _yolo(str(path), task="detect")
+    if _threads > 0:
+        # Same for OpenVINO: recompile the model with an explicit thread count
+        import openvino as ov
+        backend = _setup_backend(model)
+        backend.ov_compiled_model = ov.Core().compile_model(
+            str(next(path.glob("*.xml"))),
+            device_name="CPU",
+            config={
+                "INFERENCE_NUM_THREADS": _threads,
+                "PERFORMANCE_HINT": "THROUGHPUT" if EXPORT_DYNAMIC else "LATENCY",
+            },
+        )
+    return model
+
+DETECTOR_BACKENDS = {
+    "torch": _load_torch,
+    "onnx": _load_onnx,
+    "openvino": _load_openvino,
+}
+
 def get_model():
     global _model
-    if _model is None:
-        print("--> LOADING YOLO MODEL (This happens once)...")
-        _model = YOLO(str(MODEL_PATH))
+    if _model is not None:
+        return _model
+    with _model_lock:
+        if _model is None:
+            if DETECTOR_BACKEND not in DETECTOR_BACKENDS:
+                raise ValueError(f"Unknown DETECTOR_BACKEND '{DETECTOR_BACKEND}', expected one of {list(DETECTOR_BACKENDS)}")
+            print(f"--> LOADING YOLO MODEL ({DETECTOR_BACKEND}, this happens once)...")
+            _set_thread_count()
+            _model = DETECTOR_BACKENDS[DETECTOR_BACKEND]()
     return _model
 
-def detect_objects(frame: np.ndarray) -> List[Detection]:
-    print(f"--> RUNNING DETECTION on frame of shape: {frame.shape}")
-    
+def warmup_model(runs: int = DETECTOR_WARMUP_RUNS):
+    """Loads the model and runs a few dummy inferences so the first real frame is not slow."""
     model = get_model()
-    
-    # Run Inference (Lowered conf to 0.25 to catch more objects)
-    results = model.predict(frame, conf=0.25, verbose=False)
-    result = results[0]
-    
-    structured_detections: List[Detection] = []
+    dummy = np.zeros((DETECTOR_IMGSZ, DETECTOR_IMGSZ, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    with _predict_lock:
+        for _ in range(runs):
+            model.predict(dummy, imgsz=DETECTOR_IMGSZ, verbose=False)
+    print(f"--> YOLO WARM-UP done ({runs} runs, {(time.perf_counter() - start) * 1000:.0f} ms)")
+
+# Where a region-of-interest crop sits in its frame: (x offset, y offset, frame width, frame height)
+Placement = Tuple[int, int, int, int]
+
+def _postprocess(result, frame: np.ndarray, names, placement: Optional[Placement] = None) -> List[Detection]:
     frame_height, frame_width = frame.shape[:2]
+    boxes = result.boxes
+    if len(boxes) == 0:
+        print("    No objects detected.")
+        return []
 
-    # Process Boxes
-    for box in result.boxes:
-        x_min, y_min, x_max, y_max = box.xyxy[0].cpu().numpy()
-        confidence = float(box.conf[0].cpu().numpy())
-        class_id = int(box.cls[0].cpu().numpy())
-        label = model.names[class_id]
-
-        print(f"    FOUND: {label} ({confidence:.2f})")
-
-        # Geometry Logic
-        box_width = x_max - x_min
-        box_height = y_max - y_min
-        x_center_norm = (x_min + (box_width / 2)) / frame_width
-        y_center_norm = (y_min + (box_height / 2)) / frame_height
-        
-        det = Detection(
-            label=label,
-            box=BoundingBox(int(x_min), int(y_min), int(x_max), int(y_max)),
+    # One bulk transfer per tensor instead of per-box .cpu().numpy() calls
+    xyxy = boxes.xyxy.cpu().numpy()
+    if placement is not None:
+        # Crop detections: back to full-frame pixels, geometry relative to the full frame
+        x_offset, y_offset, frame_width, frame_height = placement
+        xyxy = xyxy + np.array([x_offset, y_offset, x_offset, y_offset], dtype=xyxy.dtype)
+    confidences = boxes.conf.cpu().numpy().tolist()
+    class_ids = boxes.cls.cpu().numpy().astype(int).tolist()
+
+    # Geometry Logic (vectorized over all boxes)
+    box_widths_norm = (xyxy[:, 2] - xyxy[:, 0]) / frame_width
+    box_heights_norm = (xyxy[:, 3] - xyxy[:, 1]) / frame_height
+    x_centers_norm = (xyxy[:, 0] + xyxy[:, 2]) / (2 * frame_width)
+    y_centers_norm = (xyxy[:, 1] + xyxy[:, 3]) / (2 * frame_height)
+    directions = relative_directions(x_centers_norm, y_centers_norm)
+    distances = distance_estimates(box_widths_norm, box_heights_norm)
+    corners = xyxy.astype(int).tolist()
+
+    structured_detections = [
+        Detection(
+            label=names[class_id],
+            box=BoundingBox(*corner),
             confidence=confidence,
-            relative_direction=calculate_relative_direction(x_center_norm, y_center_norm),
-            distance_estimate=estimate_distance_simple(box_width / frame_width, box_height / frame_height)
+            relative_direction=direction,
+            distance_estimate=distance,
+            x_center_norm=x_center,
+            y_center_norm=y_center,
         )
-        structured_detections.append(det)
-
-    if not structured_detections:
-        print("    No objects detected.")
+        for class_id, corner, confidence, direction, distance, x_center, y_center
+        in zip(class_ids, corners, confidences, directions, distances, x_centers_norm.tolist(), y_centers_norm.tolist())
+    ]
+    print("    FOUND: " + ", ".join(f"{d.label} ({d.confidence:.2f})" for d in structured_detections))
 
     return structured_detections
+
+def detect_batch(
+    frames: List[np.ndarray],
+    classes: Optional[Sequence[int]] = None,
+    placements: Optional[List[Optional[Placement]]] = None,
+) -> List[List[Detection]]:
+    """
+    Runs one batched predict over several frames and returns detections per frame.
+    `classes` restricts the detector to those class ids; frames that are crops carry
+    a placement so their boxes come back in full-frame coordinates.
+    """
+    model = get_model()
+    placements = placements or [None] * len(frames)
+
+    # Run Inference (Lowered conf to 0.25 to catch more objects)
+    with _predict_lock, timed("inference"):
+        results = model.predict(
+            frames, conf=0.25, imgsz=DETECTOR_IMGSZ, classes=list(classes) if classes else None, verbose=False
+        )
+    registry.observe("inference_batch_size", len(frames))
+
+    with timed("postprocess"):
+        return [
+            _postprocess(result, frame, model.names, placement)
+            for result, frame, placement in zip(results, frames, placements)
+        ]
+
+
+class BatchInferenceEngine:
+    """
+    Collects frames from concurrent requests and runs them through the model together.
+
+    A batch is dispatched once it holds `max_batch_size` frames or the oldest frame has
+    waited `max_wait_ms`, whichever comes first. Each caller gets its own detections,
+    plus the batch's stage timings (inference, postprocess) for its Server-Timing header.
+    Frames with different class filters go through separate predict calls.
+    """
+
+    def __init__(self, max_batch_size: int = 4, max_wait_ms: float = 5.0, history: int = 256):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        # (batch size, inference ms) of recent batches
+        self._batches = deque(maxlen=history)
+        self.total_batches = 0
+        self.total_frames = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="batch-inference", daemon=True)
+                self._thread.start()
+
+    def submit(
+        self, frame: np.ndarray, classes: Optional[Sequence[int]] = None, placement: Optional[Placement] = None
+    ) -> "Future[Tuple[List[Detection], StageTimings]]":
+        self.start()
+        future: "Future[Tuple[List[Detection], StageTimings]]" = Future()
+        self._queue.put((frame, tuple(classes) if classes else None, placement, future))
+        return future
+
+    def detect(
+        self, frame: np.ndarray, classes: Optional[Sequence[int]] = None, placement: Optional[Placement] = None
+    ) -> List[Detection]:
+        detections, timings = self.submit(frame, classes, placement).result()
+        add_request_timings(timings)
+        return detections
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # predict() takes one class filter per call, so group the batch by it
+            groups = {}
+            for item in self._collect():
+                groups.setdefault(item[1], []).append(item)
+            for classes, batch in groups.items():
+                self._run_batch(classes, batch)
+
+    def _run_batch(self, classes: Optional[Tuple[int, ...]], batch: List[tuple]):
+        frames = [frame for frame, _, _, _ in batch]
+        placements = [placement for _, _, placement, _ in batch]
+        start = time.perf_counter()
+        try:
+            with capture_timings() as timings:
+                results = detect_batch(frames, classes, placements)
+        except Exception as e:
+            logger.error(f"Batched inference failed: {e}")
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        with self._lock:
+            self._batches.append((len(batch), elapsed_ms))
+            self.total_batches += 1
+            self.total_frames += len(batch)
+        for (*_, future), detections in zip(batch, results):
+            future.set_result((detections, timings))
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = list(self._batches)
+            total_batches, total_frames = self.total_batches, self.total_frames
+        sizes = [size for size, _ in recent]
+        times = [ms for _, ms in recent]
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "total_batches": total_batches,
+            "total_frames": total_frames,
+            "avg_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "avg_batch_ms": round(sum(times) / len(times), 2) if times else 0.0,
+            "last_batch": {"size": sizes[-1], "ms": round(times[-1], 2)} if recent else None,
+        }
+
+
+def set_inference_pool(pool):
+    """Routes detect_objects() to a started InferencePool (None goes back to in-process inference)."""
+    global _pool
+    _pool = pool
+
+def get_engine() -> BatchInferenceEngine:
+    global _engine
+    if _engine is None:
+        _engine = BatchInferenceEngine(DETECTION_BATCH_SIZE, DETECTION_BATCH_WAIT_MS)
+    return _engine
+
+def detect_objects(
+    frame: np.ndarray,
+    classes: Optional[Sequence[int]] = None,
+    region: Optional[Tuple[int, int, int, int]] = None,
+    affinity: Optional[str] = None,
+) -> List[Detection]:
+    """
+    Detects objects in the frame, optionally only `classes` and only inside `region`
+    (x_min, y_min, x_max, y_max). A region is cropped and run at the full detector
+    input size, so small objects in it are seen at a higher resolution.
+    Boxes are always in full-frame pixels. With inference workers, `affinity` (the
+    session id) picks the worker, so one session's frames stay on one process.
+    """
+    placement = None
+    if region is not None:
+        x_min, y_min, x_max, y_max = region
+        placement = (x_min, y_min, frame.shape[1], frame.shape[0])
+        frame = frame[y_min:y_max, x_min:x_max]
+    print(f"--> RUNNING DETECTION on frame of shape: {frame.shape}")
+
+    if _pool is not None:
+        return _pool.detect(frame, classes, placement, affinity)
+    if DETECTION_BATCH_SIZE > 1:
+        return get_engine().detect(frame, classes, placement)
+    return detect_batch([frame], classes, [placement])[0]
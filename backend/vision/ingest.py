@@ -0,0 +1,77 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..config import DETECTOR_IMGSZ, INGEST_REDUCED_DECODE, ANNOTATED_JPEG_QUALITY
+
+# libjpeg can decode directly at 1/2, 1/4 or 1/8 scale, which is much cheaper than a
+# full-resolution decode followed by a resize.
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+# Start-of-frame markers carry the image size (C4, C8 and CC are other segment types)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """Reads (width, height) from a JPEG header without decoding. None if not a JPEG."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    i, n = 2, len(data)
+    while i + 9 < n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # markers without a length
+            i += 2
+            continue
+        if marker in _SOF_MARKERS:
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return width, height
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+
+def choose_reduction(width: int, height: int, target_size: int) -> int:
+    """Largest decode reduction (1, 2, 4 or 8) that keeps the long side >= target_size."""
+    long_side = max(width, height)
+    for factor in (8, 4, 2):
+        if long_side // factor >= target_size:
+            return factor
+    return 1
+
+
+def load_image_from_bytes(image_bytes: bytes, target_size: int = DETECTOR_IMGSZ) -> Tuple[Optional[np.ndarray], int]:
+    """
+    Decodes an uploaded image, at reduced scale when it is much larger than the model input.
+    Returns (frame, factor) where upload pixel coordinates = frame coordinates * factor.
+    The frame is None if the bytes could not be decoded.
+    """
+    # np.frombuffer wraps the upload bytes without copying them
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    factor = 1
+    if INGEST_REDUCED_DECODE:
+        dims = jpeg_dimensions(image_bytes)
+        if dims is not None:
+            factor = choose_reduction(*dims, target_size)
+    return cv2.imdecode(nparr, _REDUCED_FLAGS[factor]), factor
+
+
+def encode_jpeg(frame: np.ndarray, quality: int = ANNOTATED_JPEG_QUALITY, scale: float = 1.0) -> Optional[bytes]:
+    """JPEG-encodes a frame, optionally downscaled by `scale` (0 < scale <= 1)."""
+    if scale < 1.0:
+        height, width = frame.shape[:2]
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    success, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not success:
+        return None
+    return buffer.tobytes()
@@ -0,0 +1,345 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import zlib
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import DETECTION_BATCH_SIZE, DETECTOR_THREADS
+from ..core.models import Detection
+from ..utils.metrics import StageTimings, add_request_timings, capture_timings, registry
+from . import detection
+from .detection import Placement, detect_batch, export_model, get_model, warmup_model
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBusyError(RuntimeError):
+    """Every frame slot of the worker serving this session is in use (HTTP 429)."""
+
+
+class InferenceUnavailableError(RuntimeError):
+    """No inference worker could serve the frame in time (HTTP 503)."""
+
+
+@dataclass
+class _Worker:
+    index: int
+    process: multiprocessing.Process
+    requests: "multiprocessing.Queue"
+    slots: List[shared_memory.SharedMemory]
+    free_slots: "queue.Queue[int]"
+    alive: bool = True
+    frames: int = 0
+    pending: Dict[int, Tuple[int, Future]] = field(default_factory=dict)  # request id -> (slot, future)
+
+
+def _read_frame(slots: List[shared_memory.SharedMemory], request: tuple) -> np.ndarray:
+    _, slot, shape, dtype, inline, _, _ = request
+    if inline is not None:
+        return inline
+    return np.ndarray(shape, dtype=dtype, buffer=slots[slot].buf)
+
+
+def _worker_main(index: int, slots, requests, results, threads: int, max_batch: int):
+    """Inference worker: reads frames from its shared-memory slots and returns detections."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles Ctrl+C and stops the pool
+    if DETECTOR_THREADS <= 0:
+        detection._set_thread_count(threads)
+    warmup_model()
+    results.put(("ready", index, None, []))
+
+    while True:
+        batch = [requests.get()]
+        while len(batch) < max_batch and batch[-1] is not None:
+            try:
+                batch.append(requests.get_nowait())
+            except queue.Empty:
+                break
+        stop = batch[-1] is None
+        # predict() takes one class filter per call, so group the batch by it
+        groups: Dict[Optional[tuple], List[tuple]] = {}
+        for request in batch:
+            if request is not None:
+                groups.setdefault(request[5], []).append(request)
+        for classes, group in groups.items():
+            try:
+                frames = [_read_frame(slots, request) for request in group]
+                with capture_timings() as timings:
+                    detections = detect_batch(frames, classes, [request[6] for request in group])
+            except Exception as e:
+                for request in group:
+                    results.put((request[0], None, f"{type(e).__name__}: {e}", []))
+                continue
+            for request, frame_detections in zip(group, detections):
+                results.put((request[0], frame_detections, None, timings))
+        if stop:
+            break
+
+
+class InferencePool:
+    """
+    Runs the detector in `num_workers` worker processes, so inference and
+    post-processing use several cores instead of sharing the API process's GIL.
+
+    With `start_method="spawn"` (the default) each worker loads its own copy of the model;
+    this is safe even when the pool starts from a background thread while requests are
+    served (LAZY_STARTUP). With "fork" the PyTorch model is loaded once before forking and
+    its weights are shared copy-on-write, which saves memory, but it is only safe while no
+    other thread can hold a lock, i.e. before the server takes traffic. Exported backends
+    are exported once by the parent either way. Every worker owns
+    `queue_depth` shared-memory frame slots: the API process copies a decoded frame into
+    a free slot and sends only its shape, so frames are never pickled. A session is always
+    served by the same worker (hash of its id), which keeps its frames in order. When that
+    worker has no free slot the frame is rejected with InferenceBusyError instead of queuing.
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        queue_depth: int = 2,
+        slot_bytes: int = 6 * 1024 * 1024,
+        timeout_s: float = 10.0,
+        max_batch: int = DETECTION_BATCH_SIZE,
+        start_method: str = "spawn",
+    ):
+        if start_method not in ("spawn", "fork"):
+            raise ValueError(f"Unknown start method '{start_method}', expected 'spawn' or 'fork'")
+        self.num_workers = num_workers
+        self.start_method = start_method
+        self.queue_depth = max(1, queue_depth)
+        self.slot_bytes = slot_bytes
+        self.timeout_s = timeout_s
+        self.max_batch = max(1, max_batch)
+        self._workers: List[_Worker] = []
+        self._results = None
+        self._collector: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._round_robin = itertools.count()
+        self._ready = 0
+        self._ready_event = threading.Event()
+        self._stopping = False
+        self.rejected = 0
+        self.inline_frames = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers) and not self._stopping
+
+    def start(self, ready_timeout_s: float = 300.0):
+        """Starts the workers and waits until each has loaded and warmed up the model."""
+        if self._workers:
+            return
+        if self.start_method not in multiprocessing.get_all_start_methods():
+            raise RuntimeError(f"The '{self.start_method}' start method is not available on this platform.")
+        if detection.DETECTOR_BACKEND != "torch":
+            export_model(detection.DETECTOR_BACKEND)  # once, not concurrently in every worker
+        elif self.start_method == "fork":
+            get_model()  # loaded once; forked workers share the weights copy-on-write
+
+        context = multiprocessing.get_context(self.start_method)
+        self._results = context.Queue()
+        threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+        print(f"--> STARTING {self.num_workers} INFERENCE WORKERS ({threads} threads each)...")
+        for index in range(self.num_workers):
+            slots = [shared_memory.SharedMemory(create=True, size=self.slot_bytes) for _ in range(self.queue_depth)]
+            requests = context.Queue()
+            process = context.Process(
+                target=_worker_main,
+                args=(index, slots, requests, self._results, threads, self.max_batch),
+                name=f"inference-{index}",
+                daemon=True,
+            )
+            process.start()
+            free_slots: "queue.Queue[int]" = queue.Queue()
+            for slot in range(self.queue_depth):
+                free_slots.put(slot)
+            self._workers.append(_Worker(index, process, requests, slots, free_slots))
+
+        self._collector = threading.Thread(target=self._collect, name="inference-results", daemon=True)
+        self._collector.start()
+        deadline = time.monotonic() + ready_timeout_s
+        while not self._ready_event.wait(0.5):
+            failed = [w.index for w in self._workers if not w.process.is_alive()]
+            if failed or time.monotonic() > deadline:
+                self.stop()
+                reason = f"worker {failed[0]} exited" if failed else "timed out"
+                raise RuntimeError(f"Inference workers did not start ({reason}).")
+        detection.set_inference_pool(self)
+        print("--> INFERENCE WORKERS ready")
+
+    def stop(self):
+        if not self._workers:
+            return
+        self._stopping = True
+        detection.set_inference_pool(None)
+        for worker in self._workers:
+            if worker.alive:
+                worker.requests.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            self._fail_pending(worker, InferenceUnavailableError("Inference pool is shutting down."))
+            for slot in worker.slots:
+                slot.close()
+                slot.unlink()
+        self._workers = []
+
+    def _pick_worker(self, affinity: Optional[str]) -> _Worker:
+        """The session's worker, or the next live one if it has died."""
+        count = len(self._workers)
+        if not count or self._stopping:
+            raise InferenceUnavailableError("Inference workers are not running.")
+        start = zlib.crc32(affinity.encode("utf-8")) if affinity else next(self._round_robin)
+        for offset in range(count):
+            worker = self._workers[(start + offset) % count]
+            if worker.alive:
+                return worker
+        raise InferenceUnavailableError("All inference workers have stopped.")
+
+    def submit(
+        self,
+        frame: np.ndarray,
+        classes: Optional[Sequence[int]] = None,
+        placement: Optional[Placement] = None,
+        affinity: Optional[str] = None,
+    ) -> "Future[Tuple[List[Detection], StageTimings]]":
+        return self._submit(frame, classes, placement, affinity)[2]
+
+    def _submit(self, frame, classes, placement, affinity) -> Tuple[_Worker, int, Future]:
+        worker = self._pick_worker(affinity)
+        try:
+            slot = worker.free_slots.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.rejected += 1
+            registry.inc("inference_rejected_total")
+            raise InferenceBusyError(f"Inference worker {worker.index} is busy.")
+
+        inline = None
+        if frame.nbytes <= self.slot_bytes:
+            np.ndarray(frame.shape, dtype=frame.dtype, buffer=worker.slots[slot].buf)[...] = frame
+        else:
+            inline = np.ascontiguousarray(frame)  # larger than a slot: pickled through the queue
+            with self._lock:
+                self.inline_frames += 1
+
+        request_id = next(self._ids)
+        future: "Future[Tuple[List[Detection], StageTimings]]" = Future()
+        with self._lock:
+            worker.pending[request_id] = (slot, future)
+            worker.frames += 1
+        worker.requests.put((
+            request_id, slot, frame.shape, frame.dtype.str, inline,
+            tuple(classes) if classes else None, placement,
+        ))
+        return worker, request_id, future
+
+    def detect(
+        self,
+        frame: np.ndarray,
+        classes: Optional[Sequence[int]] = None,
+        placement: Optional[Placement] = None,
+        affinity: Optional[str] = None,
+    ) -> List[Detection]:
+        _, _, future = self._submit(frame, classes, placement, affinity)
+        try:
+            detections, timings = future.result(self.timeout_s)
+        except FutureTimeoutError:
+            # The worker still has the frame queued, so its slot stays reserved until the
+            # late result arrives (or the worker dies); _collect then frees it without a result
+            future.cancel()
+            registry.inc("inference_timeouts_total")
+            raise InferenceUnavailableError(f"Inference timed out after {self.timeout_s:.0f} s.")
+        add_request_timings(timings)  # the worker's inference/postprocess stages
+        return detections
+
+    def _collect(self):
+        """Resolves futures from worker results and notices workers that died."""
+        while self._workers and not self._stopping:
+            # Checked on every iteration: under load the queue is never idle
+            self._check_workers()
+            try:
+                request_id, detections, error, timings = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            if request_id == "ready":
+                self._ready += 1
+                if self._ready == self.num_workers:
+                    self._ready_event.set()
+                continue
+            entry = None
+            with self._lock:
+                for worker in self._workers:
+                    entry = worker.pending.pop(request_id, None)
+                    if entry is not None:
+                        break
+            if entry is None:
+                continue
+            slot, future = entry
+            worker.free_slots.put(slot)
+            if future.cancelled():
+                continue  # timed out in detect()
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                # Stages timed in the worker process are not in this process's registry
+                for stage, seconds in timings:
+                    registry.observe("stage_duration_seconds", seconds, stage=stage)
+                future.set_result((detections, timings))
+
+    def _check_workers(self):
+        for worker in self._workers:
+            if worker.alive and not worker.process.is_alive():
+                worker.alive = False
+                logger.error(f"Inference worker {worker.index} exited with code {worker.process.exitcode}.")
+                self._fail_pending(worker, InferenceUnavailableError(f"Inference worker {worker.index} stopped."))
+
+    def _fail_pending(self, worker: _Worker, error: Exception):
+        with self._lock:
+            pending, worker.pending = worker.pending, {}
+        for _, future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self) -> dict:
+        with self._lock:
+            workers = [
+                {
+                    "index": worker.index,
+                    "alive": worker.alive,
+                    "in_flight": len(worker.pending),
+                    "frames": worker.frames,
+                }
+                for worker in self._workers
+            ]
+            return {
+                "workers": workers,
+                "queue_depth": self.queue_depth,
+                "slot_bytes": self.slot_bytes,
+                "rejected": self.rejected,
+                "inline_frames": self.inline_frames,
+            }
+
+    @property
+    def healthy(self) -> bool:
+        """False once any worker has died (its sessions are served by the others)."""
+        return self.running and all(worker.alive for worker in self._workers)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(len(worker.pending) for worker in self._workers)
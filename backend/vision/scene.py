@@ -0,0 +1,50 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class SceneChangeDetector:
+    """
+    Tells whether a frame differs enough from the last processed one to be worth
+    running detection on. Frames are reduced to a small grayscale thumbnail (area
+    averaging also removes sensor noise) and compared by mean absolute difference
+    on the 0-255 scale. At most `max_skips` frames in a row are skipped, so cached
+    results are refreshed even if the scene looks static.
+    """
+
+    def __init__(self, threshold: float = 4.0, max_skips: int = 10, thumb_size: Tuple[int, int] = (32, 24)):
+        self.threshold = threshold
+        self.max_skips = max_skips
+        self.thumb_size = thumb_size
+        self._reference: Optional[np.ndarray] = None
+        self._frame_shape: Optional[Tuple[int, ...]] = None
+        self.skipped = 0
+        self.last_difference: Optional[float] = None
+
+    def thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        small = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def should_process(self, frame: np.ndarray) -> bool:
+        """
+        True if the frame must go through the pipeline; it then becomes the new reference.
+        False means the caller can reuse the results of the last processed frame.
+        """
+        thumb = self.thumbnail(frame)
+        if self._reference is not None and frame.shape[:2] == self._frame_shape and self.skipped < self.max_skips:
+            self.last_difference = float(cv2.absdiff(thumb, self._reference).mean())
+            if self.last_difference < self.threshold:
+                self.skipped += 1
+                return False
+        self._reference = thumb
+        self._frame_shape = frame.shape[:2]
+        self.skipped = 0
+        return True
+
+    def reset(self):
+        """Forces the next frame to be processed (e.g. after the target changed)."""
+        self._reference = None
+        self.skipped = 0
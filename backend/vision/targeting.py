@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Tuple
+
+from ..core.models import Detection
+from .classes import COCO_CLASSES, OBSTACLE_CLASSES, class_ids_for, resolve_class_name
+
+
+@dataclass
+class DetectionPlan:
+    """How one detection pass runs: which class ids (None = all) over which region (None = whole frame)."""
+    classes: Optional[List[int]] = None
+    region: Optional[Tuple[int, int, int, int]] = None
+
+    @property
+    def labels(self) -> Optional[FrozenSet[str]]:
+        """Labels this pass can report (None = any)."""
+        if self.classes is None:
+            return None
+        return frozenset(COCO_CLASSES[i] for i in self.classes)
+
+    @property
+    def full_scan(self) -> bool:
+        return self.classes is None and self.region is None
+
+
+class DetectionPlanner:
+    """
+    Target-aware detection for one session. While the whole target phrase names a
+    detector class ("cup", "my mug"; not "car keys"), passes only look for that class
+    plus obstacle classes, and once the target has been seen only inside a region of
+    interest around its last box. Other targets always get full-frame scans.
+    Every `full_scan_interval`-th pass scans the whole frame for all classes, so new
+    obstacles and context objects are still picked up.
+    """
+
+    def __init__(
+        self,
+        full_scan_interval: int = 5,
+        class_filter: bool = True,
+        roi: bool = True,
+        roi_margin: float = 1.0,
+        roi_min_fraction: float = 0.35,
+    ):
+        self.full_scan_interval = max(1, full_scan_interval)
+        self.class_filter = class_filter
+        self.roi = roi
+        self.roi_margin = roi_margin
+        self.roi_min_fraction = roi_min_fraction
+        self._passes_since_full_scan: Optional[int] = None
+
+    def reset(self):
+        """Makes the next pass a full scan (e.g. after the target changed)."""
+        self._passes_since_full_scan = None
+
+    def plan(self, target_name: Optional[str], frame_shape: Tuple[int, ...], last_detections: List[Detection]) -> DetectionPlan:
+        # Only when the whole phrase is a class: "car keys" must not narrow the search to cars
+        target_class = resolve_class_name(target_name or "")
+        target_labels = [target_class] if target_class else []
+        due = self._passes_since_full_scan is None or self._passes_since_full_scan + 1 >= self.full_scan_interval
+        if not target_labels or due or not (self.class_filter or self.roi):
+            self._passes_since_full_scan = 0
+            return DetectionPlan()
+        self._passes_since_full_scan += 1
+
+        classes = class_ids_for(set(target_labels) | set(OBSTACLE_CLASSES)) if self.class_filter else None
+        region = self._region(target_labels, frame_shape, last_detections) if self.roi else None
+        return DetectionPlan(classes=classes, region=region)
+
+    def _region(self, target_labels: List[str], frame_shape: Tuple[int, ...], last_detections: List[Detection]):
+        """Crop around the most confident last box of the target, or None if it was not seen."""
+        targets = [d for d in last_detections if d.label in target_labels]
+        if not targets:
+            return None
+        box = max(targets, key=lambda d: d.confidence).box
+        frame_height, frame_width = frame_shape[:2]
+        width = max((box.x_max - box.x_min) * (1 + 2 * self.roi_margin), self.roi_min_fraction * frame_width)
+        height = max((box.y_max - box.y_min) * (1 + 2 * self.roi_margin), self.roi_min_fraction * frame_height)
+        x_center, y_center = (box.x_min + box.x_max) / 2, (box.y_min + box.y_max) / 2
+        x_min = int(max(0, min(x_center - width / 2, frame_width - width)))
+        y_min = int(max(0, min(y_center - height / 2, frame_height - height)))
+        x_max = int(min(frame_width, x_min + width))
+        y_max = int(min(frame_height, y_min + height))
+        if (x_max - x_min) * (y_max - y_min) >= 0.8 * frame_width * frame_height:
+            return None  # barely smaller than the frame: not worth a crop
+        return (x_min, y_min, x_max, y_max)
@@ -0,0 +1,207 @@
+import itertools
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.models import Detection, BoundingBox
+from ..utils.geometry import relative_directions, distance_estimates
+
+
+@dataclass
+class Track:
+    track_id: int
+    label: str
+    box: np.ndarray       # smoothed [x_min, y_min, x_max, y_max] in pixels
+    velocity: np.ndarray  # pixels per frame for each box coordinate
+    confidence: float
+    hits: int = 1
+    misses: int = 0       # detection passes in a row without a match
+    frames_since_update: int = 0
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between two (N, 4) and (M, 4) arrays of xyxy boxes."""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)))
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+class ObjectTracker:
+    """
+    Lightweight IoU tracker (SORT-style, greedy matching, alpha-beta motion model).
+
+    Full detection only runs every `detect_interval` frames, or sooner when the tracked
+    confidence decays below `min_confidence`. In between, predict() moves each track
+    along its estimated velocity, so the caller can skip the detector for that frame.
+    """
+
+    def __init__(
+        self,
+        detect_interval: int = 3,
+        iou_threshold: float = 0.3,
+        max_misses: int = 2,
+        min_confidence: float = 0.35,
+        confidence_decay: float = 0.9,
+        alpha: float = 0.6,
+        beta: float = 0.2,
+    ):
+        self.detect_interval = max(1, detect_interval)
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.min_confidence = min_confidence
+        self.confidence_decay = confidence_decay
+        self.alpha = alpha
+        self.beta = beta
+        self.tracks: List[Track] = []
+        self.frames_since_detect = 0
+        self._frame_shape: Optional[Tuple[int, int]] = None
+        self._ids = itertools.count(1)
+
+    def reset(self):
+        self.tracks = []
+        self.frames_since_detect = 0
+        self._frame_shape = None
+
+    def should_detect(self, frame_shape: Tuple[int, ...]) -> bool:
+        """True if this frame needs a full detection pass."""
+        if self.detect_interval == 1 or not self.tracks:
+            return True
+        if tuple(frame_shape[:2]) != self._frame_shape:
+            return True
+        if self.frames_since_detect + 1 >= self.detect_interval:
+            return True
+        visible = [t for t in self.tracks if t.misses == 0]
+        if not visible:
+            return True
+        return min(t.confidence for t in visible) < self.min_confidence
+
+    def update(
+        self,
+        detections: List[Detection],
+        frame_shape: Tuple[int, ...],
+        region: Optional[Tuple[int, int, int, int]] = None,
+        labels: Optional[FrozenSet[str]] = None,
+    ) -> List[Detection]:
+        """
+        Feeds a detection pass; returns the detections with track ids and smoothed boxes.
+        For a partial pass, `region` (xyxy pixels) and `labels` say what the detector looked
+        at: tracks it could not have seen are carried forward instead of counted as missed.
+        """
+        if tuple(frame_shape[:2]) != self._frame_shape:
+            self.reset()
+            self._frame_shape = tuple(frame_shape[:2])
+
+        # Advance every track to the current frame before matching
+        for track in self.tracks:
+            track.frames_since_update += 1
+        predicted = np.array([t.box + t.velocity * t.frames_since_update for t in self.tracks]).reshape(-1, 4)
+        det_boxes = np.array(
+            [[d.box.x_min, d.box.y_min, d.box.x_max, d.box.y_max] for d in detections], dtype=float
+        ).reshape(-1, 4)
+
+        # Greedy matching by IoU, only between detections and tracks of the same label
+        ious = iou_matrix(predicted, det_boxes)
+        for i, track in enumerate(self.tracks):
+            for j, det in enumerate(detections):
+                if track.label != det.label:
+                    ious[i, j] = 0.0
+        matched_tracks, matched_dets = set(), {}
+        for flat in np.argsort(-ious, axis=None):
+            i, j = np.unravel_index(flat, ious.shape)
+            if ious[i, j] < self.iou_threshold:
+                break
+            if i in matched_tracks or j in matched_dets:
+                continue
+            matched_tracks.add(i)
+            matched_dets[j] = i
+
+        for j, det in enumerate(detections):
+            if j in matched_dets:
+                track = self.tracks[matched_dets[j]]
+                steps = track.frames_since_update
+                residual = det_boxes[j] - predicted[matched_dets[j]]
+                track.box = predicted[matched_dets[j]] + self.alpha * residual
+                track.velocity = track.velocity + self.beta * residual / steps
+                track.confidence = det.confidence
+                track.hits += 1
+                track.misses = 0
+                track.frames_since_update = 0
+            else:
+                self.tracks.append(Track(
+                    track_id=next(self._ids),
+                    label=det.label,
+                    box=det_boxes[j].copy(),
+                    velocity=np.zeros(4),
+                    confidence=det.confidence,
+                ))
+
+        for i, track in enumerate(self.tracks[:len(predicted)]):
+            if i not in matched_tracks and self._was_searched(track, predicted[i], region, labels):
+                track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+        self.frames_since_detect = 0
+
+        # Matched tracks are at their updated box; tracks outside the pass are projected
+        return self._to_detections([t for t in self.tracks if t.misses == 0], project=True)
+
+    @staticmethod
+    def _was_searched(track: Track, box: np.ndarray, region, labels) -> bool:
+        """True if a detection pass over `region` for `labels` could have found the track."""
+        if labels is not None and track.label not in labels:
+            return False
+        if region is not None:
+            x_center, y_center = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+            x_min, y_min, x_max, y_max = region
+            return x_min <= x_center < x_max and y_min <= y_center < y_max
+        return True
+
+    def predict(self, frame_shape: Tuple[int, ...]) -> List[Detection]:
+        """Propagates visible tracks one frame forward without running the detector."""
+        self.frames_since_detect += 1
+        visible = [t for t in self.tracks if t.misses == 0]
+        for track in self.tracks:
+            track.frames_since_update += 1
+        for track in visible:
+            track.confidence *= self.confidence_decay
+        return self._to_detections(visible, project=True)
+
+    def _to_detections(self, tracks: List[Track], project: bool) -> List[Detection]:
+        if not tracks or self._frame_shape is None:
+            return []
+        frame_height, frame_width = self._frame_shape
+        boxes = np.array([
+            t.box + t.velocity * t.frames_since_update if project else t.box for t in tracks
+        ])
+        boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, frame_width - 1)
+        boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, frame_height - 1)
+
+        x_centers = (boxes[:, 0] + boxes[:, 2]) / (2 * frame_width)
+        y_centers = (boxes[:, 1] + boxes[:, 3]) / (2 * frame_height)
+        directions = relative_directions(x_centers, y_centers)
+        distances = distance_estimates(
+            (boxes[:, 2] - boxes[:, 0]) / frame_width,
+            (boxes[:, 3] - boxes[:, 1]) / frame_height,
+        )
+        return [
+            Detection(
+                label=track.label,
+                box=BoundingBox(*box),
+                confidence=track.confidence,
+                relative_direction=direction,
+                distance_estimate=distance,
+                track_id=track.track_id,
+                x_center_norm=x_center,
+                y_center_norm=y_center,
+            )
+            for track, box, direction, distance, x_center, y_center in zip(
+                tracks, boxes.astype(int).tolist(), directions, distances, x_centers.tolist(), y_centers.tolist()
+            )
+        ]
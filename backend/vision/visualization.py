@@ -2,11 +2,12 @@ import cv2
 import numpy as np
 from .detection import Detection
 
-def draw_detections_cv2(frame: np.ndarray, detections: list[Detection]) -> np.ndarray:
+def draw_detections_cv2(frame: np.ndarray, detections: list[Detection], in_place: bool = False) -> np.ndarray:
     """
     Uses OpenCV to draw bounding boxes and labels directly onto the image array.
+    With in_place=True the input frame is drawn on instead of a copy.
     """
-    annotated_frame = frame.copy()
+    annotated_frame = frame if in_place else frame.copy()
 
     for det in detections:
         x_min, y_min, x_max, y_max = det.box.x_min, det.box.y_min, det.box.x_max, det.box.y_max
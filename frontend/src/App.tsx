@@ -2,6 +2,12 @@ import React, { useState, useRef, useEffect } from 'react';
 import axios from 'axios';
 import './App.css';
 
+// Per-browser session so the backend keeps this user's target, tracker and anchors apart
+const SESSION_KEY = 'clearPathSessionId';
+const sessionId = localStorage.getItem(SESSION_KEY) ?? crypto.randomUUID();
+localStorage.setItem(SESSION_KEY, sessionId);
+axios.defaults.headers.common['X-Session-Id'] = sessionId;
+
 // Interfaces
 interface DetectionBox {
   label: string;
@@ -14,9 +20,11 @@ interface DetectionBox {
 interface ApiResponse {
   status: string;
   guidance_text: string;
+  guidance_age_s?: number | null;
   audio_path: string;
+  audio_ready?: boolean;
   target: string;
-  annotated_image: string; 
+  annotated_image?: string;
   detections?: DetectionBox[];
 }
 
@@ -26,6 +34,10 @@ function App() {
   const canvasRef = useRef<HTMLCanvasElement>(null);
   const mediaRecorderRef = useRef<MediaRecorder | null>(null);
   const audioChunksRef = useRef<Blob[]>([]);
+  const guidanceStreamRef = useRef<EventSource | null>(null);
+  const lastAudioRef = useRef<string>("");
+  const audioQueueRef = useRef<string[]>([]);
+  const audioPlayingRef = useRef(false);
   
   const [target, setTarget] = useState<string>("Initializing...");
   const [guidance, setGuidance] = useState<string>("Set a target to begin.");
@@ -162,6 +174,66 @@ function App() {
     }
   };
 
+  // Plays queued guidance audio one clip after another.
+  // Audio that is still being generated is retried until the file exists.
+  const playNextAudio = (attempts = 10) => {
+    const path = audioQueueRef.current.shift();
+    audioPlayingRef.current = !!path;
+    if (!path) return;
+    let finished = false;
+    const next = () => {
+      if (finished) return;
+      finished = true;
+      playNextAudio();
+    };
+    const tryPlay = (left: number) => {
+      const audio = new Audio(path);
+      audio.addEventListener('ended', next);
+      audio.addEventListener('error', () => {
+        if (left > 0) setTimeout(() => tryPlay(left - 1), 300);
+        else next();
+      });
+      audio.play().catch((err) => {
+        if (err.name === 'NotAllowedError') next(); // autoplay blocked: skip the clip
+      });
+    };
+    tryPlay(attempts);
+  };
+
+  // Speak each new guidance sentence once (audio is cached server-side by text).
+  const playGuidanceAudio = (path: string) => {
+    if (!path || path === lastAudioRef.current) return;
+    lastAudioRef.current = path;
+    audioQueueRef.current.push(path);
+    if (!audioPlayingRef.current) playNextAudio();
+  };
+
+  // Guidance streamed as the model writes it (server-sent events)
+  const streamGuidance = () => {
+    guidanceStreamRef.current?.close();
+    const source = new EventSource(`/api/guidance/stream?session_id=${encodeURIComponent(sessionId)}`);
+    guidanceStreamRef.current = source;
+    let text = "";
+    source.addEventListener('delta', (e) => {
+      text += JSON.parse((e as MessageEvent).data).text;
+      setGuidance(text);
+    });
+    const close = () => {
+      source.close();
+      if (guidanceStreamRef.current === source) guidanceStreamRef.current = null;
+    };
+    // The first sentence is spoken while the rest is still being written;
+    // `done` then carries the audio of the remaining text only
+    source.addEventListener('sentence', (e) => {
+      playGuidanceAudio(JSON.parse((e as MessageEvent).data).audio_path);
+    });
+    source.addEventListener('done', (e) => {
+      playGuidanceAudio(JSON.parse((e as MessageEvent).data).audio_path);
+      close();
+    });
+    source.addEventListener('error', close);
+  };
+
   // Vision
   const captureAndProcess = async () => {
     if (!videoRef.current || !canvasRef.current || isProcessing) return;
@@ -184,13 +256,21 @@ function App() {
         formData.append('file', blob, 'capture.jpg');
 
         try {
-          const res = await axios.post<ApiResponse>('/api/process_frame', formData);
+          // Boxes are drawn from the detections, so skip the annotated image
+          const res = await axios.post<ApiResponse>('/api/process_frame?image=none', formData);
           setGuidance(res.data.guidance_text);
           setTarget(res.data.target);
           setDetections(res.data.detections ?? []);
+          playGuidanceAudio(res.data.audio_path);
+          // No guidance for this scene yet: stream it instead of waiting for the next frame
+          if (res.data.guidance_age_s == null) streamGuidance();
         } catch (error) {
           console.error("API Error", error);
-          setGuidance("Error processing frame.");
+          if (axios.isAxiosError(error) && error.response?.status === 429) {
+            setGuidance("Server is busy. Try again in a moment.");
+          } else {
+            setGuidance("Error processing frame.");
+          }
         } finally {
           setIsProcessing(false);
         }